@@ -12,6 +12,29 @@ from sdlc_ai_project.agents.skeletons import CodeSkeletonGenerator
 
 load_dotenv()
 
+# Keys of generate_code_task's output, also used when it is fanned out per module
+CODE_OUTPUT_KEYS = ("module_code", "integration_code", "error_handling", "logging")
+
+
+def module_code_task_description(module_name: str, module_spec, module_boilerplate, interfaces, data_models) -> str:
+    """Prompt for generating one module's code when generate_code_task is fanned out per module."""
+    return (
+        f"Using the skeleton of the '{module_name}' module: {module_spec}, its boilerplate: {module_boilerplate}, "
+        f"the shared interfaces: {interfaces} and data models: {data_models}, generate production-ready code "
+        "for this module only. Include:\n"
+        "- Implementation of core logic\n"
+        "- Error handling and logging\n"
+        "- Integration with other modules through the shared interfaces\n"
+        "- Adherence to design patterns\n"
+        "- Inline documentation\n"
+        "Return a JSON object with keys:\n"
+        "- 'module_code': Code for this module\n"
+        "- 'integration_code': Code integrating this module with the others\n"
+        "- 'error_handling': Error handling implementations\n"
+        "- 'logging': Logging implementations"
+    )
+
+
 @CrewBase
 class CodeGenerator:
     """
@@ -16,6 +16,28 @@ from dotenv import load_dotenv
 # )
 load_dotenv()
 
+# Keys of module_boilerplate_task's output, also used when it is fanned out per module
+BOILERPLATE_OUTPUT_KEYS = ("module_implementations", "interface_code", "data_model_code", "error_handling_code")
+
+
+def module_boilerplate_task_description(module_name: str, module_spec, interfaces, data_models) -> str:
+    """Prompt for one module's boilerplate when module_boilerplate_task is fanned out per module."""
+    return (
+        f"Generate detailed boilerplate code for the '{module_name}' module based on its skeleton: {module_spec}, "
+        f"the interface specifications: {interfaces} and data models: {data_models}. Cover this module only and include:\n"
+        "- Class and function definitions\n"
+        "- Interface implementations\n"
+        "- Data model implementations\n"
+        "- Error handling code\n"
+        "- Performance optimization code\n"
+        "- Integration points\n"
+        "Return a JSON object with keys:\n"
+        "- 'module_implementations': Boilerplate code for this module\n"
+        "- 'interface_code': Interface implementations for this module\n"
+        "- 'data_model_code': Data model implementations used by this module\n"
+        "- 'error_handling_code': Error handling implementations"
+    )
+
 
 # -------------------------------
 # Agent 3: Code Skeleton Generator
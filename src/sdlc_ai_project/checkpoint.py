@@ -0,0 +1,97 @@
+import os
+import json
+import shutil
+import tempfile
+from typing import Dict, Any, Optional, Iterable
+
+
+class CheckpointStore:
+    """
+    Reads back the artifacts a run writes under its `title` directory.
+
+    Stage outputs live in `<title>/<Stage>.json` (written by save_to_json) and each
+    finished task is also saved to `<title>/checkpoints/<Stage>/<task>.json` together
+    with the fingerprint of the inputs it was produced from, so a later run can resume
+    from the first missing task and recompute only tasks whose inputs changed.
+    """
+
+    def __init__(self, title: str):
+        self.directory = title
+
+    def stage_path(self, stage: str) -> str:
+        return os.path.join(self.directory, f"{stage}.json")
+
+    def task_dir(self, stage: str) -> str:
+        return os.path.join(self.directory, "checkpoints", stage)
+
+    def load_stage(self, stage: str, task_names: Iterable[str]) -> Optional[Dict[str, Any]]:
+        """Return a saved stage output if it exists and has a non-empty output for every task."""
+        data = _read_json(self.stage_path(stage))
+        if not isinstance(data, dict):
+            return None
+        missing = [name for name in task_names if data.get(name) in (None, "", {}, [])]
+        if missing:
+            print(f"Checkpoint {self.stage_path(stage)} is incomplete, missing: {', '.join(missing)}")
+            return None
+        return data
+
+    def save_task(self, stage: str, task_name: str, output: Any, fingerprint: Optional[str] = None):
+        """Atomically save one task's output and the fingerprint of its inputs."""
+        directory = self.task_dir(stage)
+        os.makedirs(directory, exist_ok=True)
+        record = {"task": task_name, "fingerprint": fingerprint, "output": output}
+        write_json_atomic(os.path.join(directory, f"{task_name}.json"), record)
+
+    def update_task_output(self, stage: str, task_name: str, output: Any) -> bool:
+        """
+        Replace a saved task's output (e.g. after review) while keeping its fingerprint,
+        so the task itself stays valid and everything downstream of it is recomputed.
+        Returns False if the task has no checkpoint.
+        """
+        record = self.load_tasks(stage).get(task_name)
+        if record is None:
+            return False
+        self.save_task(stage, task_name, output, record.get("fingerprint"))
+        return True
+
+    def load_tasks(self, stage: str) -> Dict[str, Dict[str, Any]]:
+        """Return the saved records ("output", "fingerprint") of a stage's tasks, keyed by task name."""
+        directory = self.task_dir(stage)
+        if not os.path.isdir(directory):
+            return {}
+        outputs = {}
+        for filename in sorted(os.listdir(directory)):
+            if not filename.endswith(".json"):
+                continue
+            data = _read_json(os.path.join(directory, filename))
+            if isinstance(data, dict) and data.get("output") not in (None, ""):
+                outputs[data["task"]] = data
+        return outputs
+
+    def clear_tasks(self, stage: str):
+        """Forget a stage's task checkpoints, e.g. before a fresh run of that stage."""
+        shutil.rmtree(self.task_dir(stage), ignore_errors=True)
+
+
+def _read_json(path: str) -> Any:
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Ignoring unreadable checkpoint {path}: {e}")
+        return None
+
+
+def write_json_atomic(path: str, data: Any):
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
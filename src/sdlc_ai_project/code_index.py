@@ -0,0 +1,356 @@
+import os
+import re
+import json
+import time
+import fcntl
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Tuple, NamedTuple, Sequence
+import requests
+from sdlc_ai_project.checkpoint import write_json_atomic
+from sdlc_ai_project.embeddings import INDEX_EMBEDDING_MODEL, embedder_key, get_embedder
+from sdlc_ai_project.rate_limit import RATE_LIMIT_MAX_WAIT, RATE_LIMITING, TokenBucketLimiter, rate_limiter, search_slot
+from sdlc_ai_project.retrieval import HYBRID_RETRIEVAL, HybridRetriever
+from sdlc_ai_project.token_accounting import count_tokens
+from sdlc_ai_project.vector_store import VectorStore, open_vector_store
+
+# Environment variables with defaults
+CODE_INDEX_DIR = os.getenv("CODE_INDEX_DIR", os.path.join(".", "db", "code_index"))
+CODE_INDEX_COLLECTION = os.getenv("CODE_INDEX_COLLECTION", "code_index")
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
+GITHUB_RAW_URL = os.getenv("GITHUB_RAW_URL", "https://raw.githubusercontent.com")
+MAX_FILES_PER_REPO = int(os.getenv("MAX_FILES_PER_REPO", "300"))
+MAX_FILE_BYTES = int(os.getenv("MAX_FILE_BYTES", "100000"))
+CHUNK_LINES = int(os.getenv("CHUNK_LINES", "60"))
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "5"))
+INGEST_TIMEOUT = float(os.getenv("INGEST_TIMEOUT", "180"))  # Seconds for a batch of repositories
+# Extra seconds ingest_many waits past the deadline for a repository stuck in a single request
+INGEST_GRACE = float(os.getenv("INGEST_GRACE", "5"))
+
+CODE_EXTENSIONS = (
+    ".py", ".js", ".jsx", ".ts", ".tsx", ".java", ".kt", ".go", ".rs", ".rb", ".php", ".cs", ".c", ".h",
+    ".cpp", ".hpp", ".swift", ".scala", ".vue", ".svelte", ".sql", ".sh", ".md",
+)
+SKIPPED_DIRECTORIES = ("node_modules/", "vendor/", "dist/", "build/", ".git/", "__pycache__/", "test/fixtures/")
+
+_GITHUB_REPO = re.compile(r"^https?://(?:www\.)?github\.com/([\w.-]+)/([\w.-]+?)(?:\.git)?(?:[/?#].*)?$")
+
+
+def parse_repo_url(url: str) -> Optional[Tuple[str, str]]:
+    """Return (owner, repo) for a github.com repository URL, or None for anything else."""
+    match = _GITHUB_REPO.match((url or "").strip())
+    return (match.group(1), match.group(2)) if match else None
+
+
+def is_indexable(path: str, size: int = 0) -> bool:
+    return path.endswith(CODE_EXTENSIONS) and size <= MAX_FILE_BYTES and \
+        not any(f"/{directory}" in f"/{path}" for directory in SKIPPED_DIRECTORIES)
+
+
+def remaining(deadline: Optional[float], what: str) -> Optional[float]:
+    """Seconds left before `deadline` (a time.monotonic() value), or None without one; TimeoutError once it passed."""
+    if deadline is None:
+        return None
+    left = deadline - time.monotonic()
+    if left <= 0:
+        raise TimeoutError(f"Ran out of time for {what}")
+    return left
+
+
+def chunk_code(text: str, lines_per_chunk: int = CHUNK_LINES) -> List[Tuple[int, str]]:
+    """Split a file into (first line number, text) windows of `lines_per_chunk` lines."""
+    lines = text.splitlines()
+    return [
+        (start + 1, "\n".join(lines[start:start + lines_per_chunk]))
+        for start in range(0, len(lines), lines_per_chunk)
+        if "".join(lines[start:start + lines_per_chunk]).strip()
+    ]
+
+
+# -------------------------------
+# GitHub
+# -------------------------------
+class GitHubClient:
+    """
+    The few GitHub REST calls indexing needs: head commit, file tree and raw files. Each
+    request takes a slot of the shared "search" rate limit and concurrency window.
+    """
+
+    def __init__(self, token: Optional[str] = None, api_url: str = GITHUB_API_URL, raw_url: str = GITHUB_RAW_URL,
+                 timeout: float = 30, limiter: Optional[TokenBucketLimiter] = None):
+        self.api_url = api_url.rstrip("/")
+        self.raw_url = raw_url.rstrip("/")
+        self.timeout = timeout
+        self.limiter = limiter
+        self.session = requests.Session()
+        self.session.headers["Accept"] = "application/vnd.github+json"
+        token = token or os.getenv("GITHUB_TOKEN") or os.getenv("gh_key")
+        if token:
+            self.session.headers["Authorization"] = f"Bearer {token}"
+
+    def _get(self, url: str, deadline: Optional[float]) -> requests.Response:
+        left = remaining(deadline, url)
+        with search_slot(self.limiter, RATE_LIMIT_MAX_WAIT if left is None else min(left, RATE_LIMIT_MAX_WAIT)):
+            left = remaining(deadline, url)
+            response = self.session.get(url, timeout=self.timeout if left is None else min(left, self.timeout))
+            response.raise_for_status()  # Inside the slot, so 429s shrink the window
+        return response
+
+    def _get_json(self, path: str, deadline: Optional[float] = None) -> Any:
+        return self._get(f"{self.api_url}{path}", deadline).json()
+
+    def head_commit(self, owner: str, repo: str, deadline: Optional[float] = None) -> str:
+        branch = self._get_json(f"/repos/{owner}/{repo}", deadline)["default_branch"]
+        return self._get_json(f"/repos/{owner}/{repo}/commits/{branch}", deadline)["sha"]
+
+    def tree(self, owner: str, repo: str, commit: str, deadline: Optional[float] = None) -> Dict[str, str]:
+        """Indexable files at `commit`, as path -> blob sha, capped at MAX_FILES_PER_REPO."""
+        entries = self._get_json(f"/repos/{owner}/{repo}/git/trees/{commit}?recursive=1", deadline).get("tree", [])
+        files = {
+            entry["path"]: entry["sha"] for entry in entries
+            if entry.get("type") == "blob" and is_indexable(entry["path"], entry.get("size", 0))
+        }
+        return dict(sorted(files.items())[:MAX_FILES_PER_REPO])
+
+    def file(self, owner: str, repo: str, commit: str, path: str, deadline: Optional[float] = None) -> str:
+        return self._get(f"{self.raw_url}/{owner}/{repo}/{commit}/{path}", deadline).text
+
+
+# -------------------------------
+# Repository Index
+# -------------------------------
+class IngestFailure(NamedTuple):
+    url: str
+    reason: str  # "timeout", "http_<status>", "network", "invalid_url" or the exception type
+    message: str
+
+
+class IngestResult(NamedTuple):
+    url: str
+    commit: str
+    status: str  # "new", "updated" or "unchanged"
+    files_indexed: int
+    files_removed: int
+    chunks: int
+    skipped: Tuple[IngestFailure, ...] = ()  # Files that couldn't be fetched; retried by the next ingest
+
+
+class IngestReport(NamedTuple):
+    results: List[IngestResult]
+    failures: List[IngestFailure]
+    seconds: float
+
+    @property
+    def urls(self) -> List[str]:
+        return [result.url for result in self.results]
+
+
+def failure_reason(error: BaseException) -> str:
+    if isinstance(error, TimeoutError):
+        return "timeout"
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return f"http_{error.response.status_code}"
+    if isinstance(error, requests.Timeout):
+        return "timeout"
+    if isinstance(error, requests.RequestException):
+        return "network"
+    if isinstance(error, ValueError):
+        return "invalid_url"
+    return type(error).__name__
+
+
+class RepoIndex:
+    """
+    Code chunks of GitHub repositories, embedded once and kept across calls and processes.
+
+    Each repository has a manifest keyed by its URL recording the indexed commit and
+    every file's blob sha and chunk ids. Ingesting a repository at the commit already
+    indexed does nothing; at a new commit only files whose blob changed are fetched and
+    re-embedded, and chunks of deleted files are dropped. A file lock per repository
+    keeps concurrent processes from ingesting the same repository twice.
+
+    Embedding draws on the shared "embedding" token bucket, which caps throughput
+    across every thread and process ingesting at once. Chunks are embedded with
+    INDEX_EMBEDDING_MODEL; each embedder gets its own collection and manifests, so
+    switching models (or falling back to the hashing embedder) re-indexes from scratch.
+    """
+
+    def __init__(self, store: Optional[VectorStore] = None, directory: str = CODE_INDEX_DIR,
+                 github: Optional[GitHubClient] = None, embedding_model: str = INDEX_EMBEDDING_MODEL,
+                 limiter: Optional[TokenBucketLimiter] = None):
+        self._store = store
+        self._retriever: Optional[HybridRetriever] = None
+        self._github = github
+        self.directory = directory
+        self.embedding_model = embedding_model
+        self.limiter = limiter or rate_limiter
+
+    @property
+    def github(self) -> GitHubClient:
+        if self._github is None:
+            self._github = GitHubClient(limiter=self.limiter)
+        return self._github
+
+    @property
+    def store(self) -> VectorStore:
+        if self._store is None:
+            self._store = open_vector_store(f"{CODE_INDEX_COLLECTION}_{embedder_key(self.embedder)}")
+        return self._store
+
+    @property
+    def retriever(self) -> HybridRetriever:
+        if self._retriever is None:
+            self._retriever = HybridRetriever(self.store)
+        return self._retriever
+
+    @property
+    def embedder(self):
+        return get_embedder(self.embedding_model)
+
+    def _manifest_path(self, owner: str, repo: str) -> str:
+        return os.path.join(self.directory, "manifests", embedder_key(self.embedder), f"{owner}__{repo}.json")
+
+    def manifest(self, url: str) -> Dict[str, Any]:
+        owner, repo = parse_repo_url(url)
+        path = self._manifest_path(owner, repo)
+        if not os.path.exists(path):
+            return {"url": url, "commit": None, "files": {}}
+        with open(path, "r") as f:
+            return json.load(f)
+
+    @contextmanager
+    def _locked(self, owner: str, repo: str, deadline: Optional[float] = None):
+        path = self._manifest_path(owner, repo) + ".lock"
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as lock:
+            if deadline is None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            else:
+                while True:
+                    try:
+                        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        break
+                    except BlockingIOError:
+                        remaining(deadline, f"the {owner}/{repo} index lock")  # Another process is ingesting it
+                        time.sleep(0.05)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def embed(self, texts: Sequence[str], deadline: Optional[float] = None):
+        if RATE_LIMITING:
+            self.limiter.acquire("embedding", sum(count_tokens(text) for text in texts),
+                                 timeout=remaining(deadline, "the embedding rate limit"))
+        return self.embedder.embed(texts)
+
+    def _save(self, owner: str, repo: str, url: str, commit: Optional[str], files: Dict[str, Any]):
+        write_json_atomic(self._manifest_path(owner, repo), {"url": url, "commit": commit, "files": files})
+
+    def ingest(self, url: str, timeout: Optional[float] = None) -> IngestResult:
+        """Bring the index up to date with the repository's default branch, within `timeout` seconds."""
+        return self._ingest(url, None if timeout is None else time.monotonic() + timeout)
+
+    def _ingest(self, url: str, deadline: Optional[float]) -> IngestResult:
+        """
+        Every wait (GitHub requests, the index lock, the embedding rate limit) is bounded
+        by `deadline`; past it TimeoutError is raised. The files embedded so far are kept
+        either way, so the next ingest carries on from there. A file that can't be fetched
+        keeps its previous chunks and is reported in `skipped`.
+        """
+        parsed = parse_repo_url(url)
+        if parsed is None:
+            raise ValueError(f"Not a GitHub repository URL: {url}")
+        owner, repo = parsed
+        url = f"https://github.com/{owner}/{repo}"
+        commit = self.github.head_commit(owner, repo, deadline=deadline)
+        with self._locked(owner, repo, deadline):
+            # Read under the lock: another process may have just ingested this commit
+            manifest = self.manifest(url)
+            if manifest["commit"] == commit:
+                return IngestResult(url, commit, "unchanged", 0, 0, 0)
+            files = self.github.tree(owner, repo, commit, deadline=deadline)
+            indexed = manifest["files"]
+            changed = [path for path, sha in files.items() if indexed.get(path, {}).get("sha") != sha]
+            removed = [path for path in indexed if path not in files]
+            skipped: List[IngestFailure] = []
+            chunks = 0
+            complete = False
+            try:
+                self.retriever.delete([chunk_id for path in removed for chunk_id in indexed[path]["chunks"]])
+                for path in removed:
+                    del indexed[path]
+                for path in changed:
+                    remaining(deadline, url)
+                    try:
+                        text = self.github.file(owner, repo, commit, path, deadline=deadline)
+                    except requests.RequestException as error:
+                        skipped.append(IngestFailure(f"{url}/blob/{commit}/{path}", failure_reason(error), str(error)))
+                        continue
+                    pieces = chunk_code(text)
+                    ids = [f"{owner}/{repo}:{path}:{line}" for line, _ in pieces]
+                    documents = [f"# {owner}/{repo}/{path}:{line}\n{piece}" for line, piece in pieces]
+                    for start in range(0, len(ids), EMBED_BATCH_SIZE):
+                        batch = slice(start, start + EMBED_BATCH_SIZE)
+                        self.retriever.add(ids[batch], self.embed(documents[batch], deadline), documents[batch], [
+                            {"repo": url, "path": path, "line": line, "commit": commit} for line, _ in pieces[batch]
+                        ])
+                    # New chunks replace old ones with the same id; drop the rest of the old version
+                    kept = set(ids)
+                    self.retriever.delete([chunk_id for chunk_id in indexed.get(path, {}).get("chunks", [])
+                                           if chunk_id not in kept])
+                    indexed[path] = {"sha": files[path], "chunks": ids}
+                    chunks += len(ids)
+                complete = True
+            finally:
+                # Until every file is in, the old commit stays recorded so the next ingest diffs again
+                self._save(owner, repo, url, commit if complete and not skipped else manifest["commit"], indexed)
+        status = "new" if manifest["commit"] is None else "updated"
+        print(f"Indexed {url}@{commit[:7]} ({status}): {len(changed) - len(skipped)} files re-embedded, "
+              f"{len(removed)} removed, {len(skipped)} skipped")
+        return IngestResult(url, commit, status, len(changed) - len(skipped), len(removed), chunks, tuple(skipped))
+
+    def ingest_many(self, urls: Sequence[str], max_workers: int = INGEST_WORKERS,
+                    timeout: float = INGEST_TIMEOUT) -> IngestReport:
+        """
+        Ingest repositories in parallel on up to `max_workers` threads, all within `timeout`.
+
+        A repository that fails or times out is reported in the failures and doesn't
+        affect the others. A repository still stuck INGEST_GRACE seconds past the
+        deadline is reported as timed out and left to finish in the background.
+        """
+        started = time.monotonic()
+        deadline = started + timeout
+        urls = list(dict.fromkeys(urls))
+        results: List[IngestResult] = []
+        failures: List[IngestFailure] = []
+        if not urls:
+            return IngestReport(results, failures, 0.0)
+        pool = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(urls))), thread_name_prefix="sdlc-ingest")
+        try:
+            futures = {pool.submit(contextvars.copy_context().run, self._ingest, url, deadline): url for url in urls}
+            for future, url in futures.items():
+                try:
+                    results.append(future.result(timeout=max(0.0, deadline - time.monotonic()) + INGEST_GRACE))
+                except Exception as error:
+                    if isinstance(error, TimeoutError) and not future.done():
+                        error = TimeoutError(f"Indexing {url} took over {timeout}s")
+                    failures.append(IngestFailure(url, failure_reason(error), str(error)))
+                    print(f"Could not index {url}: {failure_reason(error)}: {error}")
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+        return IngestReport(results, failures, time.monotonic() - started)
+
+    def search(self, query: str, k: int = 8, repos: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """The `k` chunks most relevant to `query`, optionally only from the given repository URLs."""
+        where = None
+        if repos:
+            where = {"repo": [f"https://github.com/{owner}/{repo}" for owner, repo in filter(None, map(parse_repo_url, repos))]}
+        if HYBRID_RETRIEVAL:
+            return self.retriever.search(query, self.embed, k, where)
+        return self.store.search(self.embed([query])[0], k, where)
+
+
+code_index = RepoIndex()
@@ -0,0 +1,194 @@
+import os
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+from sdlc_ai_project.llm_middleware import add_call_middleware
+from sdlc_ai_project.hedging import status_code_of
+from sdlc_ai_project.token_accounting import provider_of
+
+# Environment variables with defaults
+ADAPTIVE_CONCURRENCY = os.getenv("ADAPTIVE_CONCURRENCY", "true").lower() == "true"
+AIMD_INITIAL_WINDOW = float(os.getenv("AIMD_INITIAL_WINDOW", "4"))
+AIMD_MIN_WINDOW = float(os.getenv("AIMD_MIN_WINDOW", "1"))
+AIMD_MAX_WINDOW = float(os.getenv("AIMD_MAX_WINDOW", "16"))
+AIMD_DECREASE = float(os.getenv("AIMD_DECREASE", "0.5"))  # Window multiplier on overload
+# Shrink when recent latency exceeds this multiple of the long-run latency
+AIMD_LATENCY_FACTOR = float(os.getenv("AIMD_LATENCY_FACTOR", "2.0"))
+AIMD_BACKOFF_SECONDS = float(os.getenv("AIMD_BACKOFF_SECONDS", "2"))
+AIMD_MAX_BACKOFF_SECONDS = float(os.getenv("AIMD_MAX_BACKOFF_SECONDS", "60"))
+
+OVERLOAD_STATUS_CODES = {429, 503}
+OVERLOAD_MESSAGES = ("quota", "rate limit", "ratelimit", "resource_exhausted", "resource exhausted",
+                     "overloaded", "too many requests", "service unavailable")
+
+# Smoothing of the recent and long-run latency averages
+RECENT_LATENCY_WEIGHT = 0.3
+BASELINE_LATENCY_WEIGHT = 0.02
+# Latency rises smaller than this are jitter, not congestion
+LATENCY_NOISE_SECONDS = 0.05
+
+
+def is_overload_error(error: BaseException) -> bool:
+    """Whether the provider is telling us to slow down: 429, 503, quota or rate limit errors."""
+    code = status_code_of(error)
+    if code is not None:
+        return code in OVERLOAD_STATUS_CODES
+    message = str(error).lower()
+    return any(text in message for text in OVERLOAD_MESSAGES)
+
+
+class AIMDController:
+    """
+    Additive-increase, multiplicative-decrease limit on concurrent calls to one provider.
+
+    Every successful call grows the window by 1/window, about one slot per window of
+    successes. A 429/503 or a rise of recent latency to AIMD_LATENCY_FACTOR times the
+    long-run average multiplies it by `decrease`, at most once per recent latency, so
+    one burst of failures counts once. Overloads also pause new calls for an exponential
+    back-off. Callers block in `slot()` until the window has room.
+    """
+
+    def __init__(self, name: str, initial: float = AIMD_INITIAL_WINDOW, minimum: float = AIMD_MIN_WINDOW,
+                 maximum: float = AIMD_MAX_WINDOW, decrease: float = AIMD_DECREASE,
+                 latency_factor: float = AIMD_LATENCY_FACTOR, backoff: float = AIMD_BACKOFF_SECONDS,
+                 max_backoff: float = AIMD_MAX_BACKOFF_SECONDS):
+        self.name = name
+        self.window = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.in_flight = 0
+        self.backoff_until = 0.0
+        self.overloads_in_a_row = 0
+        self.recent_latency: Optional[float] = None
+        self.baseline_latency: Optional[float] = None
+        self.last_decrease = 0.0
+        self.counts = {"successes": 0, "overloads": 0, "errors": 0, "increases": 0, "decreases": 0}
+        self._condition = threading.Condition()
+
+    def _has_room(self) -> bool:
+        return self.in_flight < max(1, int(self.window)) and time.monotonic() >= self.backoff_until
+
+    def acquire(self, timeout: Optional[float] = None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while not self._has_room():
+                now = time.monotonic()
+                if deadline is not None and now >= deadline:
+                    raise TimeoutError(f"No {self.name} concurrency slot within {timeout}s")
+                wait = self.backoff_until - now if now < self.backoff_until else None
+                if deadline is not None:
+                    wait = min(wait if wait is not None else deadline - now, deadline - now)
+                self._condition.wait(wait)
+            self.in_flight += 1
+
+    def release(self, seconds: float, error: Optional[BaseException] = None):
+        with self._condition:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if error is not None and is_overload_error(error):
+                self.counts["overloads"] += 1
+                self.overloads_in_a_row += 1
+                self.backoff_until = now + min(self.max_backoff, self.backoff * 2 ** (self.overloads_in_a_row - 1))
+                self._shrink(now)
+            elif error is not None:
+                self.counts["errors"] += 1
+            else:
+                self.counts["successes"] += 1
+                self.overloads_in_a_row = 0
+                self._observe(seconds)
+                if self._latency_rising():
+                    self._shrink(now)
+                elif self.window < self.maximum:
+                    self.window = min(self.maximum, self.window + 1 / self.window)
+                    self.counts["increases"] += 1
+            self._condition.notify_all()
+
+    def _latency_rising(self) -> bool:
+        return self.recent_latency > self.latency_factor * self.baseline_latency and \
+            self.recent_latency - self.baseline_latency > LATENCY_NOISE_SECONDS
+
+    def _observe(self, seconds: float):
+        if self.recent_latency is None:
+            self.recent_latency = self.baseline_latency = seconds
+            return
+        self.recent_latency += RECENT_LATENCY_WEIGHT * (seconds - self.recent_latency)
+        self.baseline_latency += BASELINE_LATENCY_WEIGHT * (seconds - self.baseline_latency)
+
+    def _shrink(self, now: float):
+        # Calls already in flight when the window shrank report the same congestion
+        if now - self.last_decrease < (self.recent_latency or 0):
+            return
+        self.window = max(self.minimum, self.window * self.decrease)
+        self.last_decrease = now
+        self.counts["decreases"] += 1
+
+    @contextmanager
+    def slot(self, timeout: Optional[float] = None):
+        """Hold one of the window's slots for the block, reporting its outcome and duration."""
+        self.acquire(timeout)
+        started = time.monotonic()
+        try:
+            yield
+        except BaseException as error:
+            self.release(time.monotonic() - started, error)
+            raise
+        self.release(time.monotonic() - started)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._condition:
+            return {
+                "window": round(self.window, 2),
+                "in_flight": self.in_flight,
+                "backing_off": time.monotonic() < self.backoff_until,
+                "backoff_remaining": round(max(0.0, self.backoff_until - time.monotonic()), 2),
+                "overloads_in_a_row": self.overloads_in_a_row,
+                "recent_latency": self.recent_latency,
+                "baseline_latency": self.baseline_latency,
+                **self.counts,
+            }
+
+
+_controllers: Dict[str, AIMDController] = {}
+_controllers_lock = threading.Lock()
+
+
+def get_controller(name: str) -> AIMDController:
+    """The process-wide controller for a provider or tool family, created on first use."""
+    with _controllers_lock:
+        if name not in _controllers:
+            _controllers[name] = AIMDController(name)
+        return _controllers[name]
+
+
+@contextmanager
+def concurrency_slot(name: str):
+    """Run the block under `name`'s adaptive concurrency limit, when ADAPTIVE_CONCURRENCY is on."""
+    if not ADAPTIVE_CONCURRENCY:
+        yield
+        return
+    with get_controller(name).slot():
+        yield
+
+
+def concurrency_snapshot() -> Dict[str, Dict[str, Any]]:
+    with _controllers_lock:
+        controllers = dict(_controllers)
+    return {name: controller.snapshot() for name, controller in sorted(controllers.items())}
+
+
+def _controlled_call(self, call_next, messages, *args, **kwargs):
+    with get_controller(provider_of(self)).slot():
+        return call_next(messages, *args, **kwargs)
+
+
+def control_concurrency(llm):
+    """
+    Limit `llm`'s in-flight calls with its provider's AIMD controller.
+    Apply before rate_limit, so calls waiting for quota don't hold a slot.
+    """
+    return add_call_middleware(llm, "concurrency_limited", _controlled_call)
@@ -0,0 +1,69 @@
+import os
+from typing import Dict, Any, Iterable, Tuple
+from sdlc_ai_project.parsing import parse_json_from_markdown
+from sdlc_ai_project.token_accounting import count_tokens
+
+# Environment variables with defaults
+CONTEXT_SLICING = os.getenv("CONTEXT_SLICING", "true").lower() == "true"
+
+# task name -> input name -> dotted paths of the subtrees that task needs
+TaskSlices = Dict[str, Dict[str, Tuple[str, ...]]]
+
+
+def estimate_tokens(value: Any) -> int:
+    """Approximate how many prompt tokens `value` takes when rendered into a prompt."""
+    return count_tokens(str(value))
+
+
+def select_paths(data: Any, paths: Iterable[str]) -> Any:
+    """
+    Keep only the subtrees of `data` named by dotted `paths`, preserving their nesting.
+
+    Agent outputs nested as markdown JSON strings are parsed along the way. Paths that
+    don't exist are skipped; if none exist, `data` is returned unchanged so a task never
+    loses its input because an agent answered with a different shape.
+    """
+    data = parse_json_from_markdown(data)
+    selected: Dict[str, Any] = {}
+    for path in paths:
+        keys = path.split(".")
+        value = data
+        for key in keys:
+            value = parse_json_from_markdown(value)
+            if not isinstance(value, dict) or key not in value:
+                break
+            value = value[key]
+        else:
+            target = selected
+            for key in keys[:-1]:
+                target = target.setdefault(key, {})
+                if not isinstance(target, dict):
+                    break  # A shorter path already selected the whole subtree
+            else:
+                target.setdefault(keys[-1], parse_json_from_markdown(value))
+    return selected or data
+
+
+def slice_task_inputs(inputs: Dict[str, Any], slices: TaskSlices) -> Tuple[Dict[str, Dict[str, Any]], int, int]:
+    """
+    Cut each task's copy of its large inputs down to the paths in `slices`.
+
+    Returns the per-task input overrides for CrewTemplate.bind, plus the estimated prompt
+    tokens those inputs take before and after slicing.
+    """
+    task_inputs: Dict[str, Dict[str, Any]] = {}
+    full_tokens = sliced_tokens = 0
+    for task_name, input_paths in slices.items():
+        for input_name, paths in input_paths.items():
+            value = inputs[input_name]
+            sliced = select_paths(value, paths)
+            task_inputs.setdefault(task_name, {})[input_name] = sliced
+            full_tokens += estimate_tokens(value)
+            sliced_tokens += estimate_tokens(sliced)
+    return task_inputs, full_tokens, sliced_tokens
+
+
+def format_savings(stage_name: str, full_tokens: int, sliced_tokens: int) -> str:
+    saved = full_tokens - sliced_tokens
+    percent = 100 * saved / full_tokens if full_tokens else 0
+    return f"{stage_name}: context slicing saved ~{saved} prompt tokens ({percent:.0f}% of sliced inputs)"
@@ -0,0 +1,296 @@
+import os
+import json
+import time
+import fcntl
+import hashlib
+import contextvars
+from html.parser import HTMLParser
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Tuple, NamedTuple, Sequence
+import requests
+from sdlc_ai_project.checkpoint import write_json_atomic
+from sdlc_ai_project.code_index import EMBED_BATCH_SIZE, IngestFailure, failure_reason
+from sdlc_ai_project.embeddings import INDEX_EMBEDDING_MODEL, embedder_key, get_embedder
+from sdlc_ai_project.rate_limit import RATE_LIMITING, TokenBucketLimiter, rate_limiter
+from sdlc_ai_project.retrieval import HYBRID_RETRIEVAL, HybridRetriever
+from sdlc_ai_project.token_accounting import count_tokens
+from sdlc_ai_project.vector_store import VectorStore, open_vector_store
+
+# Environment variables with defaults
+DOC_INDEX_DIR = os.getenv("DOC_INDEX_DIR", os.path.join(".", "db", "doc_index"))
+DOC_INDEX_COLLECTION = os.getenv("DOC_INDEX_COLLECTION", "doc_index")
+DOC_FETCH_WORKERS = int(os.getenv("DOC_FETCH_WORKERS", "8"))
+DOC_FETCH_TIMEOUT = float(os.getenv("DOC_FETCH_TIMEOUT", "20"))  # Seconds for a whole page
+DOC_READ_TIMEOUT = float(os.getenv("DOC_READ_TIMEOUT", "5"))  # Seconds a single socket read may stall
+DOC_MAX_BYTES = int(os.getenv("DOC_MAX_BYTES", "2000000"))
+DOC_REFRESH_SECONDS = float(os.getenv("DOC_REFRESH_SECONDS", str(7 * 24 * 3600)))  # Re-fetch pages older than this
+DOC_CHUNK_WORDS = int(os.getenv("DOC_CHUNK_WORDS", "200"))
+DOC_CHUNK_OVERLAP = int(os.getenv("DOC_CHUNK_OVERLAP", "40"))
+
+USER_AGENT = "sdlc-ai-project documentation research"
+READ_SIZE = 65536
+
+
+# -------------------------------
+# HTML to Text
+# -------------------------------
+class _TextExtractor(HTMLParser):
+    """Collects a page's title and the text of its blocks, skipping scripts and navigation."""
+
+    SKIPPED = {"script", "style", "noscript", "nav", "header", "footer", "aside", "svg", "form"}
+    BLOCKS = {"p", "pre", "li", "h1", "h2", "h3", "h4", "h5", "h6", "td", "th", "dt", "dd", "blockquote",
+              "div", "section", "article", "tr", "br"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = ""
+        self.blocks: List[str] = []
+        self._current: List[str] = []
+        self._skipping = 0
+        self._in_title = False
+        self._in_pre = False
+
+    def _flush(self):
+        text = "".join(self._current) if self._in_pre else " ".join("".join(self._current).split())
+        if text.strip():
+            self.blocks.append(text.strip("\n"))
+        self._current = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIPPED:
+            self._skipping += 1
+        elif tag == "title":
+            self._in_title = True
+        elif tag in self.BLOCKS:
+            self._flush()
+            self._in_pre = self._in_pre or tag == "pre"
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIPPED:
+            self._skipping = max(0, self._skipping - 1)
+        elif tag == "title":
+            self._in_title = False
+        elif tag in self.BLOCKS:
+            self._flush()
+            if tag == "pre":
+                self._in_pre = False
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data.strip()
+        elif not self._skipping:
+            self._current.append(data)
+
+
+def extract_text(html: str) -> Tuple[str, List[str]]:
+    """Return a page's title and its text blocks (paragraphs, headings, code, list items)."""
+    parser = _TextExtractor()
+    parser.feed(html)
+    parser.close()
+    parser._flush()
+    return parser.title, parser.blocks
+
+
+def chunk_blocks(blocks: Sequence[str], words: int = DOC_CHUNK_WORDS, overlap: int = DOC_CHUNK_OVERLAP) -> List[str]:
+    """
+    Pack consecutive blocks into chunks of about `words` words. A new chunk repeats the
+    last `overlap` words of the previous one; a block longer than a chunk is split.
+    """
+    chunks: List[str] = []
+    current: List[str] = []
+    size, fresh = 0, False
+    for block in blocks:
+        block_words = block.split()
+        pieces = [block] if len(block_words) <= words else [
+            " ".join(block_words[start:start + words]) for start in range(0, len(block_words), words)
+        ]
+        for piece in pieces:
+            piece_size = len(piece.split())
+            if fresh and size + piece_size > words:
+                chunks.append("\n".join(current))
+                tail = " ".join("\n".join(current).split()[-overlap:]) if overlap else ""
+                current, size, fresh = ([tail] if tail else []), len(tail.split()), False
+            current.append(piece)
+            size += piece_size
+            fresh = True
+    if fresh:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+# -------------------------------
+# Documentation Index
+# -------------------------------
+class DocIngestReport(NamedTuple):
+    indexed: List[str]  # Pages fetched and (re-)embedded
+    reused: List[str]  # Pages already in the index and fresh, or fetched again unchanged
+    failures: List[IngestFailure]
+    chunks: int
+    seconds: float
+
+    @property
+    def urls(self) -> List[str]:
+        return self.indexed + self.reused
+
+
+class DocIndex:
+    """
+    Chunks of documentation pages, embedded once and kept across calls and processes.
+
+    A manifest records every page's content hash, chunk ids and fetch time. Pages
+    fetched within DOC_REFRESH_SECONDS aren't fetched again; older ones are, but only
+    re-embedded when their text changed. Pages are fetched concurrently and the chunks
+    of all new pages embedded together in EMBED_BATCH_SIZE batches. As in RepoIndex,
+    each embedder has its own collection and manifest.
+    """
+
+    def __init__(self, store: Optional[VectorStore] = None, directory: str = DOC_INDEX_DIR,
+                 embedding_model: str = INDEX_EMBEDDING_MODEL, limiter: Optional[TokenBucketLimiter] = None,
+                 refresh_seconds: float = DOC_REFRESH_SECONDS, fetch_timeout: float = DOC_FETCH_TIMEOUT):
+        self._store = store
+        self._retriever: Optional[HybridRetriever] = None
+        self.directory = directory
+        self.embedding_model = embedding_model
+        self.limiter = limiter or rate_limiter
+        self.refresh_seconds = refresh_seconds
+        self.fetch_timeout = fetch_timeout
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+
+    @property
+    def store(self) -> VectorStore:
+        if self._store is None:
+            self._store = open_vector_store(f"{DOC_INDEX_COLLECTION}_{embedder_key(self.embedder)}")
+        return self._store
+
+    @property
+    def retriever(self) -> HybridRetriever:
+        if self._retriever is None:
+            self._retriever = HybridRetriever(self.store)
+        return self._retriever
+
+    @property
+    def embedder(self):
+        return get_embedder(self.embedding_model)
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.directory, f"manifest_{embedder_key(self.embedder)}.json")
+
+    def manifest(self) -> Dict[str, Dict[str, Any]]:
+        if not os.path.exists(self.manifest_path):
+            return {}
+        with open(self.manifest_path, "r") as f:
+            return json.load(f)
+
+    @contextmanager
+    def _locked(self):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.manifest_path + ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def embed(self, texts: Sequence[str]):
+        if RATE_LIMITING:
+            self.limiter.acquire("embedding", sum(count_tokens(text) for text in texts))
+        return self.embedder.embed(texts)
+
+    def fetch(self, url: str) -> Tuple[str, List[str]]:
+        """
+        Download a page and return its title and text blocks. The whole download must
+        finish within fetch_timeout, however slowly the server trickles the body;
+        TimeoutError is raised otherwise.
+        """
+        deadline = time.monotonic() + self.fetch_timeout
+        with self.session.get(url, timeout=(self.fetch_timeout, min(DOC_READ_TIMEOUT, self.fetch_timeout)),
+                              stream=True) as response:
+            response.raise_for_status()
+            parts: List[bytes] = []
+            size = 0
+            while size < DOC_MAX_BYTES:
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Fetching {url} took over {self.fetch_timeout}s")
+                part = response.raw.read1(min(READ_SIZE, DOC_MAX_BYTES - size), decode_content=True)
+                if not part:
+                    break
+                parts.append(part)
+                size += len(part)
+            body = b"".join(parts)
+            content_type = response.headers.get("Content-Type", "text/html")
+        encoding = response.encoding if "charset" in content_type else "utf-8"
+        text = body.decode(encoding, errors="replace")
+        if "html" not in content_type:
+            return url, [block for block in text.split("\n\n") if block.strip()]
+        return extract_text(text)
+
+    def ingest(self, urls: Sequence[str], max_workers: int = DOC_FETCH_WORKERS) -> DocIngestReport:
+        """Fetch, chunk and embed the pages that aren't in the index yet or have gone stale."""
+        started = time.monotonic()
+        urls = list(dict.fromkeys(urls))
+        known = self.manifest()
+        now = time.time()
+        stale = [url for url in urls if now - known.get(url, {}).get("fetched", 0) > self.refresh_seconds]
+        reused = [url for url in urls if url not in stale]
+        failures: List[IngestFailure] = []
+
+        pages: Dict[str, Tuple[str, List[str]]] = {}
+        if stale:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(stale))), thread_name_prefix="sdlc-docs") as pool:
+                futures = {pool.submit(contextvars.copy_context().run, self.fetch, url): url for url in stale}
+                for future, url in futures.items():
+                    try:
+                        pages[url] = future.result()
+                    except Exception as error:
+                        failures.append(IngestFailure(url, failure_reason(error), str(error)))
+                        print(f"Could not fetch {url}: {failure_reason(error)}: {error}")
+                        if url in known:
+                            reused.append(url)  # Keep answering from the copy already indexed
+
+        with self._locked():
+            manifest = self.manifest()
+            ids, documents, metadatas, entries = [], [], [], {}
+            for url, (title, blocks) in pages.items():
+                chunks = chunk_blocks(blocks)
+                digest = hashlib.sha256("\n".join(chunks).encode("utf-8")).hexdigest()
+                if manifest.get(url, {}).get("sha") == digest:
+                    manifest[url]["fetched"] = now
+                    reused.append(url)
+                    continue
+                prefix = hashlib.sha256(url.encode("utf-8")).hexdigest()[:16]
+                chunk_ids = [f"{prefix}:{n}" for n in range(len(chunks))]
+                ids += chunk_ids
+                documents += [f"# {title or url}\n{chunk}" for chunk in chunks]
+                metadatas += [{"url": url, "title": title, "chunk": n} for n in range(len(chunks))]
+                entries[url] = {"sha": digest, "chunks": chunk_ids, "fetched": now, "title": title}
+
+            # Embed everything before touching the index, so a failure leaves the old pages in place
+            batches = [slice(start, start + EMBED_BATCH_SIZE) for start in range(0, len(ids), EMBED_BATCH_SIZE)]
+            vectors = [self.embed(documents[batch]) for batch in batches]
+            for batch, batch_vectors in zip(batches, vectors):
+                self.retriever.add(ids[batch], batch_vectors, documents[batch], metadatas[batch])
+            for url, entry in entries.items():
+                # New chunks replaced old ones with the same id; drop the rest of the old version
+                kept = set(entry["chunks"])
+                self.retriever.delete([chunk_id for chunk_id in manifest.get(url, {}).get("chunks", [])
+                                       if chunk_id not in kept])
+                manifest[url] = entry
+            write_json_atomic(self.manifest_path, manifest)
+            indexed = list(entries)
+
+        if indexed:
+            print(f"Indexed {len(indexed)} documentation pages ({len(ids)} chunks), reused {len(reused)}")
+        return DocIngestReport(indexed, reused, failures, len(ids), time.monotonic() - started)
+
+    def search(self, query: str, k: int = 5, urls: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """The `k` chunks most relevant to `query`, optionally only from the given pages."""
+        where = {"url": list(urls)} if urls else None
+        if HYBRID_RETRIEVAL:
+            return self.retriever.search(query, self.embed, k, where)
+        return self.store.search(self.embed([query])[0], k, where)
+
+
+doc_index = DocIndex()
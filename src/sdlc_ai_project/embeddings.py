@@ -0,0 +1,124 @@
+import os
+import re
+import math
+import zlib
+import threading
+from typing import Dict, Sequence
+import numpy as np
+
+# Environment variables with defaults
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "hashing")  # "hashing" or a sentence-transformers model name
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "1024"))
+# Model the code and documentation indexes embed their chunks with
+INDEX_EMBEDDING_MODEL = os.getenv("INDEX_EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+# Whether a sentence-transformers model that can't be loaded is replaced by the hashing
+# embedder (with a warning) or raises
+EMBEDDING_FALLBACK = os.getenv("EMBEDDING_FALLBACK", "true").lower() == "true"
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+class HashingEmbedder:
+    """
+    Dependency-free local embedder: hashed word and character n-gram counts.
+
+    Words catch shared vocabulary and character trigrams catch spelling variants
+    ("auth", "authentication"), so near-identical texts land close together. Hashes
+    are stable across processes, so stored vectors stay comparable after a restart.
+    """
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _features(self, text: str) -> Dict[str, float]:
+        counts: Dict[str, float] = {}
+        words = _WORD.findall(text.lower())
+        for word in words:
+            counts["w:" + word] = counts.get("w:" + word, 0) + 1
+            padded = f"#{word}#"
+            for i in range(len(padded) - 2):
+                gram = "c:" + padded[i:i + 3]
+                counts[gram] = counts.get(gram, 0) + 0.5
+        for first, second in zip(words, words[1:]):
+            gram = f"b:{first} {second}"
+            counts[gram] = counts.get(gram, 0) + 1
+        return counts
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Return one L2-normalized float32 row per text."""
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, count in self._features(text).items():
+                digest = zlib.crc32(feature.encode())
+                sign = 1.0 if digest & 0x80000000 else -1.0
+                # Sublinear term frequency, so a repeated word doesn't dominate the vector
+                weight = 1 + math.log(count) if count > 1 else count
+                vectors[row, digest % self.dim] += sign * weight
+        return normalize(vectors)
+
+
+class SentenceTransformerEmbedder:
+    """Local sentence-transformers model, loaded on first use."""
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name)
+        self.name = model_name
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        return normalize(np.asarray(self.model.encode(list(texts)), dtype=np.float32))
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+_embedders: Dict[str, object] = {}
+_embedders_lock = threading.Lock()
+
+
+def get_embedder(model: str = EMBEDDING_MODEL, fallback: bool = EMBEDDING_FALLBACK):
+    """
+    Return the process-wide embedder for `model`, loading it on first use.
+
+    Anything other than "hashing" names a sentence-transformers model. If that package
+    isn't installed, `fallback` substitutes the hashing embedder, which only matches
+    shared words, and warns; without it ImportError is raised.
+    """
+    with _embedders_lock:
+        embedder = _embedders.get(model)
+        if embedder is None:
+            if model == "hashing":
+                embedder = HashingEmbedder()
+            else:
+                try:
+                    embedder = SentenceTransformerEmbedder(model)
+                except ImportError as error:
+                    if not fallback:
+                        raise ImportError(f"sentence-transformers is needed to embed with {model}") from error
+                    print(f"WARNING: sentence-transformers is not installed; embedding with the lexical hashing "
+                          f"embedder instead of {model}. Set EMBEDDING_FALLBACK=false to fail instead.")
+                    embedder = HashingEmbedder()
+            _embedders[model] = embedder
+    return embedder
+
+
+def embedder_key(embedder) -> str:
+    """A collection- and file-safe name for an embedder, so vectors of different models are never mixed."""
+    return re.sub(r"[^a-z0-9]+", "_", embedder.name.lower()).strip("_")
+
+
+def embed_one(text: str, model: str = EMBEDDING_MODEL) -> np.ndarray:
+    return get_embedder(model).embed([text])[0]
+
+
+def cosine_scores(matrix: np.ndarray, vector: np.ndarray) -> np.ndarray:
+    """Cosine similarity of every row of a normalized matrix with a normalized vector."""
+    if matrix.size == 0:
+        return np.zeros(0, dtype=np.float32)
+    return matrix @ vector
+
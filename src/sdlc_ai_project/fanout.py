@@ -0,0 +1,117 @@
+import os
+from typing import Dict, Any, Callable, List, Optional, Tuple, Iterable
+from sdlc_ai_project.scheduler import run_dependency_graph
+from sdlc_ai_project.parsing import parse_json_from_markdown, process_agent_output
+from sdlc_ai_project.task_graph import restore_task_output, task_context
+from sdlc_ai_project.token_accounting import usage_scope
+
+# Environment variables with defaults
+MODULE_FANOUT = os.getenv("MODULE_FANOUT", "false").lower() == "true"
+MAX_FANOUT_WORKERS = int(os.getenv("MAX_FANOUT_WORKERS", "4"))
+MIN_FANOUT_MODULES = int(os.getenv("MIN_FANOUT_MODULES", "2"))
+
+
+# -------------------------------
+# Splitting and Merging
+# -------------------------------
+def split_modules(core_modules: Any) -> List[Tuple[str, Any]]:
+    """
+    Turn a skeleton's `core_modules` into (module name, module spec) pairs.
+
+    Agents return modules either as a list of specs with a "name" or as an object keyed
+    by module name. Duplicate names are numbered so every module gets its own job.
+    """
+    core_modules = parse_json_from_markdown(core_modules)
+    if isinstance(core_modules, dict):
+        pairs = [(str(name), spec) for name, spec in core_modules.items()]
+    elif isinstance(core_modules, list):
+        pairs = []
+        for index, spec in enumerate(core_modules, start=1):
+            if isinstance(spec, dict):
+                name = spec.get("name") or spec.get("module") or f"module_{index}"
+            else:
+                name = str(spec)
+            pairs.append((str(name), spec))
+    else:
+        return []
+
+    modules = []
+    seen: Dict[str, int] = {}
+    for name, spec in pairs:
+        seen[name] = seen.get(name, 0) + 1
+        modules.append((name if seen[name] == 1 else f"{name} ({seen[name]})", spec))
+    return modules
+
+
+def module_entry(section: Any, module_name: str) -> Any:
+    """Pick one module's entry out of an output section keyed by module name."""
+    section = parse_json_from_markdown(section)
+    if isinstance(section, dict):
+        return section.get(module_name)
+    return None
+
+
+def merge_module_outputs(outputs: Dict[str, Any], keys: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Merge per-module outputs into one object with each of `keys` mapping module names to
+    that module's part, the shape the single-prompt task returns.
+
+    A module whose output isn't a JSON object is kept as-is under the first key.
+    """
+    keys = list(keys)
+    merged: Dict[str, Dict[str, Any]] = {key: {} for key in keys}
+    for module_name, output in outputs.items():
+        output = process_agent_output(parse_json_from_markdown(output))
+        if not isinstance(output, dict):
+            merged[keys[0]][module_name] = output
+            continue
+        for key, value in output.items():
+            # Models often repeat the module name as the only key of each section
+            if isinstance(value, dict) and list(value) == [module_name]:
+                value = value[module_name]
+            merged.setdefault(key, {})[module_name] = value
+    return merged
+
+
+# -------------------------------
+# Execution
+# -------------------------------
+def run_single(task, agent, upstream: Dict[str, str]):
+    """Execute `task` as one prompt, for when there is nothing worth fanning out."""
+    return task.execute_sync(agent=agent, context=task_context(task, upstream))
+
+
+def execute_subtask(subtask, agent) -> str:
+    return subtask.execute_sync(agent=agent, context="").raw
+
+
+def run_fanout(task, agent, jobs: List[Tuple[str, str]], expected_output: str, keys: Iterable[str],
+               max_workers: int = MAX_FANOUT_WORKERS, execute: Optional[Callable[[Any, Any], str]] = None):
+    """
+    Execute `task` as one subtask per (module name, description) job and merge the results.
+
+    Subtasks run concurrently on up to `max_workers` threads, each with its own copy of
+    the agent, through `execute(subtask, agent)` (execute_subtask by default). The merged
+    object becomes `task.output`, with modules in job order whatever order they finish
+    in, so downstream tasks and the stage output see the same keys as when the task runs
+    as a single prompt. If a module fails, the other modules still finish and then the
+    error is raised, leaving `task.output` unset.
+    """
+    from crewai import Task
+
+    execute = execute or execute_subtask
+    descriptions = dict(jobs)
+
+    def run(module_name: str, upstream: Dict[str, Any]) -> str:
+        subtask = Task(
+            name=f"{task.name}[{module_name}]",
+            description=descriptions[module_name],
+            expected_output=expected_output,
+        )
+        module_agent = agent.copy() if max_workers > 1 else agent
+        with usage_scope(task=subtask.name):
+            return execute(subtask, module_agent)
+
+    print(f"Fanning out {task.name} into {len(jobs)} module tasks")
+    raws = run_dependency_graph({name: () for name, _ in jobs}, run, max_workers=max_workers)
+    return restore_task_output(task, merge_module_outputs(raws, keys))
@@ -0,0 +1,182 @@
+import os
+import time
+import queue
+import threading
+import contextvars
+from typing import Any, Callable, List, Optional
+from sdlc_ai_project.llm_middleware import add_call_middleware, listen_for_dispatch
+from sdlc_ai_project.metrics import LatencyTracker, latency_tracker
+from sdlc_ai_project.token_accounting import current_scope
+
+# Environment variables with defaults
+# Send a slow call to a backup too; the primary keeps running, so a hedge is a second paid call
+HEDGING = os.getenv("HEDGING", "false").lower() == "true"
+# Retry a call on the backups when its provider fails with a 5xx, quota, rate limit or timeout
+LLM_FAILOVER = os.getenv("LLM_FAILOVER", "true").lower() == "true"
+# Fire a backup request once the primary is slower than this percentile of the task's recent calls
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "95"))
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "5"))
+# Delay before the backup while a model has too few calls for a percentile
+HEDGE_DEFAULT_DELAY = float(os.getenv("HEDGE_DEFAULT_DELAY", "30"))
+# Registry names, in the order backups are tried
+LLM_FAILOVER_ORDER = tuple(
+    name.strip() for name in os.getenv("LLM_FAILOVER_ORDER", "gemini,deepseek,microsoft_mai_ds_r1,llama").split(",")
+    if name.strip()
+)
+
+FAILOVER_STATUS_CODES = {408, 429}
+FAILOVER_MESSAGES = (
+    "quota", "rate limit", "ratelimit", "resource_exhausted", "resource exhausted", "overloaded",
+    "service unavailable", "bad gateway", "gateway timeout", "internal server error", "timed out", "timeout",
+)
+
+# Set inside hedge attempts, so a backup LLM doesn't hedge again
+_in_hedge: contextvars.ContextVar[bool] = contextvars.ContextVar("in_hedge", default=False)
+
+# Queued by the primary attempt once its call leaves for the provider
+_DISPATCHED = object()
+
+
+def status_code_of(error: BaseException) -> Optional[int]:
+    for candidate in (error, getattr(error, "response", None)):
+        code = getattr(candidate, "status_code", None) or getattr(candidate, "status", None)
+        if isinstance(code, int):
+            return code
+    return None
+
+
+def is_failover_error(error: BaseException) -> bool:
+    """Whether another provider may succeed where this one failed: 5xx, quota, rate limit or timeout."""
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    code = status_code_of(error)
+    if code is not None:
+        return code >= 500 or code in FAILOVER_STATUS_CODES
+    message = str(error).lower()
+    return any(text in message for text in FAILOVER_MESSAGES) or any(
+        f"{code} " in message or f"error code: {code}" in message for code in (429, 500, 502, 503, 504)
+    )
+
+
+def is_valid_response(response: Any) -> bool:
+    return response is not None and (not isinstance(response, str) or bool(response.strip()))
+
+
+def hedge_delay(llm, tracker: LatencyTracker = latency_tracker, q: Optional[float] = None,
+                min_samples: Optional[int] = None, default: Optional[float] = None,
+                task: Optional[str] = None) -> float:
+    """
+    Seconds to wait for `llm` before hedging: the `q`-th percentile of its latency on
+    the current task, once the task has enough calls. A code generation task is only
+    compared with itself, not with the short calls of other tasks on the same model.
+    """
+    model = getattr(llm, "model", "") or ""
+    task = task or current_scope().get("task")
+    if tracker.count(model, task) >= (HEDGE_MIN_SAMPLES if min_samples is None else min_samples):
+        return tracker.percentile(model, HEDGE_PERCENTILE if q is None else q, task)
+    return HEDGE_DEFAULT_DELAY if default is None else default
+
+
+class Attempt:
+    """
+    One provider call running on its own thread, carrying the caller's context.
+
+    Python can't interrupt a blocking HTTP request, so cancelling an attempt abandons
+    it: the thread finishes in the background and its response is discarded.
+    """
+
+    def __init__(self, name: str, call: Callable[[], Any], finished: "queue.Queue[Attempt]",
+                 on_dispatch: Optional[Callable[[], None]] = None):
+        self.name = name
+        self.response: Any = None
+        self.error: Optional[BaseException] = None
+        self.cancelled = False
+        context = contextvars.copy_context()
+
+        def run():
+            _in_hedge.set(True)
+            if on_dispatch is not None:
+                listen_for_dispatch(on_dispatch)
+            try:
+                self.response = call()
+            except BaseException as error:  # Handed to the caller's thread
+                self.error = error
+            finished.put(self)
+
+        threading.Thread(target=context.run, args=(run,), name=f"hedge-{name}", daemon=True).start()
+
+    def cancel(self):
+        self.cancelled = True
+
+
+def _hedged_call(self, call_next, messages, *args, **kwargs):
+    backups = [] if _in_hedge.get() else self.backup_llms()
+    if not backups:
+        return call_next(messages, *args, **kwargs)
+
+    hedge = getattr(self, "hedge_slow_calls", HEDGING)
+    delay = hedge_delay(self, getattr(self, "latency_tracker", latency_tracker)) if hedge else None
+    model = getattr(self, "model", "") or ""
+    finished: "queue.Queue[Attempt]" = queue.Queue()
+    # The delay runs from when the primary is sent, after its rate limit and concurrency
+    # waits, like the latencies it is drawn from; LLMs that can't report that start now
+    reports_dispatch = "timed" in getattr(type(self), "call_middlewares", ())
+    hedge_at = None if reports_dispatch or not hedge else time.monotonic() + delay
+    pending: List[Attempt] = [Attempt(model, lambda: call_next(messages, *args, **kwargs), finished,
+                                      on_dispatch=lambda: finished.put(_DISPATCHED))]
+    hedged = False
+    last_error: Optional[BaseException] = None
+    last_response: Any = None
+
+    def start_backup(reason: str):
+        backup = backups.pop(0)
+        print(f"{reason}; trying {getattr(backup, 'model', backup)}")
+        pending.append(Attempt(getattr(backup, "model", ""), lambda: backup.call(messages, *args, **kwargs), finished))
+
+    while pending:
+        waiting = not hedged and backups and hedge_at is not None
+        try:
+            attempt = finished.get(timeout=max(0.0, hedge_at - time.monotonic()) if waiting else None)
+        except queue.Empty:
+            hedged = True
+            start_backup(f"{model} has not answered within {delay:.1f}s")
+            continue
+        if attempt is _DISPATCHED:
+            if hedge:
+                hedge_at = hedge_at or time.monotonic() + delay
+            continue
+        pending.remove(attempt)
+        if attempt.error is None and is_valid_response(attempt.response):
+            for loser in pending:
+                loser.cancel()
+            if attempt.name != model:
+                print(f"Using {attempt.name}'s answer instead of {model}'s")
+            return attempt.response
+        if attempt.error is not None:
+            last_error = attempt.error
+            if not is_failover_error(attempt.error) and not pending:
+                raise attempt.error
+        else:
+            last_response = attempt.response
+        if not pending and backups:
+            start_backup(f"{attempt.name} failed ({last_error or 'empty response'})")
+    if last_error is not None:
+        raise last_error
+    return last_response
+
+
+def hedge_requests(llm, backup_llms: Callable[[], List[Any]], hedge: bool = HEDGING):
+    """
+    Fail over and, with `hedge`, hedge `llm`'s calls onto the LLMs `backup_llms()` returns, in order.
+
+    A 5xx, quota, rate limit or timeout error moves on to the next backup immediately.
+    With `hedge`, a primary slower than its usual tail latency on the task
+    (HEDGE_PERCENTILE of recent calls) also sends the same request to the first backup
+    and the first valid answer wins. Time the primary spends waiting for its rate limit
+    or a concurrency slot doesn't count.
+    Apply last, so each provider's own cache and usage accounting still see their calls.
+    """
+    add_call_middleware(llm, "hedged", _hedged_call)
+    object.__setattr__(llm, "backup_llms", backup_llms)
+    object.__setattr__(llm, "hedge_slow_calls", hedge)
+    return llm
@@ -0,0 +1,138 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+# Environment variables with defaults
+MAX_JOB_WORKERS = int(os.getenv("MAX_JOB_WORKERS", "4"))
+MAX_QUEUED_JOBS = int(os.getenv("MAX_QUEUED_JOBS", "32"))
+MAX_FINISHED_JOBS = int(os.getenv("MAX_FINISHED_JOBS", "200"))
+
+# Job states
+PENDING = "pending"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+FINISHED_STATES = (SUCCEEDED, FAILED)
+
+
+class JobQueueFull(Exception):
+    """Raised when the job queue has no room for another job."""
+
+
+class Job:
+    """A unit of background work, usually one crew or pipeline run."""
+
+    def __init__(self, kind: str, title: Optional[str] = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.title = title
+        self.status = PENDING
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.events: List[Dict[str, Any]] = []
+        self._events_lock = threading.Lock()
+
+    def publish(self, event: str, data: Any = None):
+        """Append an event (e.g. a finished task's output) to the job's event stream."""
+        with self._events_lock:
+            self.events.append({"id": len(self.events), "event": event, "data": data})
+
+    def events_since(self, cursor: int) -> List[Dict[str, Any]]:
+        """Return the events published after the first `cursor` events."""
+        with self._events_lock:
+            return self.events[cursor:]
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return a JSON-serialisable status summary (without the result)."""
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "title": self.title,
+            "status": self.status,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobManager:
+    """
+    Runs jobs on a bounded thread pool so request handlers can return immediately.
+
+    At most `max_workers` jobs run at once and at most `max_queued_jobs` wait for a
+    worker; further submissions raise JobQueueFull. Only the most recent
+    `max_finished_jobs` finished jobs are kept for status and result lookups.
+    """
+
+    def __init__(self, max_workers: int = MAX_JOB_WORKERS, max_queued_jobs: int = MAX_QUEUED_JOBS,
+                 max_finished_jobs: int = MAX_FINISHED_JOBS):
+        self.max_workers = max_workers
+        self.max_queued_jobs = max_queued_jobs
+        self.max_finished_jobs = max_finished_jobs
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sdlc-job")
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, target: Callable[[Job], Any], title: Optional[str] = None) -> Job:
+        """Queue `target(job)` for execution and return the job immediately."""
+        job = Job(kind, title)
+        with self._lock:
+            pending = sum(1 for j in self._jobs.values() if j.status == PENDING)
+            if pending >= self.max_queued_jobs:
+                raise JobQueueFull(f"Job queue is full ({pending} jobs waiting)")
+            self._jobs[job.id] = job
+            self._evict_finished()
+        self._executor.submit(self._run, job, target)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda j: j.created_at)
+
+    def shutdown(self, wait: bool = False):
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, job: Job, target: Callable[[Job], Any]):
+        job.status = RUNNING
+        job.started_at = time.time()
+        job.publish("status", job.to_dict())
+        print(f"Job {job.id} ({job.kind}) started")
+        try:
+            job.result = target(job)
+            job.status = SUCCEEDED
+        except Exception as e:
+            job.error = str(e)
+            job.status = FAILED
+            print(f"Job {job.id} ({job.kind}) failed: {e}")
+        finally:
+            job.finished_at = time.time()
+            job.publish("status", job.to_dict())
+        print(f"Job {job.id} ({job.kind}) {job.status}")
+
+    def _evict_finished(self):
+        finished = [j for j in self._jobs.values() if j.finished]
+        if len(finished) <= self.max_finished_jobs:
+            return
+        finished.sort(key=lambda j: j.finished_at or 0)
+        for job in finished[:len(finished) - self.max_finished_jobs]:
+            del self._jobs[job.id]
+
+
+# Initialize the shared job manager
+job_manager = JobManager()
@@ -0,0 +1,171 @@
+import os
+import json
+import hashlib
+import threading
+import contextvars
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+from sdlc_ai_project.checkpoint import write_json_atomic
+from sdlc_ai_project.llm_middleware import add_call_middleware
+from sdlc_ai_project.token_accounting import note_cache_hit
+
+# Environment variables with defaults
+LLM_CACHE = os.getenv("LLM_CACHE", "true").lower() == "true"
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", os.path.join(".cache", "llm"))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# LLM attributes that change what a model answers; anything else (keys, timeouts) does not
+SAMPLING_PARAMS = (
+    "temperature", "top_p", "n", "stop", "max_tokens", "max_completion_tokens", "presence_penalty",
+    "frequency_penalty", "logit_bias", "seed", "response_format", "reasoning_effort",
+)
+
+_bypass: contextvars.ContextVar[bool] = contextvars.ContextVar("llm_cache_bypass", default=False)
+
+
+@contextmanager
+def cache_bypass(bypass: bool = True):
+    """Skip cached responses for LLM calls made inside the block; fresh responses are still stored."""
+    token = _bypass.set(bypass)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def cache_bypassed() -> bool:
+    """Whether the current block asked for fresh responses instead of cached ones."""
+    return _bypass.get()
+
+
+def cache_key(model: str, messages: Any, params: Dict[str, Any], tools: Any = None) -> str:
+    """Hash everything that determines a response: model, messages, tools and sampling parameters."""
+    payload = {"model": model, "messages": messages, "params": params, "tools": tools}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def sampling_params(llm) -> Dict[str, Any]:
+    params = {}
+    for name in SAMPLING_PARAMS:
+        value = getattr(llm, name, None)
+        if value is not None:
+            params[name] = value if isinstance(value, (str, int, float, bool, list, dict)) else str(value)
+    return params
+
+
+class ResponseCache:
+    """
+    LLM responses on disk, one JSON file per prompt, evicted least recently used first.
+
+    Entries are written atomically, so a crash never leaves a truncated response behind.
+    Recency is the file's modification time, which hits refresh, so the LRU order
+    survives restarts and is shared by processes using the same directory.
+    """
+
+    def __init__(self, directory: str = LLM_CACHE_DIR, max_bytes: int = LLM_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # key -> file size, oldest first
+        self._size = 0
+        self._stats = {"hits": 0, "misses": 0, "bypassed": 0, "writes": 0, "evictions": 0}
+        self._load_index()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _load_index(self):
+        if not os.path.isdir(self.directory):
+            return
+        found = []
+        for root, _, files in os.walk(self.directory):
+            for filename in files:
+                if filename.endswith(".json"):
+                    stat = os.stat(os.path.join(root, filename))
+                    found.append((stat.st_mtime, filename[:-len(".json")], stat.st_size))
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._size += size
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for `key`, or None, counting the hit or miss."""
+        path = self._path(key)
+        with self._lock:
+            try:
+                with open(path, "r") as f:
+                    response = json.load(f)["response"]
+                os.utime(path)
+            except (OSError, ValueError, KeyError):
+                self._stats["misses"] += 1
+                return None
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return response
+
+    def put(self, key: str, response: str, metadata: Optional[Dict[str, Any]] = None):
+        """Store a response, then evict the least recently used entries beyond `max_bytes`."""
+        path = self._path(key)
+        with self._lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write_json_atomic(path, {**(metadata or {}), "response": response})
+            size = os.path.getsize(path)
+            self._size += size - self._entries.pop(key, 0)
+            self._entries[key] = size
+            self._stats["writes"] += 1
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                oldest, oldest_size = self._entries.popitem(last=False)
+                self._size -= oldest_size
+                self._stats["evictions"] += 1
+                try:
+                    os.remove(self._path(oldest))
+                except OSError:
+                    pass
+
+    def count_bypass(self):
+        with self._lock:
+            self._stats["bypassed"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+            }
+
+
+response_cache = ResponseCache()
+
+
+def _cached_call(self, call_next, messages, *args, **kwargs):
+    cache = getattr(self, "response_cache", response_cache)
+    tools = kwargs.get("tools", args[0] if args else None)
+    model = getattr(self, "model", "") or ""
+    key = cache_key(model, messages, sampling_params(self), tools)
+    if _bypass.get():
+        cache.count_bypass()
+    else:
+        response = cache.get(key)
+        if response is not None:
+            note_cache_hit()
+            return response
+    response = call_next(messages, *args, **kwargs)
+    # Only plain text answers are replayable; tool calls and structured objects are not
+    if isinstance(response, str) and response:
+        cache.put(key, response, {"model": model})
+    return response
+
+
+def cache_responses(llm, cache: Optional[ResponseCache] = None):
+    """
+    Answer repeated calls with identical model, messages, tools and sampling parameters
+    from the disk cache. Apply before track_usage so hits are still recorded, as free calls.
+    """
+    add_call_middleware(llm, "cached", _cached_call)
+    object.__setattr__(llm, "response_cache", cache or response_cache)
+    return llm
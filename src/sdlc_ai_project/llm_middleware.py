@@ -0,0 +1,54 @@
+import contextvars
+from typing import Any, Callable, ClassVar, Dict, Optional, Tuple
+
+# middleware(llm, call_next, messages, *args, **kwargs) -> response
+CallMiddleware = Callable[..., Any]
+
+_wrapped_classes: Dict[Tuple[type, str], type] = {}
+
+
+def add_call_middleware(llm, name: str, middleware: CallMiddleware):
+    """
+    Route every `llm.call(...)` through `middleware`, which gets the next call in the chain.
+
+    The LLM's class is swapped for a subclass that overrides `call`, so copies crewai
+    makes of the LLM (e.g. per agent) keep the middleware. Middlewares stack: the one
+    added last runs first. Adding a middleware under a name already present is a no-op.
+    """
+    cls = type(llm)
+    if name in getattr(cls, "call_middlewares", ()):
+        return llm
+    key = (cls, name)
+    if key not in _wrapped_classes:
+        def call(self, messages, *args, **kwargs):
+            call_next = super(subclass, self).call
+            return middleware(self, call_next, messages, *args, **kwargs)
+
+        subclass = type(f"{name.title().replace('_', '')}{cls.__name__}", (cls,), {
+            "call": call,
+            "call_middlewares": getattr(cls, "call_middlewares", ()) + (name,),
+            # Annotated so pydantic-based LLM classes treat it as a class attribute, not a field
+            "__annotations__": {"call_middlewares": ClassVar[Tuple[str, ...]]},
+            "__module__": __name__,
+        })
+        _wrapped_classes[key] = subclass
+    object.__setattr__(llm, "__class__", _wrapped_classes[key])
+    return llm
+
+
+# Called when the call in progress leaves for its provider, past any queueing middleware
+_dispatch_listener: contextvars.ContextVar[Optional[Callable[[], None]]] = contextvars.ContextVar(
+    "dispatch_listener", default=None
+)
+
+
+def listen_for_dispatch(listener: Callable[[], None]):
+    """Have calls made in the current context call `listener` when they are actually sent."""
+    _dispatch_listener.set(listener)
+
+
+def notify_dispatched():
+    """Report that the call in progress is being sent to its provider now."""
+    listener = _dispatch_listener.get()
+    if listener is not None:
+        listener()
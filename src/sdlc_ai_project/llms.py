@@ -1,44 +1,191 @@
-from crewai import LLM
 import os
+import threading
+from typing import Dict, Any, List
+import yaml
+from sdlc_ai_project.token_accounting import track_usage
+from sdlc_ai_project.llm_cache import LLM_CACHE, cache_responses
+from sdlc_ai_project.metrics import track_latency
+from sdlc_ai_project.rate_limit import RATE_LIMITING, rate_limit
+from sdlc_ai_project.concurrency import ADAPTIVE_CONCURRENCY, control_concurrency
+from sdlc_ai_project.hedging import HEDGING, LLM_FAILOVER, LLM_FAILOVER_ORDER, hedge_requests
 
-# Gemini 1.5 Pro 	rpm2 	tpm32,000 	rpd50
-gemini_llm =  LLM(
-    model='gemini/gemini-1.5-flash',
-    api_key=os.environ["GEMINI_API_KEY"]
-            )
-
-
-
-#mai-ds-r1
-# Context
-# 164K
-# Max Output
-# 164K
-# Input
-# $0
-# Output
-# $0
-# Latency
-# 13.19s
-# Throughput
-# 105.0t/s
-
-microsoft_mai_ds_r1_llm =  LLM(
-    model="microsoft/mai-ds-r1:free",
-    base_url="https://openrouter.ai/api/v1",
-    api_key=os.environ["OPENROUTER_API_KEY"]
-)
-
-deepseek_llm = llm = LLM(
-    model="openrouter/deepseek/deepseek-r1",
-    base_url="https://openrouter.ai/api/v1",
-    api_key=os.environ["OPENROUTER_API_KEY"]
-)
-
-llama_llm = LLM(
-    model="nvidia_nim/meta/llama3-70b-instruct",
-    temperature=0.7,
-    api_key=os.environ["NVIDIA_API_KEY"]
-)
-
-#pytest sdlc_ai_project/tests/test_requirement_analyst.py -v -s
\ No newline at end of file
+# Environment variables with defaults
+DEFAULT_LLM = os.getenv("DEFAULT_LLM", "gemini")
+# Optional YAML file adding LLMs or overriding the definitions below, under an `llms:` key
+LLM_CONFIG_PATH = os.getenv("LLM_CONFIG_PATH", os.path.join(os.path.dirname(__file__), "config", "llms.yaml"))
+
+
+def managed(llm):
+    """
+    Serve repeated calls from the response cache and record every call's token usage.
+    Calls that reach the provider wait for its rate limits and a slot in its adaptive
+    concurrency window, and have their latency recorded.
+    """
+    track_latency(llm)
+    if ADAPTIVE_CONCURRENCY:
+        control_concurrency(llm)
+    if RATE_LIMITING:
+        rate_limit(llm)
+    if LLM_CACHE:
+        cache_responses(llm)
+    return track_usage(llm)
+
+
+# -------------------------------
+# LLM Definitions
+# -------------------------------
+# `api_key_env` names the environment variable holding the key and the PROFILE_FIELDS
+# describe the model to the router; every other field is passed to crewai's LLM. Each
+# field can be overridden with LLM_<NAME>_<FIELD>, e.g. LLM_GEMINI_MODEL=gemini/gemini-1.5-pro.
+# Costs are USD per million tokens; latency is seconds before output starts.
+PROFILE_FIELDS = ("context_window", "max_output_tokens", "input_cost", "output_cost", "latency", "throughput")
+
+LLM_DEFINITIONS: Dict[str, Dict[str, Any]] = {
+    # Gemini 1.5 Pro 	rpm2 	tpm32,000 	rpd50
+    "gemini": {
+        "model": "gemini/gemini-1.5-flash",
+        "api_key_env": "GEMINI_API_KEY",
+        "context_window": 1_000_000, "max_output_tokens": 8_192,
+        "input_cost": 0.075, "output_cost": 0.30, "latency": 1.0, "throughput": 150,
+    },
+    "microsoft_mai_ds_r1": {
+        "model": "microsoft/mai-ds-r1:free",
+        "base_url": "https://openrouter.ai/api/v1",
+        "api_key_env": "OPENROUTER_API_KEY",
+        "context_window": 164_000, "max_output_tokens": 164_000,
+        "input_cost": 0.0, "output_cost": 0.0, "latency": 13.19, "throughput": 105,
+    },
+    "deepseek": {
+        "model": "openrouter/deepseek/deepseek-r1",
+        "base_url": "https://openrouter.ai/api/v1",
+        "api_key_env": "OPENROUTER_API_KEY",
+        "context_window": 164_000, "max_output_tokens": 32_000,
+        "input_cost": 0.55, "output_cost": 2.19, "latency": 4.0, "throughput": 60,
+    },
+    "llama": {
+        "model": "nvidia_nim/meta/llama3-70b-instruct",
+        "temperature": 0.7,
+        "api_key_env": "NVIDIA_API_KEY",
+        "context_window": 8_192, "max_output_tokens": 4_096,
+        "input_cost": 0.0, "output_cost": 0.0, "latency": 1.5, "throughput": 40,
+    },
+}
+
+# Module attributes kept for code that imported the LLMs by name
+LEGACY_NAMES = {
+    "gemini_llm": "gemini",
+    "microsoft_mai_ds_r1_llm": "microsoft_mai_ds_r1",
+    "deepseek_llm": "deepseek",
+    "llm": "deepseek",
+    "llama_llm": "llama",
+}
+
+
+def _env_value(value: str) -> Any:
+    try:
+        return yaml.safe_load(value)  # Numbers and booleans, e.g. LLM_LLAMA_TEMPERATURE=0.2
+    except yaml.YAMLError:
+        return value
+
+
+def load_definitions(path: str = LLM_CONFIG_PATH) -> Dict[str, Dict[str, Any]]:
+    """Combine the built-in definitions with the YAML file's and the LLM_<NAME>_<FIELD> overrides."""
+    definitions = {name: dict(spec) for name, spec in LLM_DEFINITIONS.items()}
+    if path and os.path.exists(path):
+        with open(path, "r") as f:
+            configured = (yaml.safe_load(f) or {}).get("llms") or {}
+        for name, spec in configured.items():
+            definitions.setdefault(name, {}).update(spec or {})
+    for name, spec in definitions.items():
+        prefix = f"LLM_{name.upper()}_"
+        for key, value in os.environ.items():
+            if key.startswith(prefix):
+                spec[key[len(prefix):].lower()] = _env_value(value)
+    return definitions
+
+
+# -------------------------------
+# Registry
+# -------------------------------
+class LLMRegistry:
+    """
+    Named LLM clients, each built and wrapped with `managed` on first use.
+
+    Nothing is constructed and no API key is read until an LLM is asked for, so importing
+    this module needs no keys and only the LLMs a process actually uses are built.
+    """
+
+    def __init__(self, definitions: Dict[str, Dict[str, Any]]):
+        self.definitions = definitions
+        self._llms: Dict[str, Any] = {}
+        self._unbuildable: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def names(self):
+        return sorted(self.definitions)
+
+    def available(self, name: str) -> bool:
+        """Whether `name` is defined and its API key, if it needs one, is set."""
+        api_key_env = self.definitions.get(name, {}).get("api_key_env")
+        return name in self.definitions and (not api_key_env or bool(os.getenv(api_key_env)))
+
+    def profile(self, name: str) -> Dict[str, Any]:
+        """The routing profile of `name`: context window, output limit, costs and speed."""
+        definition = self.definitions.get(name, {})
+        return {field: definition[field] for field in PROFILE_FIELDS if field in definition}
+
+    def built(self, name: str):
+        """The client already built for `name`, or None; never builds one."""
+        return self._llms.get(name)
+
+    def build(self, name: str):
+        from crewai import LLM
+
+        if name not in self.definitions:
+            raise KeyError(f"Unknown LLM {name}; known LLMs: {', '.join(self.names())}")
+        kwargs = {key: value for key, value in self.definitions[name].items() if key not in PROFILE_FIELDS}
+        api_key_env = kwargs.pop("api_key_env", None)
+        if api_key_env:
+            if not os.getenv(api_key_env):
+                raise KeyError(f"{api_key_env} is not set; the {name} LLM needs it")
+            kwargs["api_key"] = os.environ[api_key_env]
+        llm = managed(LLM(**kwargs))
+        if HEDGING or LLM_FAILOVER:
+            hedge_requests(llm, lambda: self.backups(name), hedge=HEDGING)
+        return llm
+
+    def backups(self, name: str) -> List[Any]:
+        """The LLMs `name` fails over to, in LLM_FAILOVER_ORDER, skipping any without a key."""
+        llms = []
+        for backup in LLM_FAILOVER_ORDER:
+            if backup == name or backup in self._unbuildable or not self.available(backup):
+                continue
+            try:
+                llms.append(self.get(backup))
+            except Exception as error:
+                # E.g. the provider's SDK isn't installed; don't retry on every call
+                self._unbuildable[backup] = str(error)
+                print(f"Backup LLM {backup} is unavailable: {error}")
+        return llms
+
+    def get(self, name: str = DEFAULT_LLM):
+        with self._lock:
+            if name not in self._llms:
+                self._llms[name] = self.build(name)
+            return self._llms[name]
+
+
+llm_registry = LLMRegistry(load_definitions())
+
+
+def get_llm(name: str = DEFAULT_LLM):
+    """Return the process-wide LLM client registered as `name`, building it on first use."""
+    return llm_registry.get(name)
+
+
+def __getattr__(attribute: str):
+    if attribute in LEGACY_NAMES:
+        return get_llm(LEGACY_NAMES[attribute])
+    raise AttributeError(f"module {__name__!r} has no attribute {attribute!r}")
+
+#pytest sdlc_ai_project/tests/test_requirement_analyst.py -v -s
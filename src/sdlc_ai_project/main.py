@@ -1,20 +1,25 @@
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Callable
 import os
 import json
-import re
-from sdlc_ai_project.agents.knowledge import KnowledgeBaseAgent
-from sdlc_ai_project.agents.requirements import RequirementAnalyzer
-from sdlc_ai_project.agents.architecture import ArchitectureDesignAgent
-from sdlc_ai_project.agents.skeletons import CodeSkeletonGenerator
-from sdlc_ai_project.agents.generator import CodeGenerator
-from sdlc_ai_project.llms import deepseek_llm, gemini_llm
-from sdlc_ai_project.utils import collect_task_outputs, save_to_json
+import asyncio
+from sdlc_ai_project.pipeline import run_stage, run_pipeline, apply_task_edit
+from sdlc_ai_project.jobs import Job, JobQueueFull, job_manager, FAILED, FINISHED_STATES
+from sdlc_ai_project.token_accounting import token_ledger
+from sdlc_ai_project.llm_cache import response_cache, cache_bypass
+from sdlc_ai_project.semantic_cache import semantic_cache
+from sdlc_ai_project.metrics import latency_tracker
+from sdlc_ai_project.concurrency import concurrency_snapshot
+from sdlc_ai_project.rate_limit import rate_limiter
 from dotenv import load_dotenv
 
 load_dotenv()
 
+SSE_POLL_SECONDS = float(os.getenv("SSE_POLL_SECONDS", "0.5"))
+SSE_KEEPALIVE_SECONDS = float(os.getenv("SSE_KEEPALIVE_SECONDS", "15"))
+
 app = FastAPI(title="SDLC AI Agent API")
 
 from fastapi.middleware.cors import CORSMiddleware
@@ -35,6 +40,7 @@ class BasicInput(BaseModel):
     user_requirements: str
     project_context: str
     title: str
+    bypass_cache: bool = False  # Ask the LLMs again instead of replaying cached responses
 
 class RequirementInput(BasicInput):
     knowledge_output: Optional[Dict[str, Any]] = None
@@ -47,159 +53,220 @@ class SkeletonInput(BaseModel):
     architecture_output: Dict[str, Any]
     project_context: str
     title: str
+    bypass_cache: bool = False
 
 class CodeGenInput(SkeletonInput):
     skeleton_output: Dict[str, Any]
 
+class PipelineInput(BasicInput):
+    resume: bool = False
+
 class ValidationInput(BaseModel):
     task_name: str
     modified_output: Any
+    title: Optional[str] = None  # Run to apply the edit to; resume that run to recompute dependents
 
 
-def parse_json_from_markdown(text: Any) -> Any:
-    """
-    Parse JSON from markdown code blocks or direct JSON strings.
-    
-    If the input is already a dict/list, return it as is.
-    If the input is a string containing ```json {...}```, extract and parse the JSON.
-    Otherwise, try to parse the string as JSON directly.
-    """
-    # If already a dict/list, return as is
-    if isinstance(text, (dict, list)):
-        return text
-        
-    # If not a string, return as is
-    if not isinstance(text, str):
-        return text
-        
-    # Try to extract JSON from markdown code block
-    json_pattern = r"```json\s*([\s\S]*?)\s*```"
-    match = re.search(json_pattern, text)
-    
-    if match:
-        try:
-            return json.loads(match.group(1))
-        except json.JSONDecodeError:
-            # If JSON parsing fails, return the extracted content as a string
-            return match.group(1)
-    
-    # If no markdown pattern, try parsing as direct JSON
+# ------------------------
+# Stage Runners
+# ------------------------
+# These run on the job manager's worker pool, never on the event loop.
+
+def knowledge_stage(request: BasicInput, on_task_output: Optional[Callable[[str, Any], None]] = None) -> Dict[str, Any]:
+    return run_stage("Knowledge", request.user_requirements, request.project_context, {}, None, request.title, on_task_output)
+
+
+def requirements_stage(request: BasicInput, on_task_output: Optional[Callable[[str, Any], None]] = None) -> Dict[str, Any]:
+    return run_stage("Requirements", request.user_requirements, request.project_context, {}, None, request.title, on_task_output)
+
+
+def architecture_stage(request: ArchitectureInput, on_task_output: Optional[Callable[[str, Any], None]] = None) -> Dict[str, Any]:
+    upstream = {"Requirements": request.requirement_output, "Knowledge": request.knowledge_output}
+    return run_stage("Architecture", request.user_requirements, request.project_context, upstream, None, request.title, on_task_output)
+
+
+def skeleton_stage(request: SkeletonInput, on_task_output: Optional[Callable[[str, Any], None]] = None) -> Dict[str, Any]:
+    upstream = {"Architecture": request.architecture_output}
+    return run_stage("Skeletons", "", request.project_context, upstream, None, request.title, on_task_output)
+
+
+def codegen_stage(request: CodeGenInput, on_task_output: Optional[Callable[[str, Any], None]] = None) -> Dict[str, Any]:
+    upstream = {"Architecture": request.architecture_output, "Skeletons": request.skeleton_output}
+    return run_stage("Generator", "", request.project_context, upstream, None, request.title, on_task_output)
+
+
+def pipeline_stage(request: PipelineInput, job: Job) -> Dict[str, Dict[str, Any]]:
+    return run_pipeline(
+        request.user_requirements, request.project_context, None, request.title,
+        resume=request.resume,
+        on_stage_start=lambda stage_name: job.publish("stage_started", {"stage": stage_name}),
+        on_task_output=lambda stage_name, task_name, output: job.publish(
+            "task_output", {"stage": stage_name, "task": task_name, "output": output}
+        ),
+    )
+
+
+def submit_job(kind: str, target: Callable[[Job], Any], title: Optional[str] = None,
+               bypass_cache: bool = False) -> Dict[str, Any]:
+    """Queue a stage on the job manager and return its status summary."""
+    def run(job: Job):
+        with cache_bypass(bypass_cache):
+            return target(job)
+
     try:
-        return json.loads(text)
-    except json.JSONDecodeError:
-        # If all parsing fails, return the original input
-        return text
+        job = job_manager.submit(kind, run, title=title)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return job.to_dict()
 
 
-def process_agent_output(output: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    Process the agent output to ensure all values are properly formatted JSON objects.
-    Recursively process nested dictionaries and lists.
-    """
-    if isinstance(output, dict):
-        return {k: process_agent_output(parse_json_from_markdown(v)) for k, v in output.items()}
-    elif isinstance(output, list):
-        return [process_agent_output(parse_json_from_markdown(item)) for item in output]
-    else:
-        return parse_json_from_markdown(output)
-
-
-# Override the default collect_task_outputs function to avoid console input
-def non_interactive_collect_outputs(agent) -> Dict[str, Any]:
-    """Collect outputs from agent tasks without user interaction."""
-    agent_crew = agent.crew()
-    agent_crew.kickoff()
-    
-    outputs = {}
-    for task in agent_crew.tasks:
-        task_name = task.name
-        output = task.output.raw
-        # Parse any JSON in markdown code blocks
-        parsed_output = parse_json_from_markdown(output)
-        outputs[task_name] = parsed_output
-    
-    # Process the entire output structure to ensure proper JSON formatting
-    return process_agent_output(outputs)
+def task_output_publisher(job: Job) -> Callable[[str, Any], None]:
+    """Return a callback that publishes each finished task's output on the job's event stream."""
+    def publish(task_name: str, output: Any):
+        job.publish("task_output", {"task": task_name, "output": output})
+    return publish
+
+
+def get_job_or_404(job_id: str) -> Job:
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
 
 # ------------------------
 # Agent Endpoints
 # ------------------------
+# Each endpoint returns a job handle immediately; poll /jobs/{job_id} for progress.
 
-@app.post("/agent/knowledge")
+@app.post("/agent/knowledge", status_code=202)
 async def run_knowledge_agent(request: BasicInput):
-    try:
-        llm = gemini_llm
-        agent = KnowledgeBaseAgent(user_requirements=request.user_requirements, project_context=request.project_context, llm=llm)
-        output = non_interactive_collect_outputs(agent)
-        save_to_json("Knowledge", output, request.title)
-        return output
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return submit_job("knowledge", lambda job: knowledge_stage(request, task_output_publisher(job)), request.title, request.bypass_cache)
 
 
-@app.post("/agent/requirements")
+@app.post("/agent/requirements", status_code=202)
 async def run_requirement_analyzer(request: BasicInput):
-    try:
-        llm = gemini_llm
-        agent = RequirementAnalyzer(user_requirements=request.user_requirements, project_context=request.project_context, llm=llm)
-        output = non_interactive_collect_outputs(agent)
-        save_to_json("Requirements", output, request.title)
-        return output
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return submit_job("requirements", lambda job: requirements_stage(request, task_output_publisher(job)), request.title, request.bypass_cache)
 
 
-@app.post("/agent/architecture")
+@app.post("/agent/architecture", status_code=202)
 async def run_architecture_agent(request: ArchitectureInput):
-    try:
-        llm = gemini_llm
-        agent = ArchitectureDesignAgent(
-            requirement_analysis=request.requirement_output,
-            tasks=request.requirement_output["task_generation_task"],
-            project_context=request.project_context,
-            tech_stack=request.knowledge_output["finalize_tech_stack"],
-            extraction_task=request.requirement_output["extraction_task"],
-            llm=llm
-        )
-        output = non_interactive_collect_outputs(agent)
-        save_to_json("Architecture", output, request.title)
-        return output
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return submit_job("architecture", lambda job: architecture_stage(request, task_output_publisher(job)), request.title, request.bypass_cache)
 
 
-@app.post("/agent/skeleton")
+@app.post("/agent/skeleton", status_code=202)
 async def run_skeleton_generator(request: SkeletonInput):
-    try:
-        llm = gemini_llm
-        agent = CodeSkeletonGenerator(
-            architecture_design=request.architecture_output,
-            project_context=request.project_context,
-            llm=llm
-        )
-        output = non_interactive_collect_outputs(agent)
-        save_to_json("Skeletons", output, request.title)
-        return output
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return submit_job("skeleton", lambda job: skeleton_stage(request, task_output_publisher(job)), request.title, request.bypass_cache)
 
 
-@app.post("/agent/codegen")
+@app.post("/agent/codegen", status_code=202)
 async def run_code_generator(request: CodeGenInput):
-    try:
-        llm = gemini_llm
-        agent = CodeGenerator(
-            architecture_design=request.architecture_output,
-            project_context=request.project_context,
-            skeletons=request.skeleton_output["code_skeleton_task"],
-            module_boilerplate=request.skeleton_output["module_boilerplate_task"],
-            llm=llm
-        )
-        output = non_interactive_collect_outputs(agent)
-        save_to_json("Generator", output, request.title)
-        return output
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return submit_job("codegen", lambda job: codegen_stage(request, task_output_publisher(job)), request.title, request.bypass_cache)
+
+
+@app.post("/pipeline", status_code=202)
+async def run_full_pipeline(request: PipelineInput):
+    """
+    Run all five stages server-side; intermediate outputs never leave the process.
+    Set `resume` to continue a previous run with the same title from its first missing step.
+    """
+    return submit_job("pipeline", lambda job: pipeline_stage(request, job), request.title, request.bypass_cache)
+
+# ------------------------
+# Job Endpoints
+# ------------------------
+
+@app.get("/jobs")
+async def list_jobs():
+    return [job.to_dict() for job in job_manager.list()]
+
+
+@app.get("/jobs/{job_id}")
+async def get_job_status(job_id: str):
+    return get_job_or_404(job_id).to_dict()
+
+
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str, stage: Optional[str] = None):
+    job = get_job_or_404(job_id)
+    if job.status == FAILED:
+        raise HTTPException(status_code=500, detail=job.error)
+    if not job.finished:
+        raise HTTPException(status_code=409, detail=f"Job {job_id} is {job.status}")
+    if stage is not None:
+        # Pipeline jobs hold every stage's output; let clients fetch just one
+        if job.kind != "pipeline" or stage not in job.result:
+            raise HTTPException(status_code=404, detail=f"Job {job_id} has no output for stage {stage}")
+        return job.result[stage]
+    return job.result
+
+
+async def job_event_stream(job: Job):
+    """Yield the job's events in server-sent event format until the job finishes."""
+    cursor = 0
+    idle = 0.0
+    while True:
+        events = job.events_since(cursor)
+        for event in events:
+            yield f"id: {event['id']}\nevent: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+            if event["event"] == "status" and event["data"]["status"] in FINISHED_STATES:
+                return
+        cursor += len(events)
+        if events:
+            idle = 0.0
+        elif idle >= SSE_KEEPALIVE_SECONDS:
+            yield ": keep-alive\n\n"
+            idle = 0.0
+        await asyncio.sleep(SSE_POLL_SECONDS)
+        idle += SSE_POLL_SECONDS
+
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """Stream a job's status changes and per-task outputs as server-sent events."""
+    job = get_job_or_404(job_id)
+    return StreamingResponse(job_event_stream(job), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+# ------------------------
+# Usage Endpoints
+# ------------------------
+
+@app.get("/usage")
+async def get_token_usage(by: str = "task", run: Optional[str] = None, stage: Optional[str] = None):
+    """
+    Sum recorded LLM token usage grouped by comma-separated fields (run, stage, task,
+    agent, provider, model), most expensive first. `run` and `stage` filter the calls.
+    """
+    filters = {key: value for key, value in {"run": run, "stage": stage}.items() if value is not None}
+    return token_ledger.summarize(by=[field.strip() for field in by.split(",") if field.strip()], **filters)
+
+
+@app.get("/usage/cache")
+async def get_cache_stats():
+    """Hit/miss statistics and size of the LLM response cache."""
+    return response_cache.stats()
+
+
+@app.get("/usage/semantic-cache")
+async def get_semantic_cache_stats():
+    """Hit/miss statistics of the semantic task output cache."""
+    return semantic_cache.stats()
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """Per-provider concurrency windows and back-off, call latencies and rate limit buckets."""
+    return {
+        "concurrency": concurrency_snapshot(),
+        "latency": latency_tracker.snapshot(),
+        "rate_limits": rate_limiter.state(),
+    }
+
+
+@app.on_event("shutdown")
+def shutdown_jobs():
+    job_manager.shutdown(wait=False)
 
 
 @app.post("/agent/validate")
@@ -212,7 +279,16 @@ async def validate_task_output(request: ValidationInput):
         os.makedirs("validation_logs", exist_ok=True)
         with open(f"validation_logs/{request.task_name}_modified.json", "w") as f:
             json.dump(request.modified_output, f, indent=2)
-        
+
+        if request.title:
+            stage_name = apply_task_edit(request.title, request.task_name, request.modified_output)
+            return {
+                "message": f"Output for {request.task_name} validated successfully",
+                "stage": stage_name,
+                "detail": "Resume the pipeline to recompute only the tasks downstream of this edit",
+            }
         return {"message": f"Output for {request.task_name} validated successfully"}
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -0,0 +1,108 @@
+import os
+import time
+import threading
+from collections import deque
+from typing import Dict, Any, Optional, Deque, Tuple
+from sdlc_ai_project.llm_middleware import add_call_middleware, notify_dispatched
+from sdlc_ai_project.token_accounting import count_tokens, current_scope
+
+# Environment variables with defaults
+LATENCY_WINDOW = int(os.getenv("LATENCY_WINDOW", "200"))  # Recent calls kept per model
+
+
+def percentile(values, q: float) -> Optional[float]:
+    """The `q`-th percentile (0-100) of `values` by linear interpolation, or None if empty."""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+class LatencyTracker:
+    """
+    Observed duration and throughput of recent LLM calls, per model.
+
+    Keeps the last `window` successful calls of each model as (seconds, output tokens,
+    task) and counts failures, so callers can ask for latency percentiles and output
+    speed, of all the model's calls or of one task's.
+    """
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples: Dict[str, Deque[Tuple[float, int, Optional[str]]]] = {}
+        self._errors: Dict[str, int] = {}
+
+    def record(self, model: str, seconds: float, output_tokens: int = 0, task: Optional[str] = None):
+        with self._lock:
+            self._samples.setdefault(model, deque(maxlen=self.window)).append((seconds, output_tokens, task))
+
+    def record_error(self, model: str):
+        with self._lock:
+            self._errors[model] = self._errors.get(model, 0) + 1
+
+    def _durations(self, model: str, task: Optional[str]):
+        with self._lock:
+            return [sample[0] for sample in self._samples.get(model, ()) if task is None or sample[2] == task]
+
+    def count(self, model: str, task: Optional[str] = None) -> int:
+        return len(self._durations(model, task))
+
+    def percentile(self, model: str, q: float, task: Optional[str] = None) -> Optional[float]:
+        """
+        The `q`-th percentile of the model's call durations in seconds, only of `task`'s
+        calls if given, or None before any call.
+        """
+        return percentile(self._durations(model, task), q)
+
+    def throughput(self, model: str) -> Optional[float]:
+        """Median output tokens per second of the model's calls, or None before any call."""
+        with self._lock:
+            rates = [tokens / seconds for seconds, tokens, _ in self._samples.get(model, ()) if seconds > 0 and tokens]
+        return percentile(rates, 50)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            models = set(self._samples) | set(self._errors)
+        return {
+            model: {
+                "calls": self.count(model),
+                "errors": self._errors.get(model, 0),
+                "p50_seconds": self.percentile(model, 50),
+                "p95_seconds": self.percentile(model, 95),
+                "tokens_per_second": self.throughput(model),
+            }
+            for model in sorted(models)
+        }
+
+
+latency_tracker = LatencyTracker()
+
+
+def _timed_call(self, call_next, messages, *args, **kwargs):
+    tracker = getattr(self, "latency_tracker", latency_tracker)
+    model = getattr(self, "model", "") or ""
+    notify_dispatched()
+    started = time.monotonic()
+    try:
+        response = call_next(messages, *args, **kwargs)
+    except Exception:
+        tracker.record_error(model)
+        raise
+    output = response if isinstance(response, str) else str(response)
+    tracker.record(model, time.monotonic() - started, count_tokens(output, model), current_scope().get("task"))
+    return response
+
+
+def track_latency(llm, tracker: Optional[LatencyTracker] = None):
+    """
+    Record the duration and output size of every call `llm` sends to its provider.
+    Apply before cache_responses so cached answers don't count as fast calls, and first,
+    so the timing (and the dispatch it reports to hedging) starts after any queueing.
+    """
+    add_call_middleware(llm, "timed", _timed_call)
+    object.__setattr__(llm, "latency_tracker", tracker or latency_tracker)
+    return llm
@@ -0,0 +1,166 @@
+import os
+import threading
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+from sdlc_ai_project.llms import LLMRegistry, llm_registry
+from sdlc_ai_project.metrics import LatencyTracker, latency_tracker
+from sdlc_ai_project.task_graph import TaskRunner, task_context
+from sdlc_ai_project.token_accounting import count_tokens
+
+# Environment variables with defaults
+MODEL_ROUTING = os.getenv("MODEL_ROUTING", "true").lower() == "true"
+# Registry names the router may pick from; empty means every LLM whose API key is set
+ROUTER_MODELS = tuple(name.strip() for name in os.getenv("ROUTER_MODELS", "").split(",") if name.strip())
+# What one second of waiting is worth in USD, trading latency against token cost
+ROUTER_SECOND_COST = float(os.getenv("ROUTER_SECOND_COST", "0.0005"))
+# Observed calls a model needs before its measured speed replaces its profile's
+ROUTER_MIN_SAMPLES = int(os.getenv("ROUTER_MIN_SAMPLES", "3"))
+
+# Expected output tokens of each task class
+TASK_CLASSES: Dict[str, int] = {"light": 1_500, "standard": 4_000, "generation": 8_000}
+
+TASK_CLASS_OF: Dict[str, str] = {
+    "extraction_task": "light",
+    "intent_analysis_task": "light",
+    "requirement_validation_task": "light",
+    "architecture_validation_task": "light",
+    "validate_code_task": "light",
+    "code_skeleton_task": "generation",
+    "module_boilerplate_task": "generation",
+    "testing_boilerplate_task": "generation",
+    "generate_code_task": "generation",
+}
+
+
+class Route(NamedTuple):
+    name: str
+    task_class: str
+    prompt_tokens: int
+    output_tokens: int
+    cost: float
+    seconds: float
+    reason: str
+
+
+class ModelRouter:
+    """
+    Picks the LLM for each task from the registry's model profiles.
+
+    A model qualifies when the task's prompt plus its class's expected output fit the
+    model's context window and output limit. Among those, the cheapest by token cost
+    plus expected latency (priced at `second_cost` USD per second) wins. Latency comes
+    from observed throughput once a model has `min_samples` calls, else its profile.
+    """
+
+    def __init__(self, registry: LLMRegistry = llm_registry, tracker: LatencyTracker = latency_tracker,
+                 models: Tuple[str, ...] = ROUTER_MODELS, second_cost: float = ROUTER_SECOND_COST,
+                 min_samples: int = ROUTER_MIN_SAMPLES):
+        self.registry = registry
+        self.tracker = tracker
+        self.models = models
+        self.second_cost = second_cost
+        self.min_samples = min_samples
+
+    def candidates(self):
+        return [name for name in (self.models or self.registry.names()) if self.registry.available(name)]
+
+    def expected_seconds(self, name: str, output_tokens: int) -> float:
+        profile = self.registry.profile(name)
+        llm = self.registry.built(name)
+        model = getattr(llm, "model", None)
+        if model and self.tracker.count(model) >= self.min_samples:
+            throughput = self.tracker.throughput(model)
+            if throughput:
+                return output_tokens / throughput
+        return profile.get("latency", 0.0) + output_tokens / profile.get("throughput", 50)
+
+    def route(self, task_name: str, prompt_tokens: int) -> Optional[Route]:
+        """Choose a model for a task whose prompt takes `prompt_tokens`, or None if none is available."""
+        task_class = TASK_CLASS_OF.get(task_name, "standard")
+        output_tokens = TASK_CLASSES[task_class]
+        candidates = self.candidates()
+        if not candidates:
+            return None
+        routes = []
+        for name in candidates:
+            profile = self.registry.profile(name)
+            if prompt_tokens + output_tokens > profile.get("context_window", float("inf")) or \
+                    output_tokens > profile.get("max_output_tokens", float("inf")):
+                continue
+            cost = (prompt_tokens * profile.get("input_cost", 0) + output_tokens * profile.get("output_cost", 0)) / 1e6
+            seconds = self.expected_seconds(name, output_tokens)
+            routes.append((cost + seconds * self.second_cost, Route(
+                name, task_class, prompt_tokens, output_tokens, cost, seconds,
+                f"{task_class} task, ~{prompt_tokens} prompt tokens, ${cost:.4f}, ~{seconds:.1f}s",
+            )))
+        if routes:
+            return min(routes, key=lambda scored: scored[0])[1]
+        # Nothing fits: the largest context window has the best chance
+        name = max(candidates, key=lambda name: self.registry.profile(name).get("context_window", 0))
+        return Route(name, task_class, prompt_tokens, output_tokens, 0.0, 0.0,
+                     f"no model fits ~{prompt_tokens} prompt tokens; using the largest context window")
+
+    def agent_for(self, agent, name: str):
+        """Return `agent`, or a copy of it that talks to the registry's `name` LLM."""
+        llm = self.registry.get(name)
+        if getattr(agent, "llm", None) is llm:
+            return agent
+        routed = agent.copy()
+        routed.llm = llm
+        return routed
+
+
+model_router = ModelRouter()
+
+
+class TaskRoutes:
+    """
+    The route of each task in one stage run, chosen the first time it is asked for, so a
+    task's checkpoint fingerprint and its execution agree on the model.
+    """
+
+    def __init__(self, router: Optional[ModelRouter] = None):
+        self.router = router or model_router
+        self._routes: Dict[str, Optional[Route]] = {}
+        self._lock = threading.Lock()
+
+    def route(self, task, upstream_raws: Iterable[str]) -> Optional[Route]:
+        with self._lock:
+            if task.name not in self._routes:
+                prompt_tokens = count_tokens(task.description) + sum(count_tokens(raw) for raw in upstream_raws)
+                self._routes[task.name] = self.router.route(task.name, prompt_tokens)
+            return self._routes[task.name]
+
+    def model(self, task, upstream_raws: Iterable[str]) -> Optional[str]:
+        """The model the task will run on, or None to keep its agent's."""
+        route = self.route(task, upstream_raws)
+        if route is None:
+            return None
+        return getattr(self.router.registry.get(route.name), "model", route.name)
+
+
+def routing_runner(runner: Optional[TaskRunner] = None, router: Optional[ModelRouter] = None,
+                   routes: Optional[TaskRoutes] = None) -> TaskRunner:
+    """Wrap a task's runner so the task executes on the model the router picks for it."""
+    routes = routes or TaskRoutes(router)
+
+    def run(task, agent, upstream: Dict[str, str]):
+        route = routes.route(task, upstream.values())
+        if route is not None:
+            print(f"{task.name}: routed to {route.name} ({route.reason})")
+            agent = routes.router.agent_for(agent, route.name)
+        if runner is not None:
+            return runner(task, agent, upstream)
+        return task.execute_sync(agent=agent, context=task_context(task, upstream))
+
+    return run
+
+
+def with_model_routing(task_runners: Dict[str, TaskRunner], task_names: Iterable[str],
+                       router: Optional[ModelRouter] = None,
+                       routes: Optional[TaskRoutes] = None) -> Dict[str, TaskRunner]:
+    """Return `task_runners` with every named task routed to a model chosen per task."""
+    runners = dict(task_runners)
+    routes = routes or TaskRoutes(router)
+    for task_name in task_names:
+        runners[task_name] = routing_runner(runners.get(task_name), routes=routes)
+    return runners
@@ -0,0 +1,51 @@
+import re
+import json
+from typing import Dict, Any
+
+
+def parse_json_from_markdown(text: Any) -> Any:
+    """
+    Parse JSON from markdown code blocks or direct JSON strings.
+    
+    If the input is already a dict/list, return it as is.
+    If the input is a string containing ```json {...}```, extract and parse the JSON.
+    Otherwise, try to parse the string as JSON directly.
+    """
+    # If already a dict/list, return as is
+    if isinstance(text, (dict, list)):
+        return text
+        
+    # If not a string, return as is
+    if not isinstance(text, str):
+        return text
+        
+    # Try to extract JSON from markdown code block
+    json_pattern = r"```json\s*([\s\S]*?)\s*```"
+    match = re.search(json_pattern, text)
+    
+    if match:
+        try:
+            return json.loads(match.group(1))
+        except json.JSONDecodeError:
+            # If JSON parsing fails, return the extracted content as a string
+            return match.group(1)
+    
+    # If no markdown pattern, try parsing as direct JSON
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        # If all parsing fails, return the original input
+        return text
+
+
+def process_agent_output(output: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Process the agent output to ensure all values are properly formatted JSON objects.
+    Recursively process nested dictionaries and lists.
+    """
+    if isinstance(output, dict):
+        return {k: process_agent_output(parse_json_from_markdown(v)) for k, v in output.items()}
+    elif isinstance(output, list):
+        return [process_agent_output(parse_json_from_markdown(item)) for item in output]
+    else:
+        return parse_json_from_markdown(output)
@@ -0,0 +1,304 @@
+import os
+import json
+from typing import Dict, Any, Optional, Callable, List, Tuple, Iterable
+from sdlc_ai_project.agents.knowledge import KnowledgeBaseAgent
+from sdlc_ai_project.agents.requirements import RequirementAnalyzer
+from sdlc_ai_project.agents.architecture import ArchitectureDesignAgent
+from sdlc_ai_project.agents.skeletons import (
+    CodeSkeletonGenerator, BOILERPLATE_OUTPUT_KEYS, module_boilerplate_task_description,
+)
+from sdlc_ai_project.agents.generator import CodeGenerator, CODE_OUTPUT_KEYS, module_code_task_description
+from sdlc_ai_project.utils import non_interactive_collect_outputs, save_to_json
+from sdlc_ai_project.scheduler import run_dependency_graph, MAX_PARALLEL_STAGES
+from sdlc_ai_project.checkpoint import CheckpointStore
+from sdlc_ai_project.task_graph import TaskReuse, TaskRunner
+from sdlc_ai_project.templates import build_crew, get_crew_template
+from sdlc_ai_project.parsing import parse_json_from_markdown
+from sdlc_ai_project.token_accounting import usage_scope
+from sdlc_ai_project.context_slicer import CONTEXT_SLICING, TaskSlices, slice_task_inputs, format_savings
+from sdlc_ai_project.llms import get_llm
+from sdlc_ai_project.model_router import MODEL_ROUTING, TaskRoutes, with_model_routing
+from sdlc_ai_project.semantic_cache import SEMANTIC_CACHE, SEMANTIC_CACHE_TASKS, with_semantic_cache
+from sdlc_ai_project.fanout import (
+    MODULE_FANOUT, MIN_FANOUT_MODULES, split_modules, module_entry, run_fanout, run_single,
+)
+
+# -------------------------------
+# Stage Definitions
+# -------------------------------
+class Stage:
+    """
+    One agent crew in the SDLC pipeline.
+
+    `name` is also the artifact name passed to save_to_json, `requires` lists the
+    upstream stages whose outputs `inputs` reads to produce the CrewBase agent's
+    keyword arguments, and `tasks` names the crew's tasks, which a saved stage output
+    must contain to be reused. `task_runners`, if given, maps those keyword arguments to
+    runners that replace single-prompt tasks in module fan-out mode. `slices` names the
+    parts of large inputs each task actually reads, so its prompt carries only those.
+    """
+
+    def __init__(self, name: str, requires: Tuple[str, ...], agent_cls, inputs: Callable[..., Dict[str, Any]],
+                 tasks: Tuple[str, ...],
+                 task_runners: Optional[Callable[[Dict[str, Any]], Dict[str, TaskRunner]]] = None,
+                 slices: Optional[TaskSlices] = None):
+        self.name = name
+        self.requires = requires
+        self.agent_cls = agent_cls
+        self.inputs = inputs
+        self.tasks = tasks
+        self.task_runners = task_runners
+        self.slices = slices or {}
+
+    def build_crew(self, inputs: Dict[str, Any], llm, slicing: bool = CONTEXT_SLICING):
+        """Bind this request's inputs to the stage's compiled crew template."""
+        task_inputs = None
+        if slicing and self.slices:
+            task_inputs, full_tokens, sliced_tokens = slice_task_inputs(inputs, self.slices)
+            print(format_savings(self.name, full_tokens, sliced_tokens))
+        return build_crew(self.agent_cls, llm, task_inputs, **inputs)
+
+    def build_task_runners(self, inputs: Dict[str, Any], fanout: bool = MODULE_FANOUT) -> Dict[str, TaskRunner]:
+        """Runners for the tasks this stage fans out, or none when fan-out is off."""
+        if not fanout or self.task_runners is None:
+            return {}
+        return self.task_runners(inputs)
+
+    def task_prompt_inputs(self, inputs: Dict[str, Any], llm, task_names: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """The inputs rendered into each named task's prompt, for the tasks this stage has."""
+        template = get_crew_template(self.agent_cls, llm, inputs)
+        return {
+            task_name: {name: inputs[name] for name in template.task_input_names[task_name]}
+            for task_name in task_names if task_name in template.task_input_names
+        }
+
+
+def research_inputs(user_requirements: str, project_context: str, upstream: Dict[str, Any]) -> Dict[str, Any]:
+    return {"user_requirements": user_requirements, "project_context": project_context}
+
+
+def architecture_inputs(user_requirements: str, project_context: str, upstream: Dict[str, Any]) -> Dict[str, Any]:
+    requirements = upstream["Requirements"]
+    return {
+        "requirement_analysis": requirements,
+        "tasks": requirements["task_generation_task"],
+        "project_context": project_context,
+        "tech_stack": upstream["Knowledge"]["finalize_tech_stack"],
+        "extraction_task": requirements["extraction_task"],
+    }
+
+
+def skeleton_inputs(user_requirements: str, project_context: str, upstream: Dict[str, Any]) -> Dict[str, Any]:
+    return {"architecture_design": upstream["Architecture"], "project_context": project_context}
+
+
+def code_generator_inputs(user_requirements: str, project_context: str, upstream: Dict[str, Any]) -> Dict[str, Any]:
+    skeletons = upstream["Skeletons"]
+    return {
+        "architecture_design": upstream["Architecture"],
+        "project_context": project_context,
+        "skeletons": skeletons["code_skeleton_task"],
+        "module_boilerplate": skeletons["module_boilerplate_task"],
+    }
+
+
+def skeleton_task_runners(inputs: Dict[str, Any]) -> Dict[str, TaskRunner]:
+    """
+    Write each core module's boilerplate in its own prompt. The modules come from
+    code_skeleton_task, which runs earlier in the same crew, so they are split at run time.
+    """
+    def module_boilerplate(task, agent, upstream: Dict[str, str]):
+        skeleton = parse_json_from_markdown(upstream.get("code_skeleton_task"))
+        modules = split_modules(skeleton.get("core_modules")) if isinstance(skeleton, dict) else []
+        if len(modules) < MIN_FANOUT_MODULES:
+            return run_single(task, agent, upstream)
+        interfaces = skeleton.get("interfaces")
+        jobs = [
+            (name, module_boilerplate_task_description(
+                name, spec, module_entry(interfaces, name) or interfaces, skeleton.get("data_models"),
+            ))
+            for name, spec in modules
+        ]
+        return run_fanout(task, agent, jobs, task.expected_output, BOILERPLATE_OUTPUT_KEYS)
+
+    return {"module_boilerplate_task": module_boilerplate}
+
+
+def code_generator_task_runners(inputs: Dict[str, Any]) -> Dict[str, TaskRunner]:
+    """Generate each of the skeleton's core modules in its own prompt instead of all at once."""
+    skeleton = parse_json_from_markdown(inputs["skeletons"])
+    if not isinstance(skeleton, dict):
+        return {}
+    modules = split_modules(skeleton.get("core_modules"))
+    if len(modules) < MIN_FANOUT_MODULES:
+        return {}
+    boilerplate = parse_json_from_markdown(inputs["module_boilerplate"])
+    implementations = boilerplate.get("module_implementations") if isinstance(boilerplate, dict) else None
+    jobs = [
+        (name, module_code_task_description(
+            name, spec, module_entry(implementations, name), skeleton.get("interfaces"), skeleton.get("data_models"),
+        ))
+        for name, spec in modules
+    ]
+
+    def generate_code(task, agent, upstream: Dict[str, str]):
+        return run_fanout(task, agent, jobs, task.expected_output, CODE_OUTPUT_KEYS)
+
+    return {"generate_code_task": generate_code}
+
+
+STAGES: List[Stage] = [
+    Stage("Knowledge", (), KnowledgeBaseAgent, research_inputs, (
+        "research_similar_projects", "gather_documentation", "collect_code_samples",
+        "build_knowledge_base", "finalize_tech_stack",
+    )),
+    Stage("Requirements", (), RequirementAnalyzer, research_inputs, (
+        "extraction_task", "project_research_task", "intent_analysis_task",
+        "task_generation_task", "requirement_validation_task", "subtask_breakdown_task",
+    )),
+    Stage("Architecture", ("Requirements", "Knowledge"), ArchitectureDesignAgent, architecture_inputs, (
+        "system_research_task", "system_flowchart_task", "component_diagram_task",
+        "architecture_blueprint_task", "architecture_validation_task",
+    ), slices={
+        "system_flowchart_task": {"requirement_analysis": (
+            "intent_analysis_task.business_goals", "intent_analysis_task.implicit_requirements",
+            "task_generation_task.tasks", "task_generation_task.dependencies",
+        )},
+        "component_diagram_task": {"requirement_analysis": (
+            "requirement_validation_task.validated_requirements", "task_generation_task.dependencies",
+        )},
+    }),
+    Stage("Skeletons", ("Architecture",), CodeSkeletonGenerator, skeleton_inputs, (
+        "code_research_task", "code_skeleton_task", "module_boilerplate_task",
+        "testing_boilerplate_task", "documentation_task",
+    ), task_runners=skeleton_task_runners, slices={
+        "code_skeleton_task": {"architecture_design": (
+            "architecture_blueprint_task", "component_diagram_task.component_specifications",
+            "architecture_validation_task.recommendations",
+        )},
+    }),
+    Stage("Generator", ("Architecture", "Skeletons"), CodeGenerator, code_generator_inputs, (
+        "generate_code_task", "validate_code_task",
+    ), task_runners=code_generator_task_runners, slices={
+        "generate_code_task": {"architecture_design": ("architecture_blueprint_task",)},
+    }),
+]
+
+STAGES_BY_NAME: Dict[str, Stage] = {stage.name: stage for stage in STAGES}
+
+
+# -------------------------------
+# Pipeline Execution
+# -------------------------------
+class StageRejected(Exception):
+    """Raised when a stage's output was rejected during review."""
+
+
+def run_stage(stage_name: str, user_requirements: str, project_context: str, upstream: Dict[str, Any],
+              llm: Optional[Any], title: str,
+              on_task_output: Optional[Callable[[str, Any], None]] = None,
+              collect: Callable[..., Optional[Dict[str, Any]]] = non_interactive_collect_outputs,
+              resume: bool = False) -> Dict[str, Any]:
+    """
+    Run a single stage and save its output under `title`.
+
+    Every finished task is checkpointed with a fingerprint of its inputs. With
+    `resume=True` saved tasks whose fingerprint still matches are reused, so only
+    missing tasks and tasks downstream of a changed or edited output are recomputed.
+
+    With `llm=None` and MODEL_ROUTING on, each task runs on the model the router picks
+    for it; an explicit `llm` runs every task.
+    """
+    stage = STAGES_BY_NAME[stage_name]
+    checkpoints = CheckpointStore(title)
+    saved_tasks = {}
+    if resume:
+        saved_tasks = checkpoints.load_tasks(stage.name)
+        if not saved_tasks:
+            # Stage artifacts written before task checkpoints existed can't be fingerprinted
+            saved = checkpoints.load_stage(stage.name, stage.tasks)
+            if saved is not None:
+                print(f"Resuming: reusing {checkpoints.stage_path(stage.name)}")
+                return saved
+    else:
+        checkpoints.clear_tasks(stage.name)
+    routes = TaskRoutes() if MODEL_ROUTING and llm is None else None
+    # Fresh runs are fingerprinted too, so their checkpoints can be reused later
+    reuse = TaskReuse(saved_tasks, routes.model if routes is not None else None)
+
+    def task_finished(task_name: str, output: Any):
+        checkpoints.save_task(stage.name, task_name, output, reuse.fingerprints.get(task_name))
+        if on_task_output is not None:
+            on_task_output(task_name, output)
+
+    llm = llm or get_llm()
+    inputs = stage.inputs(user_requirements, project_context, upstream)
+    crew = stage.build_crew(inputs, llm)
+    task_runners = stage.build_task_runners(inputs)
+    if routes is not None:
+        task_runners = with_model_routing(task_runners, stage.tasks, routes=routes)
+    if SEMANTIC_CACHE:
+        task_runners = with_semantic_cache(task_runners, stage.task_prompt_inputs(inputs, llm, SEMANTIC_CACHE_TASKS))
+    with usage_scope(run=title, stage=stage.name):
+        output = collect(crew, task_finished, reuse, task_runners)
+    if output is None:
+        raise StageRejected(f"Stage {stage.name} failed validation")
+    if reuse.reused:
+        print(f"{stage.name}: reused {len(reuse.reused)} of {len(stage.tasks)} tasks")
+    save_to_json(stage.name, output, title)
+    return output
+
+
+def apply_task_edit(title: str, task_name: str, output: Any) -> str:
+    """
+    Store a reviewer's edit of one task's output for the run saved under `title`.
+
+    The edited task keeps its fingerprint, so the next resumed run reuses it and
+    recomputes only the tasks and stages downstream of it. Returns the stage name.
+    """
+    stage = next((stage for stage in STAGES if task_name in stage.tasks), None)
+    if stage is None:
+        raise KeyError(f"Unknown task {task_name}")
+    checkpoints = CheckpointStore(title)
+    if not checkpoints.update_task_output(stage.name, task_name, output):
+        checkpoints.save_task(stage.name, task_name, output)
+    stage_output = _read_stage_output(checkpoints, stage.name)
+    stage_output[task_name] = output
+    save_to_json(stage.name, stage_output, title)
+    return stage.name
+
+
+def _read_stage_output(checkpoints: CheckpointStore, stage_name: str) -> Dict[str, Any]:
+    path = checkpoints.stage_path(stage_name)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def run_pipeline(user_requirements: str, project_context: str, llm: Optional[Any], title: str,
+                 on_stage_start: Optional[Callable[[str], None]] = None,
+                 on_task_output: Optional[Callable[[str, str, Any], None]] = None,
+                 collect: Callable[..., Optional[Dict[str, Any]]] = non_interactive_collect_outputs,
+                 max_parallel_stages: int = MAX_PARALLEL_STAGES,
+                 resume: bool = False) -> Dict[str, Dict[str, Any]]:
+    """
+    Run every stage server-side, passing each stage's output to its dependents in process.
+
+    Stages whose inputs are ready run concurrently (Knowledge and Requirements start
+    together) and each downstream stage starts as soon as the stages it requires finish.
+    Returns the outputs of all stages keyed by stage name. Each stage's output is also
+    saved to `title/<stage>.json` as it completes; with `resume=True` a previous run's
+    saved stages and tasks are validated and reused, continuing from the first missing step.
+    Pass `llm=None` to let the model router choose each task's model.
+    """
+    def run(stage_name: str, upstream: Dict[str, Any]) -> Dict[str, Any]:
+        if on_stage_start is not None:
+            on_stage_start(stage_name)
+        stage_callback = None
+        if on_task_output is not None:
+            stage_callback = lambda task_name, output: on_task_output(stage_name, task_name, output)
+        return run_stage(stage_name, user_requirements, project_context, upstream, llm, title, stage_callback, collect, resume)
+
+    requires = {stage.name: stage.requires for stage in STAGES}
+    return run_dependency_graph(requires, run, max_workers=max_parallel_stages)
@@ -0,0 +1,107 @@
+import os
+import json
+from typing import Dict, Any, List, Optional, Set
+from sdlc_ai_project.parsing import parse_json_from_markdown
+
+# Environment variables with defaults
+PROMPT_DEDUP = os.getenv("PROMPT_DEDUP", "true").lower() == "true"
+MIN_BLOCK_CHARS = int(os.getenv("MIN_BLOCK_CHARS", "200"))
+DROP_SUMMARIZED_CONTEXT = os.getenv("DROP_SUMMARIZED_CONTEXT", "false").lower() == "true"
+
+
+def canonical(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+class BlockIndex:
+    """
+    Content blocks a prompt already contains, so repeats can be replaced by a reference.
+
+    Blocks are JSON subtrees of at least `min_chars` characters, matched by canonical
+    JSON. The task description is searched as text, for both the str() rendering the
+    agents' f-strings use and the JSON rendering.
+    """
+
+    def __init__(self, description: str = "", min_chars: int = MIN_BLOCK_CHARS):
+        self.description = description or ""
+        self.min_chars = min_chars
+        self.locations: Dict[str, str] = {}
+
+    def find(self, value: Any) -> Optional[str]:
+        """Return where `value` already appears in the prompt, or None."""
+        key = canonical(value)
+        if len(key) < self.min_chars:
+            return None
+        if key in self.locations:
+            return self.locations[key]
+        renderings = [str(value), key]
+        if isinstance(value, str):
+            renderings.append(repr(value)[1:-1])
+        if any(rendering in self.description for rendering in renderings):
+            return "the task description"
+        return None
+
+    def add(self, value: Any, location: str):
+        key = canonical(value)
+        if len(key) >= self.min_chars:
+            self.locations.setdefault(key, location)
+
+
+def dedupe_value(value: Any, index: BlockIndex, location: str) -> Any:
+    """Replace the subtrees of `value` the prompt already contains with references, indexing the rest."""
+    found = index.find(value)
+    if found is not None:
+        return f"[same as {found}]"
+    if isinstance(value, dict):
+        result = {key: dedupe_value(item, index, f"{location}.{key}") for key, item in value.items()}
+    elif isinstance(value, list):
+        result = [dedupe_value(item, index, f"{location}[{i}]") for i, item in enumerate(value)]
+    else:
+        result = value
+    index.add(value, location)
+    return result
+
+
+def dedupe_context_blocks(description: str, upstream: Dict[str, str],
+                          min_chars: int = MIN_BLOCK_CHARS) -> List[str]:
+    """
+    Return the upstream outputs a task receives as context with repeated content sent once.
+
+    Content already rendered into the description, or already sent in an earlier
+    upstream output, is replaced by a reference to where it appears. Outputs that lose
+    nothing are passed through verbatim.
+    """
+    index = BlockIndex(description, min_chars)
+    blocks = []
+    for task_name, raw in upstream.items():
+        parsed = parse_json_from_markdown(raw)
+        if isinstance(parsed, (dict, list)):
+            deduped = dedupe_value(parsed, index, task_name)
+            candidate = json.dumps(deduped, indent=2)
+            blocks.append(candidate if deduped != parsed and len(candidate) < len(raw) else raw)
+            continue
+        found = index.find(raw)
+        blocks.append(f"[same as {found}]" if found is not None else raw)
+        index.add(raw, task_name)
+    return blocks
+
+
+def summarized_context(task) -> Set[str]:
+    """
+    Names of the task's context tasks that another of its context tasks already consumed.
+
+    E.g. architecture_blueprint_task lists system_flowchart_task and system_research_task
+    next to component_diagram_task, which was itself built from both of them.
+    """
+    context = task.context if isinstance(task.context, list) else []
+    summarized: Set[str] = set()
+    for context_task in context:
+        pending = list(context_task.context) if isinstance(context_task.context, list) else []
+        while pending:
+            ancestor = pending.pop()
+            if ancestor.name in summarized:
+                continue
+            summarized.add(ancestor.name)
+            if isinstance(ancestor.context, list):
+                pending.extend(ancestor.context)
+    return summarized & {context_task.name for context_task in context}
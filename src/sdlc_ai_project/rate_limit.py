@@ -0,0 +1,205 @@
+import os
+import time
+import sqlite3
+import asyncio
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+from sdlc_ai_project.concurrency import concurrency_slot
+from sdlc_ai_project.llm_middleware import add_call_middleware
+from sdlc_ai_project.token_accounting import count_message_tokens, count_tokens, provider_of
+
+# Environment variables with defaults
+RATE_LIMITING = os.getenv("RATE_LIMITING", "true").lower() == "true"
+RATE_LIMIT_DB = os.getenv("RATE_LIMIT_DB", os.path.join(".cache", "rate_limits.sqlite3"))
+# Longest an LLM call waits for a slot before failing with TimeoutError, so failover or
+# the job's error handling takes over instead of the call queueing for hours on a daily quota
+RATE_LIMIT_MAX_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", "120"))
+
+# Requests per minute, tokens per minute and requests per day by provider. Each can be
+# overridden with RATE_LIMIT_<PROVIDER>_<LIMIT>, e.g. RATE_LIMIT_GEMINI_RPM=15; 0 disables it.
+PROVIDER_LIMITS: Dict[str, Dict[str, float]] = {
+    "gemini": {"rpm": 2, "tpm": 32_000, "rpd": 50},  # Gemini 1.5 Pro free tier
+    "openrouter": {"rpm": 20, "rpd": 200},
+    "nvidia_nim": {"rpm": 40},
+    "search": {"rpm": float(os.getenv("RATE_LIMIT", "60"))},  # Web and code search tools
+    "embedding": {"tpm": 1_000_000},  # Chunks embedded by the research indexes
+}
+LIMIT_PERIODS = {"rpm": 60.0, "tpm": 60.0, "rpd": 86_400.0}
+
+
+def provider_limits(provider: str) -> Dict[str, float]:
+    limits = dict(PROVIDER_LIMITS.get(provider, {}))
+    for name in LIMIT_PERIODS:
+        value = os.getenv(f"RATE_LIMIT_{provider.upper()}_{name.upper()}")
+        if value is not None:
+            limits[name] = float(value)
+    return {name: limit for name, limit in limits.items() if limit}
+
+
+class TokenBucketLimiter:
+    """
+    Token buckets per provider for requests and tokens, kept in SQLite.
+
+    Every bucket holds up to its per-period limit and refills continuously. A request
+    takes one token from the request buckets and its estimated prompt size from the
+    tokens-per-minute bucket, all or nothing, inside one immediate transaction, so
+    threads and uvicorn worker processes sharing the database never overrun a quota
+    together. Callers that can't get a slot sleep (or await) exactly until one frees up.
+    """
+
+    def __init__(self, path: str = RATE_LIMIT_DB, limits: Optional[Dict[str, Dict[str, float]]] = None):
+        self.path = path
+        self.limits = limits
+        self._local = threading.local()
+        self._waits: Dict[str, float] = {}
+        self._waits_lock = threading.Lock()
+
+    def limits_for(self, provider: str) -> Dict[str, float]:
+        if self.limits is not None:
+            return {name: limit for name, limit in self.limits.get(provider, {}).items() if limit}
+        return provider_limits(provider)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+            self._local.connection = connection
+        return connection
+
+    def _update(self, provider: str, amounts: Dict[str, float], wait: bool) -> float:
+        """
+        Take `amounts` from the provider's buckets. With `wait`, take nothing unless every
+        bucket has enough and return the seconds until they would; otherwise always take.
+        """
+        limits = self.limits_for(provider)
+        amounts = {name: min(amount, limits[name]) for name, amount in amounts.items() if name in limits and amount}
+        if not amounts:
+            return 0.0
+        connection = self._connection()
+        now = time.time()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            levels = {}
+            for name, amount in amounts.items():
+                row = connection.execute("SELECT tokens, updated FROM buckets WHERE key = ?",
+                                         (f"{provider}:{name}",)).fetchone()
+                rate = limits[name] / LIMIT_PERIODS[name]
+                tokens = limits[name] if row is None else min(limits[name], row[0] + (now - row[1]) * rate)
+                levels[name] = (tokens, rate)
+            needed = max(
+                (amounts[name] - tokens) / rate for name, (tokens, rate) in levels.items()
+            )
+            if wait and needed > 0:
+                connection.execute("ROLLBACK")
+                return needed
+            for name, (tokens, _) in levels.items():
+                connection.execute(
+                    "INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                    (f"{provider}:{name}", tokens - amounts[name], now),
+                )
+            connection.execute("COMMIT")
+            return 0.0
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def try_acquire(self, provider: str, tokens: int = 0) -> float:
+        """Take a request slot (and `tokens` tokens) if free; return 0, or the seconds until one is."""
+        return self._update(provider, {"rpm": 1, "rpd": 1, "tpm": tokens}, wait=True)
+
+    def acquire(self, provider: str, tokens: int = 0, timeout: Optional[float] = None) -> float:
+        """Block until a slot is taken and return how long that took; TimeoutError after `timeout`."""
+        started = time.monotonic()
+        while True:
+            delay = self.try_acquire(provider, tokens)
+            waited = time.monotonic() - started
+            if delay <= 0:
+                self._note_wait(provider, waited)
+                return waited
+            if timeout is not None and waited + delay > timeout:
+                raise TimeoutError(f"No {provider} rate limit slot within {timeout}s")
+            time.sleep(delay)
+
+    async def acquire_async(self, provider: str, tokens: int = 0, timeout: Optional[float] = None) -> float:
+        """`acquire` for coroutines: awaits the slot without blocking the event loop."""
+        started = time.monotonic()
+        while True:
+            delay = await asyncio.to_thread(self.try_acquire, provider, tokens)
+            waited = time.monotonic() - started
+            if delay <= 0:
+                self._note_wait(provider, waited)
+                return waited
+            if timeout is not None and waited + delay > timeout:
+                raise TimeoutError(f"No {provider} rate limit slot within {timeout}s")
+            await asyncio.sleep(delay)
+
+    def charge(self, provider: str, tokens: int):
+        """Debit tokens used after the fact, e.g. the response; the bucket may go into debt."""
+        self._update(provider, {"tpm": tokens}, wait=False)
+
+    def _note_wait(self, provider: str, seconds: float):
+        with self._waits_lock:
+            self._waits[provider] = self._waits.get(provider, 0.0) + seconds
+
+    def state(self) -> Dict[str, Any]:
+        """Tokens left in every bucket this database holds, and this process's total wait per provider."""
+        rows = self._connection().execute("SELECT key, tokens, updated FROM buckets").fetchall()
+        now = time.time()
+        buckets = {}
+        for key, tokens, updated in rows:
+            provider, name = key.split(":", 1)
+            limit = self.limits_for(provider).get(name)
+            if limit:
+                tokens = min(limit, tokens + (now - updated) * limit / LIMIT_PERIODS[name])
+                buckets[key] = {"available": round(tokens, 2), "limit": limit}
+        with self._waits_lock:
+            waits = dict(self._waits)
+        return {"buckets": buckets, "waited_seconds": waits}
+
+
+rate_limiter = TokenBucketLimiter()
+
+
+@contextmanager
+def search_slot(limiter: Optional[TokenBucketLimiter] = None, timeout: Optional[float] = RATE_LIMIT_MAX_WAIT):
+    """
+    Take one request from the shared "search" bucket, then hold a slot of the "search"
+    AIMD window for the block. Wrap each web or GitHub request the research tools send.
+    """
+    if RATE_LIMITING:
+        (limiter or rate_limiter).acquire("search", timeout=timeout)
+    with concurrency_slot("search"):
+        yield
+
+
+def _limited_call(self, call_next, messages, *args, **kwargs):
+    limiter = getattr(self, "rate_limiter", rate_limiter)
+    provider = provider_of(self)
+    model = getattr(self, "model", "") or ""
+    max_wait = getattr(self, "rate_limit_max_wait", RATE_LIMIT_MAX_WAIT)
+    waited = limiter.acquire(provider, count_message_tokens(messages, model), timeout=max_wait)
+    if waited >= 1:
+        print(f"Waited {waited:.1f}s for a {provider} rate limit slot")
+    response = call_next(messages, *args, **kwargs)
+    limiter.charge(provider, count_tokens(response if isinstance(response, str) else str(response), model))
+    return response
+
+
+def rate_limit(llm, limiter: Optional[TokenBucketLimiter] = None, max_wait: float = RATE_LIMIT_MAX_WAIT):
+    """
+    Hold each of `llm`'s calls until its provider's request and token buckets have room,
+    then charge the response's tokens. A call that would wait longer than `max_wait`
+    raises TimeoutError at once. Apply before cache_responses so cache hits are free.
+    """
+    add_call_middleware(llm, "rate_limited", _limited_call)
+    object.__setattr__(llm, "rate_limiter", limiter or rate_limiter)
+    object.__setattr__(llm, "rate_limit_max_wait", max_wait)
+    return llm
@@ -0,0 +1,228 @@
+import os
+import re
+import math
+import heapq
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Callable, List, Optional, Sequence, Tuple
+import numpy as np
+from sdlc_ai_project.vector_store import VectorStore
+
+# Environment variables with defaults
+HYBRID_RETRIEVAL = os.getenv("HYBRID_RETRIEVAL", "true").lower() == "true"
+HYBRID_ALPHA = float(os.getenv("HYBRID_ALPHA", "0.5"))  # Weight of the vector score; 1 - alpha goes to BM25
+HYBRID_SHORTLIST = int(os.getenv("HYBRID_SHORTLIST", "50"))  # BM25 candidates re-scored by vector
+# Skip the query embedding when the best BM25 match scores this many times the runner-up
+BM25_DECISIVE_RATIO = float(os.getenv("BM25_DECISIVE_RATIO", "3.0"))
+BM25_K1 = float(os.getenv("BM25_K1", "1.2"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+QUERY_EMBEDDING_CACHE_SIZE = 256
+
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|\d+")
+_WORD_PART = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+
+
+def _parts(identifier: str) -> List[str]:
+    return [part for piece in identifier.split("_") for part in _WORD_PART.findall(piece)]
+
+
+def tokenize_code(text: str) -> List[str]:
+    """
+    Lowercased terms for code and prose. Identifiers are kept whole and also split into
+    their snake_case and camelCase parts, so `getUserById` matches both an exact lookup
+    and a query for "user by id".
+    """
+    terms = []
+    for identifier in _IDENTIFIER.findall(text):
+        parts = _parts(identifier)
+        if parts != [identifier]:
+            terms.append(identifier.lower())
+        terms.extend(part.lower() for part in parts if len(part) > 1)
+    return terms
+
+
+def compound_identifiers(text: str) -> List[str]:
+    """The lowercased identifiers in `text` made of several words, like `get_user` or `TaskRepository`."""
+    return [identifier.lower() for identifier in _IDENTIFIER.findall(text) if len(_parts(identifier)) > 1]
+
+
+def matches(metadata: Dict[str, Any], where: Optional[Dict[str, Any]]) -> bool:
+    """Whether metadata passes a vector store `where` filter."""
+    for key, value in (where or {}).items():
+        allowed = value if isinstance(value, (list, tuple, set)) else [value]
+        if metadata.get(key) not in allowed:
+            return False
+    return True
+
+
+class BM25Index:
+    """In-memory inverted index scoring chunks with Okapi BM25."""
+
+    def __init__(self, k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.terms: Dict[str, Tuple[str, ...]] = {}  # Chunk id -> its distinct terms
+        self.lengths: Dict[str, int] = {}
+        self.metadatas: Dict[str, Dict[str, Any]] = {}
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def contains(self, chunk_id: str, term: str) -> bool:
+        return chunk_id in self.postings.get(term, ())
+
+    def add(self, chunk_id: str, document: str, metadata: Dict[str, Any]):
+        self.delete([chunk_id])
+        terms = tokenize_code(document)
+        frequencies: Dict[str, int] = {}
+        for term in terms:
+            frequencies[term] = frequencies.get(term, 0) + 1
+        for term, frequency in frequencies.items():
+            self.postings.setdefault(term, {})[chunk_id] = frequency
+        self.terms[chunk_id] = tuple(frequencies)
+        self.lengths[chunk_id] = len(terms)
+        self.metadatas[chunk_id] = metadata
+        self.total_length += len(terms)
+
+    def delete(self, ids: Sequence[str]):
+        for chunk_id in ids:
+            if chunk_id not in self.lengths:
+                continue
+            self.total_length -= self.lengths.pop(chunk_id)
+            del self.metadatas[chunk_id]
+            for term in self.terms.pop(chunk_id):
+                postings = self.postings[term]
+                del postings[chunk_id]
+                if not postings:
+                    del self.postings[term]
+
+    def search(self, query: str, k: int, where: Optional[Dict[str, Any]] = None) -> List[Tuple[str, float]]:
+        """The `k` best (chunk id, score) pairs for `query`, best first."""
+        if not self.lengths:
+            return []
+        count = len(self.lengths)
+        average = self.total_length / count or 1.0
+        scores: Dict[str, float] = {}
+        for term in set(tokenize_code(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk_id, frequency in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[chunk_id] / average)
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+        return heapq.nlargest(
+            k, ((chunk_id, score) for chunk_id, score in scores.items() if matches(self.metadatas[chunk_id], where)),
+            key=lambda item: item[1],
+        )
+
+
+class HybridRetriever:
+    """
+    BM25 prefilter with vector re-scoring over a vector store.
+
+    BM25 over code-aware terms picks a shortlist of HYBRID_SHORTLIST chunks; their
+    stored vectors are then scored against the query embedding and the two scores
+    fused as alpha * cosine + (1 - alpha) * BM25 (normalized to the best match). When
+    BM25 is decisive, the query is never embedded: the best match contains every
+    multi-word identifier in the query, or outscores the runner-up decisive_ratio
+    times. Other query embeddings are cached. Queries with too few lexical matches
+    are topped up from a plain vector search.
+
+    Writes should go through the retriever so the BM25 index follows them; the index
+    is rebuilt from the store when its size shows another process wrote to it.
+    """
+
+    def __init__(self, store: VectorStore, alpha: float = HYBRID_ALPHA, shortlist: int = HYBRID_SHORTLIST,
+                 decisive_ratio: float = BM25_DECISIVE_RATIO):
+        self.store = store
+        self.alpha = alpha
+        self.shortlist = shortlist
+        self.decisive_ratio = decisive_ratio
+        self._bm25: Optional[BM25Index] = None
+        self._query_vectors: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.counts = {"queries": 0, "embeddings": 0, "embeddings_cached": 0, "embeddings_skipped": 0}
+
+    def bm25(self) -> BM25Index:
+        with self._lock:
+            if self._bm25 is None or len(self._bm25) != self.store.count():
+                index = BM25Index()
+                for chunk in self.store.scan():
+                    index.add(chunk["id"], chunk["document"], chunk["metadata"])
+                self._bm25 = index
+            return self._bm25
+
+    def add(self, ids, vectors, documents, metadatas):
+        with self._lock:
+            self.store.add(ids, vectors, documents, metadatas)
+            if self._bm25 is not None:
+                for chunk_id, document, metadata in zip(ids, documents, metadatas):
+                    self._bm25.add(chunk_id, document, metadata)
+
+    def delete(self, ids):
+        with self._lock:
+            self.store.delete(ids)
+            if self._bm25 is not None:
+                self._bm25.delete(ids)
+
+    def _query_vector(self, query: str, embed: Callable[[Sequence[str]], np.ndarray]) -> np.ndarray:
+        with self._lock:
+            if query in self._query_vectors:
+                self._query_vectors.move_to_end(query)
+                self.counts["embeddings_cached"] += 1
+                return self._query_vectors[query]
+        vector = np.asarray(embed([query])[0], dtype=np.float32)
+        with self._lock:
+            self.counts["embeddings"] += 1
+            self._query_vectors[query] = vector
+            if len(self._query_vectors) > QUERY_EMBEDDING_CACHE_SIZE:
+                self._query_vectors.popitem(last=False)
+        return vector
+
+    def _is_decisive(self, query: str, candidates: List[Tuple[str, float]], k: int) -> bool:
+        if len(candidates) < k:
+            return False
+        identifiers = compound_identifiers(query)
+        if identifiers and all(self._bm25.contains(candidates[0][0], identifier) for identifier in identifiers):
+            return True
+        return len(candidates) == 1 or candidates[0][1] >= self.decisive_ratio * candidates[1][1]
+
+    def search(self, query: str, embed: Callable[[Sequence[str]], np.ndarray], k: int = 5,
+               where: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """The `k` chunks best matching `query`, as dicts with id, score, bm25, vector, document and metadata."""
+        with self._lock:
+            self.counts["queries"] += 1
+            candidates = self.bm25().search(query, max(k, self.shortlist), where)
+        best = candidates[0][1] if candidates else 1.0
+        lexical = {chunk_id: score / best for chunk_id, score in candidates}
+
+        if self._is_decisive(query, candidates, k):
+            with self._lock:
+                self.counts["embeddings_skipped"] += 1
+            return [
+                {**chunk, "score": lexical[chunk["id"]], "bm25": lexical[chunk["id"]], "vector": None}
+                for chunk in self.store.get([chunk_id for chunk_id, _ in candidates[:k]])
+            ]
+
+        query_vector = self._query_vector(query, embed)
+        chunks = self.store.get(list(lexical))
+        semantic = {chunk["id"]: float(chunk.pop("vector") @ query_vector) for chunk in chunks}
+        if len(chunks) < k:
+            for hit in self.store.search(query_vector, k, where):
+                if hit["id"] not in semantic:
+                    semantic[hit["id"]] = hit["score"]
+                    chunks.append({"id": hit["id"], "document": hit["document"], "metadata": hit["metadata"]})
+
+        hits = [
+            {**chunk, "score": self.alpha * semantic[chunk["id"]] + (1 - self.alpha) * lexical.get(chunk["id"], 0.0),
+             "bm25": lexical.get(chunk["id"], 0.0), "vector": semantic[chunk["id"]]}
+            for chunk in chunks
+        ]
+        return sorted(hits, key=lambda hit: hit["score"], reverse=True)[:k]
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.counts, "indexed": len(self._bm25) if self._bm25 is not None else None}
@@ -0,0 +1,75 @@
+import os
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Any, Callable, Iterable, List
+
+# Environment variables with defaults
+MAX_PARALLEL_STAGES = int(os.getenv("MAX_PARALLEL_STAGES", "2"))
+
+
+def topological_order(requires: Dict[str, Iterable[str]]) -> List[str]:
+    """
+    Return the nodes of a dependency graph in an order where every node follows its
+    dependencies, keeping the given order among independent nodes.
+
+    Raises ValueError on unknown dependencies and on cycles.
+    """
+    for name, deps in requires.items():
+        for dep in deps:
+            if dep not in requires:
+                raise ValueError(f"'{name}' depends on unknown node '{dep}'")
+
+    order: List[str] = []
+    placed = set()
+    remaining = list(requires)
+    while remaining:
+        ready = [name for name in remaining if all(dep in placed for dep in requires[name])]
+        if not ready:
+            raise ValueError(f"Dependency cycle between: {', '.join(remaining)}")
+        for name in ready:
+            order.append(name)
+            placed.add(name)
+        remaining = [name for name in remaining if name not in placed]
+    return order
+
+
+def run_dependency_graph(requires: Dict[str, Iterable[str]], run: Callable[[str, Dict[str, Any]], Any],
+                         max_workers: int = MAX_PARALLEL_STAGES) -> Dict[str, Any]:
+    """
+    Run every node of a dependency graph, starting each one as soon as its inputs are ready.
+
+    `run(name, upstream)` is called with the results of the node's dependencies and its
+    return value becomes the node's result. Independent nodes run concurrently on up to
+    `max_workers` threads; with max_workers=1 this is a plain topological run. If a node
+    raises, no further nodes are started and the exception propagates once the nodes
+    already running have finished.
+
+    Returns the results keyed by node name, in topological order.
+    """
+    requires = {name: tuple(deps) for name, deps in requires.items()}
+    order = topological_order(requires)
+    results: Dict[str, Any] = {}
+    remaining = list(order)
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="sdlc-stage") as pool:
+        running = {}
+        while remaining or running:
+            ready = [name for name in remaining if all(dep in results for dep in requires[name])]
+            for name in ready:
+                remaining.remove(name)
+                upstream = {dep: results[dep] for dep in requires[name]}
+                # Carry context variables (e.g. per-run settings) into the worker thread
+                context = contextvars.copy_context()
+                running[pool.submit(context.run, run, name, upstream)] = name
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                error = future.exception()
+                if error is not None:
+                    remaining.clear()
+                    wait(running)
+                    raise error
+                results[name] = future.result()
+
+    return {name: results[name] for name in order}
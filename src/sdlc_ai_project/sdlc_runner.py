@@ -1,9 +1,9 @@
 from sdlc_ai_project.utils import run_sdlc, save_to_json
-from sdlc_ai_project.llms import deepseek_llm, gemini_llm
+from sdlc_ai_project.llms import get_llm
 
 def main():
 
-    run_sdlc(user_requirements="Build a todo app with user authentication",project_context="A simple web application for task management", llm=gemini_llm, title='todo')
+    run_sdlc(user_requirements="Build a todo app with user authentication",project_context="A simple web application for task management", llm=get_llm("gemini"), title='todo')
 
     pass
 
@@ -0,0 +1,226 @@
+import os
+import re
+import json
+import threading
+from typing import Dict, Any, List, Optional, Tuple, Iterable
+import numpy as np
+from sdlc_ai_project.embeddings import EMBEDDING_MODEL, HashingEmbedder, get_embedder, cosine_scores
+from sdlc_ai_project.llm_cache import cache_bypassed
+from sdlc_ai_project.task_graph import TaskRunner, restore_task_output, task_context
+
+# Environment variables with defaults
+# Off by default with the hashing embedder, which only measures word overlap
+SEMANTIC_CACHE = os.getenv("SEMANTIC_CACHE", str(EMBEDDING_MODEL != "hashing")).lower() == "true"
+# Tasks whose outputs may be reused for a similar enough prompt; others always run
+SEMANTIC_CACHE_TASKS = frozenset(
+    name.strip() for name in
+    os.getenv("SEMANTIC_CACHE_TASKS", "research_similar_projects,finalize_tech_stack").split(",")
+    if name.strip()
+)
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+SEMANTIC_CACHE_PATH = os.getenv("SEMANTIC_CACHE_PATH", os.path.join(".cache", "semantic_cache.jsonl"))
+
+_NEGATION = re.compile(r"\b(?:no|not|without|never|none|nor|cannot|except|excluding|exclude[sd]?)\b|n't\b", re.IGNORECASE)
+
+
+def prompt_text(inputs: Dict[str, Any], upstream: Dict[str, str]) -> str:
+    """
+    The parts of a task's prompt that vary between runs: the inputs rendered into its
+    template and its upstream context. The template's fixed instructions are left out,
+    since they would make every prompt of the task look alike.
+    """
+    parts = [f"{name}: {value}" for name, value in sorted(inputs.items())]
+    parts += [f"{name}: {raw}" for name, raw in upstream.items()]
+    return "\n\n".join(parts)
+
+
+def negations(text: str) -> List[str]:
+    """
+    The negation words in `text`, sorted. Embeddings score "with authentication" and
+    "without authentication" as near-identical, so prompts only match when these agree.
+    """
+    return sorted(match.lower() for match in _NEGATION.findall(text))
+
+
+# -------------------------------
+# Vector Index
+# -------------------------------
+class VectorIndex:
+    """In-process nearest-neighbour index over normalized vectors, searched exhaustively."""
+
+    def __init__(self, dim: int):
+        self.vectors = np.zeros((0, dim), dtype=np.float32)
+        self.payloads: List[Any] = []
+
+    def __len__(self):
+        return len(self.payloads)
+
+    def add(self, vector: np.ndarray, payload: Any):
+        self.vectors = np.vstack([self.vectors, vector.astype(np.float32)[None, :]])
+        self.payloads.append(payload)
+
+    def search(self, vector: np.ndarray, k: int = 1) -> List[Tuple[float, Any]]:
+        """Return up to `k` (similarity, payload) pairs, most similar first."""
+        scores = cosine_scores(self.vectors, vector)
+        best = np.argsort(-scores)[:k]
+        return [(float(scores[i]), self.payloads[i]) for i in best]
+
+
+# -------------------------------
+# Semantic Cache
+# -------------------------------
+class SemanticCache:
+    """
+    Task outputs looked up by the meaning of the task's prompt rather than its exact text.
+
+    Each task name has its own index, so only prompts of the same task are compared. An
+    entry is reused when its cosine similarity reaches `threshold` and it has the same
+    negations as the prompt. Entries are appended to a JSONL file with their vectors and
+    reloaded on first use, skipping any made by a different embedding model.
+
+    The cache needs a semantic embedding model: with the hashing embedder (configured, or
+    the fallback when sentence-transformers is missing) it is disabled.
+    """
+
+    def __init__(self, path: Optional[str] = SEMANTIC_CACHE_PATH, threshold: float = SEMANTIC_CACHE_THRESHOLD,
+                 model: str = EMBEDDING_MODEL, embedder: Optional[Any] = None):
+        self.path = path
+        self.threshold = threshold
+        self.model = model
+        self._embedder = embedder
+        self._warned = False
+        self._lock = threading.Lock()
+        self._indexes: Optional[Dict[str, VectorIndex]] = None
+        self._stats = {"hits": 0, "misses": 0, "bypassed": 0, "writes": 0}
+
+    @property
+    def embedder(self):
+        return self._embedder or get_embedder(self.model)
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the embedder measures meaning; word overlap would match negations and miss paraphrases."""
+        if not isinstance(self.embedder, HashingEmbedder):
+            return True
+        if not self._warned:
+            self._warned = True
+            print("Semantic cache disabled: it needs a sentence-transformers EMBEDDING_MODEL, not the hashing embedder")
+        return False
+
+    def _index(self, task_name: str, dim: int) -> VectorIndex:
+        if task_name not in self._indexes:
+            self._indexes[task_name] = VectorIndex(dim)
+        return self._indexes[task_name]
+
+    def _load(self):
+        if self._indexes is not None:
+            return
+        self._indexes = {}
+        if not self.path or not os.path.exists(self.path):
+            return
+        with open(self.path, "r") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # A line cut short by a crash
+                if entry.get("embedder") != self.embedder.name:
+                    continue
+                vector = np.asarray(entry["vector"], dtype=np.float32)
+                self._index(entry["task"], len(vector)).add(vector, (entry["output"], entry.get("negations", [])))
+
+    def lookup(self, task_name: str, text: str) -> Optional[Tuple[str, float]]:
+        """Return the stored output of the most similar prompt and its similarity, or None."""
+        vector = self.embedder.embed([text])[0]
+        words = negations(text)
+        with self._lock:
+            self._load()
+            index = self._indexes.get(task_name)
+            for similarity, (output, entry_words) in index.search(vector, k=5) if index is not None else []:
+                if similarity < self.threshold:
+                    break
+                if entry_words == words:
+                    self._stats["hits"] += 1
+                    return output, similarity
+            self._stats["misses"] += 1
+            return None
+
+    def add(self, task_name: str, text: str, output: str):
+        vector = self.embedder.embed([text])[0]
+        words = negations(text)
+        with self._lock:
+            self._load()
+            self._index(task_name, len(vector)).add(vector, (output, words))
+            self._stats["writes"] += 1
+            if self.path:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                entry = {"task": task_name, "embedder": self.embedder.name, "vector": vector.tolist(),
+                         "negations": words, "output": output}
+                with open(self.path, "a") as f:
+                    f.write(json.dumps(entry) + "\n")
+
+    def count_bypass(self):
+        with self._lock:
+            self._stats["bypassed"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+                "entries": sum(len(index) for index in (self._indexes or {}).values()),
+                "threshold": self.threshold,
+                "embedder": self.model if self._embedder is None else self._embedder.name,
+            }
+
+
+semantic_cache = SemanticCache()
+
+
+# -------------------------------
+# Task Runners
+# -------------------------------
+def semantic_runner(task_inputs: Dict[str, Any], runner: Optional[TaskRunner] = None,
+                    cache: Optional[SemanticCache] = None) -> TaskRunner:
+    """
+    Wrap a task's runner so a similar enough earlier prompt's output is reused instead.
+
+    `task_inputs` are the inputs rendered into the task's prompt. Fresh outputs are
+    stored for later runs; inside cache_bypass the lookup is skipped. Without a semantic
+    embedder the task just runs.
+    """
+    def run(task, agent, upstream: Dict[str, str]):
+        store = cache or semantic_cache
+        text = prompt_text(task_inputs, upstream)
+        enabled = store.enabled
+        if enabled and cache_bypassed():
+            store.count_bypass()
+        elif enabled:
+            match = store.lookup(task.name, text)
+            if match is not None:
+                output, similarity = match
+                print(f"{task.name}: reused a semantically cached output (similarity {similarity:.3f})")
+                return restore_task_output(task, output)
+        if runner is not None:
+            output = runner(task, agent, upstream)
+        else:
+            output = task.execute_sync(agent=agent, context=task_context(task, upstream))
+        if enabled and getattr(output, "raw", None):
+            store.add(task.name, text, output.raw)
+        return output
+
+    return run
+
+
+def with_semantic_cache(task_runners: Dict[str, TaskRunner], task_inputs: Dict[str, Dict[str, Any]],
+                        task_names: Iterable[str] = SEMANTIC_CACHE_TASKS,
+                        cache: Optional[SemanticCache] = None) -> Dict[str, TaskRunner]:
+    """Return `task_runners` with the opted-in tasks among `task_inputs` answered from the semantic cache."""
+    runners = dict(task_runners)
+    for task_name in task_names:
+        if task_name in task_inputs:
+            runners[task_name] = semantic_runner(task_inputs[task_name], runners.get(task_name), cache)
+    return runners
@@ -0,0 +1,238 @@
+import os
+import json
+import hashlib
+import threading
+from typing import Dict, Any, Callable, Optional, Tuple, List
+from sdlc_ai_project.scheduler import run_dependency_graph
+from sdlc_ai_project.parsing import parse_json_from_markdown, process_agent_output
+from sdlc_ai_project.token_accounting import usage_scope
+from sdlc_ai_project.prompt_assembly import (
+    PROMPT_DEDUP, DROP_SUMMARIZED_CONTEXT, dedupe_context_blocks, summarized_context,
+)
+
+# Environment variables with defaults
+CREW_EXECUTION_MODE = os.getenv("CREW_EXECUTION_MODE", "sequential")  # "sequential" or "parallel"
+MAX_PARALLEL_TASKS = int(os.getenv("MAX_PARALLEL_TASKS", "3"))
+
+# Same divider crewai uses when it aggregates task outputs into a context string
+TASK_OUTPUT_DIVIDER = "\n\n----------\n\n"
+
+# Executes a task in place of task.execute_sync: runner(task, agent, upstream raw outputs by task name)
+TaskRunner = Callable[[Any, Any, Dict[str, str]], Any]
+
+
+def context_tasks(task, earlier: List[Any]) -> List[Any]:
+    """
+    The tasks whose outputs `task` receives as context, as Process.sequential decides:
+    its `context` list when one is set (an empty list means none), otherwise every
+    task that ran before it.
+    """
+    return task.context if isinstance(task.context, list) else list(earlier)
+
+
+def task_dependencies(tasks) -> Dict[str, Tuple[str, ...]]:
+    """
+    Derive a dependency graph from the context each task receives.
+
+    A task without a `context` list depends on every earlier task, because that is the
+    context Process.sequential hands it; only tasks with explicit context can start
+    before the tasks listed ahead of them.
+    """
+    names = {id(task): task.name for task in tasks}
+    requires = {}
+    for position, task in enumerate(tasks):
+        context = context_tasks(task, tasks[:position])
+        missing = [upstream for upstream in context if id(upstream) not in names]
+        if missing:
+            raise ValueError(f"Task {task.name} has context outside its crew: {[t.name for t in missing]}")
+        requires[task.name] = tuple(names[id(upstream)] for upstream in context)
+    return requires
+
+
+# -------------------------------
+# Fingerprints
+# -------------------------------
+def output_hash(raw: str) -> str:
+    """Hash a task output by its parsed content, so formatting differences don't matter."""
+    content = process_agent_output(parse_json_from_markdown(raw))
+    return hashlib.sha256(json.dumps(content, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def task_fingerprint(task, upstream_raws: List[str], model: Optional[str] = None) -> str:
+    """
+    Fingerprint everything a task's output depends on: its rendered prompt, the model
+    that runs it and the content of the upstream outputs it receives as context.
+    `model` overrides the agent's when the task runs on another one.
+    """
+    llm = getattr(task.agent, "llm", None)
+    inputs = {
+        "description": task.description,
+        "expected_output": task.expected_output,
+        "model": model or getattr(llm, "model", str(llm)),
+        "context": [output_hash(raw) for raw in upstream_raws],
+    }
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+
+class TaskReuse:
+    """
+    Saved task outputs from an earlier run and the fingerprints of this run's tasks.
+
+    `saved` maps task names to records with "output" and "fingerprint" keys. A saved
+    output is only reused when its fingerprint matches the task's current inputs, so
+    editing one output recomputes exactly the tasks downstream of it. `model_of`, if
+    given, names the model a task will actually run on, e.g. the one it is routed to.
+    """
+
+    def __init__(self, saved: Optional[Dict[str, Dict[str, Any]]] = None,
+                 model_of: Optional[Callable[[Any, List[str]], Optional[str]]] = None):
+        self.saved = saved or {}
+        self.model_of = model_of
+        self.fingerprints: Dict[str, str] = {}
+        self.reused = set()
+        self._lock = threading.Lock()
+
+    def resolve(self, task, upstream_raws: List[str]) -> Optional[Dict[str, Any]]:
+        """Record the task's fingerprint and return its saved record if still valid."""
+        model = self.model_of(task, upstream_raws) if self.model_of is not None else None
+        fingerprint = task_fingerprint(task, upstream_raws, model)
+        record = self.saved.get(task.name)
+        with self._lock:
+            self.fingerprints[task.name] = fingerprint
+            if record is None or record.get("fingerprint") != fingerprint:
+                return None
+            self.reused.add(task.name)
+        return record
+
+
+def restore_task_output(task, output: Any):
+    """Attach a previously saved output to a task instead of executing it again."""
+    from crewai.tasks.task_output import TaskOutput
+
+    raw = output if isinstance(output, str) else json.dumps(output, indent=2)
+    task.output = TaskOutput(
+        name=task.name,
+        description=task.description,
+        expected_output=task.expected_output,
+        raw=raw,
+        agent=task.agent.role,
+    )
+    return task.output
+
+
+# -------------------------------
+# Execution
+# -------------------------------
+def task_context(task, upstream_raws: Dict[str, str], dedupe: bool = PROMPT_DEDUP,
+                 drop_summarized: bool = DROP_SUMMARIZED_CONTEXT) -> str:
+    """
+    Assemble the context string a task receives from its upstream tasks' raw outputs.
+
+    With `dedupe`, content already in the description or in an earlier output is sent
+    once; with `drop_summarized`, outputs another context task already consumed are left out.
+    """
+    kept = upstream_raws
+    if drop_summarized:
+        summarized = summarized_context(task)
+        kept = {name: raw for name, raw in upstream_raws.items() if name not in summarized}
+    blocks = dedupe_context_blocks(task.description, kept) if dedupe else list(kept.values())
+    saved = sum(len(raw) for raw in upstream_raws.values()) - sum(len(block) for block in blocks)
+    if saved > 0:
+        print(f"{task.name}: sent {saved} fewer bytes of repeated context")
+    return TASK_OUTPUT_DIVIDER.join(blocks)
+
+
+def execute_task(task, agent, upstream: Dict[str, Any], task_runners: Optional[Dict[str, TaskRunner]] = None):
+    """
+    Execute one task with the outputs of its upstream tasks as context.
+
+    A runner registered for the task's name in `task_runners` replaces the single
+    execute_sync call, e.g. to fan the task out into smaller subtasks.
+    """
+    upstream_raws = {name: output.raw for name, output in upstream.items()}
+    runner = (task_runners or {}).get(task.name)
+    with usage_scope(task=task.name, agent=getattr(agent, "role", None)):
+        if runner is not None:
+            return runner(task, agent, upstream_raws)
+        return task.execute_sync(agent=agent, context=task_context(task, upstream_raws))
+
+
+def execute_task_graph(crew, max_workers: int = MAX_PARALLEL_TASKS,
+                       on_task_output: Optional[Callable[[Any], None]] = None,
+                       reuse: Optional[TaskReuse] = None,
+                       task_runners: Optional[Dict[str, TaskRunner]] = None) -> Dict[str, Any]:
+    """
+    Execute a crew's tasks as a DAG, running every task whose context is ready concurrently.
+
+    Each task's output is stored on `task.output`, as with crew.kickoff(), so callers can
+    read results the same way. Tasks with a still-valid saved output in `reuse` are
+    restored rather than executed. Tasks running side by side get their own copy of the
+    agent because an Agent keeps per-task executor state.
+    """
+    tasks_by_name = {task.name: task for task in crew.tasks}
+    requires = task_dependencies(crew.tasks)
+
+    def run(task_name: str, upstream: Dict[str, Any]):
+        task = tasks_by_name[task_name]
+        upstream_raws = [output.raw for output in upstream.values()]
+        record = reuse.resolve(task, upstream_raws) if reuse is not None else None
+        if record is not None:
+            output = restore_task_output(task, record["output"])
+        else:
+            agent = task.agent.copy() if max_workers > 1 else task.agent
+            output = execute_task(task, agent, upstream, task_runners)
+        if on_task_output is not None:
+            on_task_output(output)
+        return output
+
+    return run_dependency_graph(requires, run, max_workers=max_workers)
+
+
+def execute_tasks_in_order(crew, on_task_output: Optional[Callable[[Any], None]] = None,
+                           reuse: Optional[TaskReuse] = None,
+                           task_runners: Optional[Dict[str, TaskRunner]] = None) -> Dict[str, Any]:
+    """
+    Execute a crew's tasks one by one the way Process.sequential does, restoring tasks
+    with a still-valid saved output in `reuse` instead of executing them.
+
+    A task without a context list receives every earlier task's output, as in crewai.
+    """
+    outputs = {}
+    for position, task in enumerate(crew.tasks):
+        upstream = {
+            context_task.name: context_task.output for context_task in context_tasks(task, crew.tasks[:position])
+        }
+        upstream_raws = [output.raw for output in upstream.values()]
+        record = reuse.resolve(task, upstream_raws) if reuse is not None else None
+        if record is not None:
+            output = restore_task_output(task, record["output"])
+        else:
+            output = execute_task(task, task.agent, upstream, task_runners)
+        outputs[task.name] = output
+        if on_task_output is not None:
+            on_task_output(output)
+    return outputs
+
+
+def kickoff_crew(crew, on_task_output: Optional[Callable[[Any], None]] = None,
+                 mode: str = CREW_EXECUTION_MODE, max_parallel_tasks: int = MAX_PARALLEL_TASKS,
+                 reuse: Optional[TaskReuse] = None, task_runners: Optional[Dict[str, TaskRunner]] = None):
+    """
+    Run a crew either with crewai's sequential process or as a parallel task graph.
+
+    When `reuse` is given every task is fingerprinted, and tasks whose saved output was
+    produced from identical inputs are restored rather than executed again. Tasks named
+    in `task_runners` are executed by their runner instead of a single LLM call.
+    """
+    if mode == "parallel":
+        execute_task_graph(crew, max_workers=max_parallel_tasks, on_task_output=on_task_output, reuse=reuse,
+                           task_runners=task_runners)
+        return
+    if mode != "sequential":
+        raise ValueError(f"Unknown crew execution mode: {mode}")
+    if reuse is not None or task_runners:
+        execute_tasks_in_order(crew, on_task_output=on_task_output, reuse=reuse, task_runners=task_runners)
+        return
+    if on_task_output is not None:
+        crew.task_callback = on_task_output
+    crew.kickoff()
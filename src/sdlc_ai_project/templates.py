@@ -0,0 +1,93 @@
+import re
+import threading
+from typing import Dict, Any, Iterable, List, Tuple, Optional
+
+
+def render(template: str, inputs: Dict[str, Any]) -> str:
+    """
+    Replace `{name}` placeholders with the matching inputs in a single pass.
+
+    Values are rendered with str(), exactly as the agents' f-strings render them, and
+    braces inside the substituted values are left alone.
+    """
+    if not inputs or not isinstance(template, str):
+        return template
+    pattern = re.compile(r"\{(" + "|".join(re.escape(name) for name in inputs) + r")\}")
+    return pattern.sub(lambda match: str(inputs[match.group(1)]), template)
+
+
+class CrewTemplate:
+    """
+    A CrewBase agent's crew built once per process, with placeholders for its inputs.
+
+    Building a CrewBase instance runs the decorator machinery, constructs every Agent
+    and Task and renders every prompt. A template does that once with `{input}`
+    placeholders in place of the real values; `bind` then copies the prebuilt crew and
+    fills in only the per-request inputs.
+    """
+
+    AGENT_FIELDS = ("role", "goal", "backstory")
+    TASK_FIELDS = ("description", "expected_output")
+
+    def __init__(self, agent_cls, llm, input_names: Iterable[str]):
+        self.agent_cls = agent_cls
+        self.llm = llm
+        self.input_names = tuple(sorted(input_names))
+        placeholders = {name: "{" + name + "}" for name in self.input_names}
+        self.crew = agent_cls(**placeholders, llm=llm).crew()
+        # Unrendered text of every agent and task, in crew order
+        self.agent_templates: List[Dict[str, str]] = [
+            {field: getattr(agent, field) for field in self.AGENT_FIELDS} for agent in self.crew.agents
+        ]
+        self.task_templates: List[Dict[str, str]] = [
+            {field: getattr(task, field) for field in self.TASK_FIELDS} for task in self.crew.tasks
+        ]
+        # Inputs each task's prompt renders, by task name
+        self.task_input_names: Dict[str, Tuple[str, ...]] = {
+            task.name: tuple(
+                name for name in self.input_names
+                if any("{" + name + "}" in (text or "") for text in fields.values())
+            )
+            for task, fields in zip(self.crew.tasks, self.task_templates)
+        }
+
+    def bind(self, task_inputs: Optional[Dict[str, Dict[str, Any]]] = None, **inputs):
+        """
+        Return a fresh crew with this request's inputs rendered into its prompts.
+
+        `task_inputs` maps task names to inputs that replace `inputs` in that task's
+        prompt only, e.g. a slice of a large upstream output.
+        """
+        missing = set(self.input_names) - set(inputs)
+        if missing:
+            raise TypeError(f"{self.agent_cls.__name__} template is missing inputs: {', '.join(sorted(missing))}")
+        crew = self.crew.copy()
+        for agent, fields in zip(crew.agents, self.agent_templates):
+            for field, template in fields.items():
+                setattr(agent, field, render(template, inputs))
+        for task, fields in zip(crew.tasks, self.task_templates):
+            values = {**inputs, **(task_inputs or {}).get(task.name, {})}
+            for field, template in fields.items():
+                setattr(task, field, render(template, values))
+        return crew
+
+
+_templates: Dict[Tuple[Any, int, Tuple[str, ...]], CrewTemplate] = {}
+_templates_lock = threading.Lock()
+
+
+def get_crew_template(agent_cls, llm, input_names: Iterable[str]) -> CrewTemplate:
+    """Return the process-wide template for an agent class and LLM, building it on first use."""
+    key = (agent_cls, id(llm), tuple(sorted(input_names)))
+    with _templates_lock:
+        template = _templates.get(key)
+        if template is None:
+            template = CrewTemplate(agent_cls, llm, input_names)
+            _templates[key] = template
+            print(f"Compiled crew template for {agent_cls.__name__}")
+    return template
+
+
+def build_crew(agent_cls, llm, task_inputs: Optional[Dict[str, Dict[str, Any]]] = None, **inputs):
+    """Build a crew for `agent_cls` from its compiled template and this request's inputs."""
+    return get_crew_template(agent_cls, llm, inputs).bind(task_inputs, **inputs)
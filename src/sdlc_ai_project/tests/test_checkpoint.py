@@ -0,0 +1,48 @@
+import json
+import os
+import pytest
+from sdlc_ai_project.checkpoint import CheckpointStore
+
+KNOWLEDGE_TASKS = ("research_similar_projects", "finalize_tech_stack")
+
+@pytest.fixture
+def store(tmp_path):
+    return CheckpointStore(str(tmp_path / "todo"))
+
+def write_stage(store, stage, data):
+    os.makedirs(store.directory, exist_ok=True)
+    with open(store.stage_path(stage), "w") as f:
+        f.write(data if isinstance(data, str) else json.dumps(data))
+
+def test_complete_stage_is_reused(store):
+    write_stage(store, "Knowledge", {"research_similar_projects": {"projects": []}, "finalize_tech_stack": {"tech_stack": ["fastapi"]}})
+    assert store.load_stage("Knowledge", KNOWLEDGE_TASKS)["finalize_tech_stack"] == {"tech_stack": ["fastapi"]}
+
+def test_incomplete_or_corrupt_stage_is_not_reused(store):
+    assert store.load_stage("Knowledge", KNOWLEDGE_TASKS) is None
+    write_stage(store, "Knowledge", {"research_similar_projects": {"projects": []}, "finalize_tech_stack": ""})
+    assert store.load_stage("Knowledge", KNOWLEDGE_TASKS) is None
+    write_stage(store, "Knowledge", '{"research_similar_projects": ')
+    assert store.load_stage("Knowledge", KNOWLEDGE_TASKS) is None
+
+def test_task_checkpoints_round_trip(store):
+    store.save_task("Knowledge", "research_similar_projects", {"projects": [{"name": "kanboard"}]}, "fp-1")
+    store.save_task("Knowledge", "gather_documentation", "raw text output")
+    saved = store.load_tasks("Knowledge")
+    assert saved["research_similar_projects"]["output"] == {"projects": [{"name": "kanboard"}]}
+    assert saved["research_similar_projects"]["fingerprint"] == "fp-1"
+    assert saved["gather_documentation"]["output"] == "raw text output"
+    assert not [f for f in os.listdir(store.task_dir("Knowledge")) if f.endswith(".tmp")]
+
+    store.clear_tasks("Knowledge")
+    assert store.load_tasks("Knowledge") == {}
+
+def test_edit_keeps_fingerprint(store):
+    store.save_task("Requirements", "task_generation_task", {"tasks": ["login"]}, "fp-tasks")
+    assert store.update_task_output("Requirements", "task_generation_task", {"tasks": ["login", "signup"]})
+    record = store.load_tasks("Requirements")["task_generation_task"]
+    assert record == {"task": "task_generation_task", "fingerprint": "fp-tasks", "output": {"tasks": ["login", "signup"]}}
+    assert not store.update_task_output("Requirements", "extraction_task", {})
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,206 @@
+import time
+import pytest
+import requests
+from sdlc_ai_project.code_index import GitHubClient, RepoIndex, parse_repo_url, chunk_code, is_indexable
+from sdlc_ai_project.embeddings import get_embedder
+from sdlc_ai_project.rate_limit import TokenBucketLimiter
+from sdlc_ai_project.vector_store import ChromaVectorStore
+
+class FakeGitHub:
+    def __init__(self):
+        self.commit = "a" * 40
+        self.files = {
+            "app/tasks.py": "def create_task(title):\n    return Task(title=title)\n",
+            "app/users.py": "def login(user, password):\n    return authenticate(user, password)\n",
+        }
+        self.fetched = []
+        self.delay = 0.0
+        self.missing = set()
+
+    def head_commit(self, owner, repo, deadline=None):
+        if repo in self.missing:
+            raise not_found()
+        return self.commit
+
+    def tree(self, owner, repo, commit, deadline=None):
+        return {path: str(hash(text)) for path, text in self.files.items()}
+
+    def file(self, owner, repo, commit, path, deadline=None):
+        self.fetched.append(path)
+        time.sleep(self.delay)
+        if path in self.missing:
+            raise not_found()
+        return self.files[path]
+
+def not_found():
+    response = requests.Response()
+    response.status_code = 404
+    return requests.HTTPError("404 Not Found", response=response)
+
+@pytest.fixture
+def github():
+    return FakeGitHub()
+
+@pytest.fixture
+def limiter(tmp_path):
+    return TokenBucketLimiter(str(tmp_path / "rate_limits.sqlite3"), {"embedding": {"tpm": 100_000}})
+
+@pytest.fixture
+def index(tmp_path, github, limiter):
+    store = ChromaVectorStore("code_test", str(tmp_path / "chroma"))
+    return RepoIndex(store=store, directory=str(tmp_path / "index"), github=github, limiter=limiter)
+
+def test_repo_urls_are_parsed():
+    assert parse_repo_url("https://github.com/kanboard/kanboard") == ("kanboard", "kanboard")
+    assert parse_repo_url("https://github.com/JordanKnott/taskcafe.git") == ("JordanKnott", "taskcafe")
+    assert parse_repo_url("https://github.com/org/repo/tree/main/src") == ("org", "repo")
+    assert parse_repo_url("https://example.com/org/repo") is None
+
+def test_only_source_files_outside_vendored_directories_are_indexed():
+    assert is_indexable("src/app.py")
+    assert not is_indexable("node_modules/react/index.js")
+    assert not is_indexable("assets/logo.png")
+    assert not is_indexable("src/huge.py", size=10_000_000)
+
+def test_code_is_chunked_by_lines():
+    text = "\n".join(f"line {n}" for n in range(1, 131))
+    assert [line for line, _ in chunk_code(text, 60)] == [1, 61, 121]
+
+def test_first_ingest_embeds_every_file(index, github):
+    result = index.ingest("https://github.com/org/todo")
+    assert result.status == "new" and result.files_indexed == 2
+    assert index.store.count() == 2
+    hits = index.search("create a task", k=1)
+    assert hits[0]["metadata"]["path"] == "app/tasks.py"
+
+def test_ingesting_the_same_commit_again_does_nothing(index, github):
+    index.ingest("https://github.com/org/todo")
+    github.fetched.clear()
+    assert index.ingest("https://github.com/org/todo.git").status == "unchanged"
+    assert github.fetched == []
+
+def test_a_new_commit_refreshes_only_changed_files(index, github):
+    index.ingest("https://github.com/org/todo")
+    github.fetched.clear()
+    github.commit = "b" * 40
+    github.files["app/tasks.py"] = "def archive_task(task):\n    task.archived = True\n"
+    del github.files["app/users.py"]
+    result = index.ingest("https://github.com/org/todo")
+    assert result.status == "updated"
+    assert (result.files_indexed, result.files_removed) == (1, 1)
+    assert github.fetched == ["app/tasks.py"]
+    assert index.store.count() == 1
+    assert index.manifest("https://github.com/org/todo")["commit"] == "b" * 40
+
+def test_the_index_is_reused_by_a_new_process(tmp_path, index, github):
+    index.ingest("https://github.com/org/todo")
+    github.fetched.clear()
+    reopened = RepoIndex(store=ChromaVectorStore("code_test", str(tmp_path / "chroma")),
+                         directory=str(tmp_path / "index"), github=github)
+    assert reopened.ingest("https://github.com/org/todo").status == "unchanged"
+    assert reopened.search("user login", k=1, repos=["https://github.com/org/todo"])[0]["metadata"]["path"] == "app/users.py"
+    assert reopened.search("user login", k=1, repos=["https://github.com/org/other"]) == []
+
+def test_repositories_are_ingested_in_parallel(index, github):
+    github.delay = 0.1
+    urls = [f"https://github.com/org/repo{n}" for n in range(5)]
+    report = index.ingest_many(urls, max_workers=5)
+    assert sorted(report.urls) == sorted(urls) and report.failures == []
+    assert report.seconds < 0.2 * 5 * 0.8  # each repo fetches two files sequentially
+
+def test_failures_are_reported_without_stopping_the_others(index, github):
+    github.missing = {"gone"}
+    report = index.ingest_many(["https://github.com/org/todo", "https://github.com/org/gone", "not a repo"])
+    assert report.urls == ["https://github.com/org/todo"]
+    assert [(failure.url, failure.reason) for failure in report.failures] == [
+        ("https://github.com/org/gone", "http_404"), ("not a repo", "invalid_url"),
+    ]
+
+def test_a_timed_out_repository_resumes_where_it_stopped(index, github):
+    github.delay = 0.3
+    report = index.ingest_many(["https://github.com/org/todo"], timeout=0.45)  # The second file comes too late
+    assert report.failures[0].reason == "timeout"
+    assert index.manifest("https://github.com/org/todo")["commit"] is None
+    github.fetched.clear()
+    assert index.ingest("https://github.com/org/todo").files_indexed == 1
+    assert github.fetched == ["app/users.py"]
+
+def test_files_that_fail_are_skipped_and_retried(index, github):
+    index.ingest("https://github.com/org/todo")
+    github.commit = "b" * 40
+    github.files = {path: text + "# edited\n" for path, text in github.files.items()}
+    github.missing = {"app/users.py"}
+    result = index.ingest("https://github.com/org/todo")
+    assert result.files_indexed == 1
+    assert [(failure.url, failure.reason) for failure in result.skipped] == [
+        (f"https://github.com/org/todo/blob/{'b' * 40}/app/users.py", "http_404"),
+    ]
+    manifest = index.manifest("https://github.com/org/todo")
+    assert manifest["commit"] == "a" * 40  # Not complete yet, so the next ingest diffs again
+    assert index.search("user login", k=1)[0]["metadata"]["path"] == "app/users.py"  # Old chunks are kept
+    github.missing = set()
+    github.fetched.clear()
+    assert index.ingest("https://github.com/org/todo").files_indexed == 1
+    assert github.fetched == ["app/users.py"]
+    assert index.manifest("https://github.com/org/todo")["commit"] == "b" * 40
+
+def test_waiting_for_the_index_lock_is_bounded(index):
+    with index._locked("org", "todo"):
+        started = time.monotonic()
+        report = index.ingest_many(["https://github.com/org/todo"], timeout=0.2)
+    assert report.failures[0].reason == "timeout"
+    assert time.monotonic() - started < 1
+
+def test_embedding_draws_on_the_shared_token_bucket(tmp_path, index):
+    index.limiter = TokenBucketLimiter(str(tmp_path / "slow.sqlite3"), {"embedding": {"tpm": 1_000}})
+    index.ingest("https://github.com/org/todo")
+    assert index.limiter.state()["buckets"]["embedding:tpm"]["available"] < 990
+
+def test_a_missing_embedding_model_falls_back_only_when_allowed(monkeypatch, tmp_path, capsys):
+    def unavailable(model_name):
+        raise ImportError("No module named 'sentence_transformers'")
+
+    monkeypatch.setattr("sdlc_ai_project.embeddings.SentenceTransformerEmbedder", unavailable)
+    with pytest.raises(ImportError):
+        get_embedder("strict-test-model", fallback=False)
+    assert get_embedder("lenient-test-model", fallback=True).name.startswith("hashing")
+    assert "WARNING" in capsys.readouterr().out
+
+    # Vectors of different embedders are kept apart
+    index = RepoIndex(directory=str(tmp_path), embedding_model="lenient-test-model")
+    assert "hashing_1024" in index._manifest_path("org", "todo")
+
+class FakeResponse:
+    def __init__(self, payload, status_code=200):
+        self.payload = payload
+        self.status_code = status_code
+        self.text = str(payload)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code}", response=self)
+
+    def json(self):
+        return self.payload
+
+def test_github_requests_take_search_slots(tmp_path):
+    limiter = TokenBucketLimiter(str(tmp_path / "search.sqlite3"), {"search": {"rpd": 2}})
+    client = GitHubClient(token="t", limiter=limiter)
+    client.session.get = lambda url, timeout: FakeResponse({"default_branch": "main", "sha": "a" * 40})
+    assert client.head_commit("octo", "todo") == "a" * 40  # Two API requests
+    assert limiter.state()["buckets"]["search:rpd"]["available"] < 0.1
+    with pytest.raises(TimeoutError):
+        client.file("octo", "todo", "a" * 40, "app.py")  # The next slot is hours away
+
+def test_github_requests_time_out_at_the_deadline(tmp_path):
+    timeouts = []
+    client = GitHubClient(token="t", limiter=TokenBucketLimiter(str(tmp_path / "search.sqlite3"), {}))
+    client.session.get = lambda url, timeout: timeouts.append(timeout) or FakeResponse("code")
+    client.file("octo", "todo", "a" * 40, "app.py", deadline=time.monotonic() + 2)
+    assert 0 < timeouts[0] <= 2
+    with pytest.raises(TimeoutError):
+        client.file("octo", "todo", "a" * 40, "app.py", deadline=time.monotonic() - 1)
+    assert len(timeouts) == 1
+
+if __name__ == "__main__":
+    pytest.main([__file__])
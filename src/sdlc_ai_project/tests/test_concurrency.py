@@ -0,0 +1,111 @@
+import time
+import threading
+import pytest
+from sdlc_ai_project.concurrency import AIMDController, is_overload_error, control_concurrency, get_controller
+
+class ProviderError(Exception):
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+def test_overload_errors_are_classified():
+    assert is_overload_error(ProviderError("slow down", status_code=429))
+    assert is_overload_error(ProviderError("unavailable", status_code=503))
+    assert is_overload_error(RuntimeError("RESOURCE_EXHAUSTED: quota exceeded"))
+    assert not is_overload_error(ProviderError("server error", status_code=500))
+    assert not is_overload_error(ValueError("bad prompt"))
+
+def test_successes_grow_the_window_additively():
+    controller = AIMDController("test", initial=2, maximum=4)
+    for _ in range(2):
+        with controller.slot():
+            pass
+    assert controller.window == pytest.approx(2 + 1 / 2 + 1 / 2.5)
+    for _ in range(50):
+        with controller.slot():
+            pass
+    assert controller.window == 4
+
+def test_overloads_shrink_the_window_and_back_off():
+    controller = AIMDController("test", initial=8, backoff=0.05)
+    with pytest.raises(ProviderError):
+        with controller.slot():
+            raise ProviderError("too many requests", status_code=429)
+    snapshot = controller.snapshot()
+    assert snapshot["window"] == 4
+    assert snapshot["backing_off"] and snapshot["overloads"] == 1
+    started = time.monotonic()
+    with controller.slot():
+        pass
+    assert time.monotonic() - started >= 0.04
+
+def test_a_burst_of_overloads_shrinks_once_per_latency():
+    controller = AIMDController("test", initial=8, backoff=0.0)
+    with controller.slot():
+        time.sleep(0.05)  # recent latency ~0.05s
+    for _ in range(3):
+        controller.acquire()
+    for _ in range(3):
+        controller.release(0.01, ProviderError("unavailable", status_code=503))
+    assert controller.counts["decreases"] == 1
+
+def test_rising_latency_shrinks_the_window():
+    controller = AIMDController("test", initial=8, latency_factor=2.0)
+    controller.acquire()
+    controller.release(0.1)
+    window = controller.window
+    for _ in range(5):
+        controller.acquire()
+        controller.release(2.0)
+    assert controller.window < window
+    assert controller.counts["decreases"] >= 1
+
+def test_calls_beyond_the_window_wait_for_a_slot():
+    controller = AIMDController("test", initial=2)
+    peak, running, lock = [0], [0], threading.Lock()
+
+    def call():
+        with controller.slot():
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+
+    threads = [threading.Thread(target=call) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak[0] <= 3  # the window grows past 2 as calls succeed
+    for _ in range(int(controller.window)):
+        controller.acquire()
+    with pytest.raises(TimeoutError):
+        controller.acquire(timeout=0.01)
+
+def test_llm_calls_run_under_their_providers_controller():
+    class FakeLLM:
+        model = "nvidia_nim/meta/llama3-70b-instruct"
+
+        def call(self, messages, tools=None, callbacks=None, **kwargs):
+            return "ok"
+
+    assert control_concurrency(FakeLLM()).call("hi") == "ok"
+    assert get_controller("nvidia_nim").snapshot()["successes"] >= 1
+
+def test_native_clients_run_under_their_providers_controller():
+    class NativeLLM:
+        model = "gemini-1.5-flash"  # crewai strips the prefix and keeps the provider apart
+        provider = "gemini"
+
+        def call(self, messages, tools=None, callbacks=None, **kwargs):
+            return "ok"
+
+    before = get_controller("openai").snapshot()["successes"]
+    assert control_concurrency(NativeLLM()).call("hi") == "ok"
+    assert get_controller("gemini").snapshot()["successes"] >= 1
+    assert get_controller("openai").snapshot()["successes"] == before
+
+if __name__ == "__main__":
+    pytest.main([__file__])
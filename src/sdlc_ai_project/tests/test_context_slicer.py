@@ -0,0 +1,51 @@
+import pytest
+from sdlc_ai_project.context_slicer import select_paths, slice_task_inputs, estimate_tokens, format_savings
+
+@pytest.fixture
+def architecture_design():
+    return {
+        "system_research_task": {"similar_systems": ["Todoist", "Asana"] * 50},
+        "component_diagram_task": {
+            "component_diagram": "graph TD; A-->B",
+            "component_specifications": {"api": "REST"},
+        },
+        # Outputs saved before parsing are still markdown JSON strings
+        "architecture_blueprint_task": '```json\n{"architecture_blueprint": {"layers": ["api", "db"]}}\n```',
+    }
+
+def test_select_paths_keeps_only_named_subtrees(architecture_design):
+    selected = select_paths(architecture_design, [
+        "architecture_blueprint_task.architecture_blueprint",
+        "component_diagram_task.component_specifications",
+    ])
+    assert selected == {
+        "architecture_blueprint_task": {"architecture_blueprint": {"layers": ["api", "db"]}},
+        "component_diagram_task": {"component_specifications": {"api": "REST"}},
+    }
+
+def test_select_paths_handles_overlapping_and_missing_paths(architecture_design):
+    selected = select_paths(architecture_design, [
+        "component_diagram_task", "component_diagram_task.component_specifications", "missing.key",
+    ])
+    assert selected == {"component_diagram_task": architecture_design["component_diagram_task"]}
+    assert "component_specifications" in architecture_design["component_diagram_task"]
+
+def test_select_paths_falls_back_to_everything(architecture_design):
+    assert select_paths(architecture_design, ["missing"]) is architecture_design
+    assert select_paths("plain text output", ["key"]) == "plain text output"
+
+def test_slice_task_inputs_reports_tokens_saved(architecture_design):
+    inputs = {"architecture_design": architecture_design, "project_context": "todo app"}
+    task_inputs, full_tokens, sliced_tokens = slice_task_inputs(inputs, {
+        "code_skeleton_task": {"architecture_design": ("architecture_blueprint_task",)},
+    })
+    assert list(task_inputs) == ["code_skeleton_task"]
+    assert task_inputs["code_skeleton_task"]["architecture_design"] == {
+        "architecture_blueprint_task": {"architecture_blueprint": {"layers": ["api", "db"]}},
+    }
+    assert full_tokens == estimate_tokens(architecture_design)
+    assert 0 < sliced_tokens < full_tokens
+    assert format_savings("Skeletons", 200, 50) == "Skeletons: context slicing saved ~150 prompt tokens (75% of sliced inputs)"
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,134 @@
+import os
+import time
+import threading
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from unittest.mock import patch
+import pytest
+from sdlc_ai_project.doc_index import DocIndex, extract_text, chunk_blocks
+from sdlc_ai_project.rate_limit import TokenBucketLimiter
+from sdlc_ai_project.tools import document_research_tool
+from sdlc_ai_project.vector_store import ChromaVectorStore
+
+FIXTURE_DOCS = os.path.join(os.path.dirname(__file__), "fixtures", "docs")
+PAGES = ("fastapi_security.html", "sqlalchemy_sessions.html", "react_hooks.html")
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    requests_served = []
+
+    def do_GET(self):
+        QuietHandler.requests_served.append(self.path)
+        if self.path == "/trickle.html":
+            return self.trickle()
+        super().do_GET()
+
+    def trickle(self):
+        """Send a page one byte at a time, each byte well within the socket timeout."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.end_headers()
+        try:
+            for _ in range(100):
+                self.wfile.write(b"x")
+                self.wfile.flush()
+                time.sleep(0.05)
+        except OSError:
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture(scope="module")
+def docs_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(QuietHandler, directory=FIXTURE_DOCS))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+@pytest.fixture
+def index(tmp_path):
+    QuietHandler.requests_served.clear()
+    limiter = TokenBucketLimiter(str(tmp_path / "rate_limits.sqlite3"), {"embedding": {"tpm": 100_000}})
+    return DocIndex(store=ChromaVectorStore("docs_test", str(tmp_path / "chroma")),
+                    directory=str(tmp_path / "docs"), limiter=limiter)
+
+def test_text_is_extracted_without_scripts_or_navigation():
+    with open(os.path.join(FIXTURE_DOCS, "fastapi_security.html")) as f:
+        title, blocks = extract_text(f.read())
+    assert title == "Security - OAuth2 with Password and Bearer"
+    text = "\n".join(blocks)
+    assert 'OAuth2PasswordBearer(tokenUrl="token")' in text
+    assert "\n\noauth2_scheme" in text  # code keeps its line breaks
+    assert "trackPageView" not in text and "Tutorial" not in text and "Copyright" not in text
+
+def test_blocks_are_packed_into_overlapping_chunks():
+    blocks = [" ".join(f"w{n}" for n in range(start, start + 30)) for start in range(0, 120, 30)]
+    chunks = chunk_blocks(blocks, words=60, overlap=10)
+    assert len(chunks) == 3
+    assert chunks[1].split()[:10] == chunks[0].split()[-10:]
+    assert chunk_blocks(["word " * 250], words=100, overlap=0)[0].split() == ["word"] * 100
+
+def test_pages_are_fetched_chunked_and_answered(index, docs_server):
+    urls = [f"{docs_server}/{page}" for page in PAGES]
+    report = index.ingest(urls)
+    assert sorted(report.indexed) == sorted(urls) and report.failures == []
+    hits = index.search("how do I commit a database session transaction", k=1, urls=urls)
+    assert hits[0]["metadata"]["url"] == f"{docs_server}/sqlalchemy_sessions.html"
+    assert hits[0]["document"].startswith("# Session Basics - SQLAlchemy")
+
+def test_indexed_pages_are_reused_without_fetching(index, docs_server):
+    urls = [f"{docs_server}/{page}" for page in PAGES]
+    index.ingest(urls)
+    QuietHandler.requests_served.clear()
+    report = index.ingest(urls)
+    assert sorted(report.reused) == sorted(urls) and report.indexed == []
+    assert QuietHandler.requests_served == []
+
+def test_stale_pages_are_refetched_but_only_reembedded_when_changed(index, docs_server):
+    index.refresh_seconds = 0
+    urls = [f"{docs_server}/{page}" for page in PAGES]
+    index.ingest(urls)
+    count = index.store.count()
+    report = index.ingest(urls)
+    assert len(QuietHandler.requests_served) == 6
+    assert sorted(report.reused) == sorted(urls) and report.chunks == 0
+    assert index.store.count() == count
+
+def test_missing_pages_are_reported(index, docs_server):
+    report = index.ingest([f"{docs_server}/react_hooks.html", f"{docs_server}/missing.html"])
+    assert report.indexed == [f"{docs_server}/react_hooks.html"]
+    assert [(failure.url, failure.reason) for failure in report.failures] == [(f"{docs_server}/missing.html", "http_404")]
+
+def test_a_page_that_trickles_in_times_out(index, docs_server):
+    index.fetch_timeout = 0.5
+    started = time.monotonic()
+    report = index.ingest([f"{docs_server}/trickle.html"])
+    assert [failure.reason for failure in report.failures] == ["timeout"]
+    assert time.monotonic() - started < 2
+
+def test_a_failed_embedding_keeps_the_old_chunks(index, docs_server):
+    index.refresh_seconds = 0
+    url = f"{docs_server}/react_hooks.html"
+    index.ingest([url])
+    before = index.manifest()[url]
+    count = index.store.count()
+    with patch.object(index, "fetch", return_value=("React Hooks", ["A rewritten page about hooks"])), \
+            patch.object(index, "embed", side_effect=TimeoutError("embedding rate limit")):
+        with pytest.raises(TimeoutError):
+            index.ingest([url])
+    assert index.manifest()[url] == before
+    assert index.store.count() == count
+    with patch.object(index, "fetch", return_value=("React Hooks", ["A rewritten page about hooks"])):
+        index.ingest([url])
+    assert index.store.count() == 1 and index.manifest()[url]["sha"] != before["sha"]
+
+def test_document_research_tool_answers_from_the_fetched_pages(index, docs_server):
+    urls = [f"{docs_server}/{page}" for page in PAGES]
+    with patch("sdlc_ai_project.tools.search_links", return_value=urls), \
+            patch("sdlc_ai_project.tools.doc_index", index):
+        _, result = document_research_tool.run(query="OAuth2 bearer token authentication")
+    assert result.split("\n")[0].endswith("# Security - OAuth2 with Password and Bearer")
+    assert len(QuietHandler.requests_served) == 3
+
+if __name__ == "__main__":
+    pytest.main([__file__])
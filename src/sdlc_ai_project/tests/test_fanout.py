@@ -0,0 +1,117 @@
+import time
+import json
+import threading
+import pytest
+from sdlc_ai_project.fanout import split_modules, module_entry, merge_module_outputs, run_single, run_fanout
+from sdlc_ai_project.task_graph import TASK_OUTPUT_DIVIDER
+
+def test_split_modules_accepts_lists_and_objects():
+    listed = split_modules([
+        {"name": "api/authentication", "description": "JWT auth"},
+        {"name": "api/tasks", "description": "Tasks CRUD"},
+        "web/src",
+    ])
+    assert [name for name, _ in listed] == ["api/authentication", "api/tasks", "web/src"]
+    assert listed[0][1]["description"] == "JWT auth"
+
+    keyed = split_modules('```json\n{"api": {"routes": []}, "worker": {"queues": []}}\n```')
+    assert keyed == [("api", {"routes": []}), ("worker", {"queues": []})]
+
+    assert split_modules("no modules here") == []
+
+def test_split_modules_numbers_duplicate_names():
+    modules = split_modules([{"name": "api"}, {"name": "api"}, {"description": "unnamed"}])
+    assert [name for name, _ in modules] == ["api", "api (2)", "module_3"]
+
+def test_module_entry_picks_one_module():
+    implementations = {"api/tasks": {"code": "router = Router()"}, "web/src": {"code": "render()"}}
+    assert module_entry(implementations, "api/tasks") == {"code": "router = Router()"}
+    assert module_entry(implementations, "missing") is None
+    assert module_entry("not json", "api/tasks") is None
+
+def test_merge_module_outputs_keys_each_section_by_module():
+    merged = merge_module_outputs({
+        "api/tasks": '```json\n{"module_code": {"api/tasks": "tasks code"}, "logging": "logger.info"}\n```',
+        "web/src": {"module_code": "web code", "integration_code": {"client": "fetch()"}},
+        "worker": "plain text answer",
+    }, ("module_code", "integration_code", "error_handling", "logging"))
+
+    assert merged["module_code"] == {"api/tasks": "tasks code", "web/src": "web code", "worker": "plain text answer"}
+    assert merged["integration_code"] == {"web/src": {"client": "fetch()"}}
+    assert merged["error_handling"] == {}
+    assert merged["logging"] == {"api/tasks": "logger.info"}
+
+def test_run_single_passes_the_whole_upstream_context():
+    class Task:
+        name = "module_boilerplate_task"
+        description = "Generate detailed boilerplate code for each module"
+        context = None
+
+        def execute_sync(self, agent=None, context=None):
+            self.context = context
+            return context
+
+    task = Task()
+    run_single(task, agent=None, upstream={"code_skeleton_task": "skeleton", "code_research_task": "research"})
+    assert task.context == TASK_OUTPUT_DIVIDER.join(["skeleton", "research"])
+
+CODE_KEYS = ("module_code", "integration_code", "error_handling", "logging")
+JOBS = [("api/auth", "Implement api/auth"), ("api/tasks", "Implement api/tasks"), ("web/src", "Implement web/src")]
+
+class StubAgent:
+    role = "Code Generator"
+    copies = 0
+
+    def copy(self):
+        StubAgent.copies += 1
+        return StubAgent()
+
+class CodeTask:
+    name = "generate_code_task"
+    description = "Generate code for every module"
+    expected_output = "JSON with module_code and integration_code"
+    output = None
+    agent = StubAgent()
+
+def test_run_fanout_merges_module_outputs_in_job_order():
+    running, peak, lock = [0], [0], threading.Lock()
+    delays = {"api/auth": 0.06, "api/tasks": 0.03, "web/src": 0.0}  # later jobs finish first
+
+    def execute(subtask, agent):
+        module = subtask.name[len("generate_code_task["):-1]
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(delays[module])
+        with lock:
+            running[0] -= 1
+        return json.dumps({"module_code": f"{module} code", "integration_code": {module: f"{module} wiring"}})
+
+    task = CodeTask()
+    output = run_fanout(task, task.agent, JOBS, task.expected_output, CODE_KEYS, max_workers=3, execute=execute)
+    merged = json.loads(output.raw)
+    assert list(merged["module_code"]) == ["api/auth", "api/tasks", "web/src"]
+    assert merged["module_code"]["web/src"] == "web/src code"
+    assert merged["integration_code"]["api/tasks"] == "api/tasks wiring"
+    assert merged["error_handling"] == {} and merged["logging"] == {}
+    assert task.output is output
+    assert peak[0] == 3
+
+def test_run_fanout_raises_after_the_other_modules_finish():
+    finished = []
+
+    def execute(subtask, agent):
+        if subtask.name.endswith("[api/tasks]"):
+            raise RuntimeError("model quota exceeded")
+        time.sleep(0.02)
+        finished.append(subtask.name)
+        return json.dumps({"module_code": "code"})
+
+    task = CodeTask()
+    with pytest.raises(RuntimeError, match="quota"):
+        run_fanout(task, task.agent, JOBS, task.expected_output, CODE_KEYS, max_workers=3, execute=execute)
+    assert sorted(finished) == ["generate_code_task[api/auth]", "generate_code_task[web/src]"]
+    assert task.output is None
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,125 @@
+import time
+import pytest
+from sdlc_ai_project.hedging import hedge_requests, hedge_delay, is_failover_error
+from sdlc_ai_project.metrics import LatencyTracker, track_latency
+from sdlc_ai_project.rate_limit import TokenBucketLimiter, rate_limit
+from sdlc_ai_project.token_accounting import usage_scope
+
+class ProviderError(Exception):
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+class FakeLLM:
+    """Stands in for a provider client that answers after `delay` seconds or raises `error`."""
+
+    def __init__(self, model, delay=0.0, error=None, response=None):
+        self.model = model
+        self.delay = delay
+        self.error = error
+        self.response = f"answer from {model}" if response is None else response
+        self.calls = 0
+
+    def call(self, messages, tools=None, callbacks=None, **kwargs):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return self.response
+
+@pytest.fixture
+def tracker():
+    return LatencyTracker()
+
+def hedged(primary, backups, tracker, hedge=True):
+    object.__setattr__(primary, "latency_tracker", tracker)
+    return hedge_requests(primary, lambda: list(backups), hedge=hedge)
+
+def test_failover_errors_are_classified():
+    assert is_failover_error(ProviderError("upstream", status_code=503))
+    assert is_failover_error(ProviderError("too many requests", status_code=429))
+    assert is_failover_error(RuntimeError("RESOURCE_EXHAUSTED: quota exceeded for gemini"))
+    assert is_failover_error(TimeoutError())
+    assert not is_failover_error(ProviderError("invalid request", status_code=400))
+    assert not is_failover_error(ValueError("bad prompt"))
+
+def test_hedge_delay_follows_observed_tail_latency(tracker):
+    llm = FakeLLM("primary")
+    assert hedge_delay(llm, tracker, q=95, min_samples=5, default=30.0) == 30.0
+    for seconds in range(1, 21):
+        tracker.record("primary", float(seconds))
+    assert hedge_delay(llm, tracker, q=95, min_samples=5) == pytest.approx(19.05)
+
+def test_hedge_delay_is_kept_per_task(tracker):
+    llm = FakeLLM("primary")
+    for seconds in range(1, 11):
+        tracker.record("primary", float(seconds), task="summarize_requirements")
+        tracker.record("primary", 60.0 + seconds, task="generate_code")
+    with usage_scope(task="generate_code"):
+        assert hedge_delay(llm, tracker, q=95, min_samples=5) == pytest.approx(69.55)
+    with usage_scope(task="summarize_requirements"):
+        assert hedge_delay(llm, tracker, q=95, min_samples=5) == pytest.approx(9.55)
+    with usage_scope(task="generate_skeleton"):
+        assert hedge_delay(llm, tracker, q=95, min_samples=5, default=30.0) == 30.0
+
+def test_slow_calls_only_fail_over_without_hedging(tracker, monkeypatch):
+    monkeypatch.setattr("sdlc_ai_project.hedging.HEDGE_DEFAULT_DELAY", 0.05)
+    backup = FakeLLM("backup")
+    assert hedged(FakeLLM("primary", delay=0.2), [backup], tracker, hedge=False).call("prompt") == "answer from primary"
+    assert backup.calls == 0
+    failing = FakeLLM("primary", error=ProviderError("unavailable", status_code=503))
+    assert hedged(failing, [backup], tracker, hedge=False).call("prompt") == "answer from backup"
+
+def test_fast_primary_never_hedges(tracker):
+    backup = FakeLLM("backup")
+    assert hedged(FakeLLM("primary"), [backup], tracker).call("prompt") == "answer from primary"
+    assert backup.calls == 0
+
+def test_slow_primary_is_hedged_and_the_first_answer_wins(tracker, monkeypatch):
+    monkeypatch.setattr("sdlc_ai_project.hedging.HEDGE_DEFAULT_DELAY", 0.05)
+    primary = hedged(FakeLLM("primary", delay=1.0), [FakeLLM("backup", delay=0.01)], tracker)
+    started = time.monotonic()
+    assert primary.call("prompt") == "answer from backup"
+    assert time.monotonic() - started < 0.5
+
+def test_calls_waiting_for_their_rate_limit_are_not_hedged(tracker, tmp_path, monkeypatch):
+    monkeypatch.setattr("sdlc_ai_project.hedging.HEDGE_DEFAULT_DELAY", 0.1)
+    limiter = TokenBucketLimiter(str(tmp_path / "limits.sqlite3"), limits={"openai": {"tpm": 600}})
+    limiter.charge("openai", 600)  # Empty: a 4-token prompt waits 0.4s for the bucket to refill
+    primary = track_latency(FakeLLM("primary", delay=0.01), tracker)
+    backup = FakeLLM("backup")
+    hedged(rate_limit(primary, limiter), [backup], tracker)
+    started = time.monotonic()
+    assert primary.call("x" * 16) == "answer from primary"
+    assert time.monotonic() - started >= 0.3
+    assert backup.calls == 0
+
+def test_quota_errors_fail_over_in_order(tracker):
+    quota = FakeLLM("second", error=ProviderError("quota exceeded", status_code=429))
+    third = FakeLLM("third")
+    primary = hedged(FakeLLM("primary", error=ProviderError("bad gateway", status_code=502)), [quota, third], tracker)
+    assert primary.call("prompt") == "answer from third"
+    assert (quota.calls, third.calls) == (1, 1)
+
+def test_client_errors_are_raised_without_failover(tracker):
+    backup = FakeLLM("backup")
+    primary = hedged(FakeLLM("primary", error=ProviderError("invalid request", status_code=400)), [backup], tracker)
+    with pytest.raises(ProviderError):
+        primary.call("prompt")
+    assert backup.calls == 0
+
+def test_empty_answers_fall_through_to_the_backup(tracker):
+    primary = hedged(FakeLLM("primary", response=""), [FakeLLM("backup")], tracker)
+    assert primary.call("prompt") == "answer from backup"
+
+def test_backups_do_not_hedge_again(tracker):
+    primary = FakeLLM("primary", error=ProviderError("unavailable", status_code=503))
+    backup = FakeLLM("backup", error=ProviderError("unavailable", status_code=503))
+    hedged(primary, [backup], tracker)
+    hedged(backup, [primary], tracker)
+    with pytest.raises(ProviderError):
+        primary.call("prompt")
+    assert (primary.calls, backup.calls) == (1, 1)
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,75 @@
+import threading
+import time
+import pytest
+from sdlc_ai_project.jobs import JobManager, JobQueueFull, SUCCEEDED, FAILED, PENDING
+
+@pytest.fixture
+def manager():
+    manager = JobManager(max_workers=2, max_queued_jobs=2, max_finished_jobs=3)
+    yield manager
+    manager.shutdown(wait=True)
+
+def wait_for(job, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if job.finished:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"Job {job.id} did not finish")
+
+def test_submit_returns_before_job_finishes(manager):
+    release = threading.Event()
+    job = manager.submit("knowledge", lambda job: release.wait(5) and {"ok": True}, title="todo")
+    assert not job.finished
+    assert manager.get(job.id) is job
+
+    release.set()
+    wait_for(job)
+    assert job.status == SUCCEEDED
+    assert job.result == {"ok": True}
+    assert job.to_dict()["title"] == "todo"
+
+def test_failed_job_records_error(manager):
+    def boom(job):
+        raise KeyError("task_generation_task")
+
+    job = wait_for(manager.submit("architecture", boom))
+    assert job.status == FAILED
+    assert "task_generation_task" in job.error
+
+def test_job_publishes_status_and_task_events(manager):
+    def run(job):
+        job.publish("task_output", {"task": "research_similar_projects", "output": {"projects": []}})
+        return {}
+
+    job = wait_for(manager.submit("knowledge", run))
+    events = job.events_since(0)
+    assert [e["event"] for e in events] == ["status", "task_output", "status"]
+    assert events[-1]["data"]["status"] == SUCCEEDED
+    assert [e["id"] for e in job.events_since(1)] == [1, 2]
+
+def test_queue_is_bounded(manager):
+    release = threading.Event()
+    running = [manager.submit("busy", lambda job: release.wait(5)) for _ in range(2)]
+    # Give the workers a moment to pick up the first two jobs
+    for _ in range(100):
+        if all(job.status != PENDING for job in running):
+            break
+        time.sleep(0.01)
+    queued = [manager.submit("queued", lambda job: release.wait(5)) for _ in range(2)]
+
+    with pytest.raises(JobQueueFull):
+        manager.submit("overflow", lambda job: None)
+
+    release.set()
+    for job in running + queued:
+        wait_for(job)
+
+def test_finished_jobs_are_evicted(manager):
+    jobs = [wait_for(manager.submit("quick", lambda job: None)) for _ in range(5)]
+    manager.submit("trigger", lambda job: None)
+    assert manager.get(jobs[0].id) is None
+    assert manager.get(jobs[-1].id) is not None
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,87 @@
+import os
+import pytest
+from sdlc_ai_project.llm_cache import ResponseCache, cache_responses, cache_bypass, cache_key
+from sdlc_ai_project.token_accounting import TokenLedger, track_usage
+
+class FakeLLM:
+    """Stands in for a crewai LLM, answering with a numbered response per real call."""
+
+    def __init__(self, model="gemini/gemini-1.5-flash", temperature=None):
+        self.model = model
+        self.temperature = temperature
+        self.calls = 0
+
+    def copy(self):
+        clone = object.__new__(type(self))
+        clone.__dict__.update(self.__dict__)
+        return clone
+
+    def call(self, messages, tools=None, callbacks=None, **kwargs):
+        self.calls += 1
+        return f"response {self.calls}"
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResponseCache(str(tmp_path / "llm"), max_bytes=10_000)
+
+def messages(text):
+    return [{"role": "user", "content": text}]
+
+def test_identical_calls_are_served_from_cache(cache):
+    llm = cache_responses(FakeLLM(), cache)
+    assert llm.call(messages("design a todo app")) == "response 1"
+    assert llm.call(messages("design a todo app")) == "response 1"
+    assert llm.call(messages("design a chat app")) == "response 2"
+    # Copies crewai makes per agent share the cache
+    assert llm.copy().call(messages("design a chat app")) == "response 2"
+    assert llm.calls == 2
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["writes"], stats["entries"]) == (2, 2, 2, 2)
+
+def test_sampling_parameters_are_part_of_the_key(cache):
+    cold = cache_responses(FakeLLM(temperature=0.0), cache)
+    warm = cache_responses(FakeLLM(temperature=0.7), cache)
+    cold.call(messages("same prompt"))
+    assert warm.call(messages("same prompt")) == "response 1"
+    assert warm.calls == 1
+    assert cache_key("m", messages("x"), {"temperature": 0.0}) != cache_key("m", messages("x"), {"temperature": 0.7})
+
+def test_bypass_skips_reads_but_refreshes_entries(cache):
+    llm = cache_responses(FakeLLM(), cache)
+    llm.call(messages("prompt"))
+    with cache_bypass():
+        assert llm.call(messages("prompt")) == "response 2"
+    assert llm.call(messages("prompt")) == "response 2"
+    assert cache.stats()["bypassed"] == 1
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ResponseCache(str(tmp_path / "llm"), max_bytes=10_000)
+    for key in ("a" * 64, "b" * 64, "c" * 64):
+        cache.put(key, "x" * 3_000)
+    assert cache.get("a" * 64) is not None  # a is now the most recently used
+    cache.put("d" * 64, "x" * 3_000)
+
+    assert cache.get("b" * 64) is None
+    assert cache.get("a" * 64) is not None
+    assert cache.stats()["evictions"] == 1
+    leftovers = [name for _, _, files in os.walk(tmp_path) for name in files if not name.endswith(".json")]
+    assert leftovers == []
+
+    # The index and its LRU order are rebuilt from disk
+    reopened = ResponseCache(str(tmp_path / "llm"), max_bytes=10_000)
+    assert reopened.stats()["entries"] == 3
+
+def test_cache_hits_are_recorded_as_free_calls(cache, tmp_path):
+    ledger = TokenLedger(str(tmp_path / "token_usage.jsonl"))
+    llm = track_usage(cache_responses(FakeLLM(), cache), ledger)
+    llm.call(messages("a" * 400))
+    llm.call(messages("a" * 400))
+
+    first, second = ledger.entries()
+    assert first["usage_source"] == "estimate"
+    assert second["usage_source"] == "cache"
+    assert second["total_tokens"] == 0
+    assert second["prompt_tokens_estimate"] == first["prompt_tokens_estimate"]
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,54 @@
+import pytest
+from sdlc_ai_project import llms
+from sdlc_ai_project.llms import LLMRegistry, load_definitions
+
+@pytest.fixture
+def registry():
+    return LLMRegistry({
+        "router": {"model": "openrouter/deepseek/deepseek-r1", "base_url": "https://openrouter.ai/api/v1",
+                   "api_key_env": "TEST_ROUTER_KEY"},
+    })
+
+def test_llms_are_built_once_on_first_use(registry, monkeypatch):
+    monkeypatch.setenv("TEST_ROUTER_KEY", "sk-test")
+    built = []
+    original = registry.build
+    monkeypatch.setattr(registry, "build", lambda name: built.append(name) or original(name))
+    first = registry.get("router")
+    assert registry.get("router") is first
+    assert built == ["router"]
+    assert "tracked" in type(first).call_middlewares
+
+def test_missing_keys_fail_only_the_llm_that_needs_them(registry, monkeypatch):
+    monkeypatch.delenv("TEST_ROUTER_KEY", raising=False)
+    with pytest.raises(KeyError, match="TEST_ROUTER_KEY"):
+        registry.get("router")
+    with pytest.raises(KeyError, match="Unknown LLM"):
+        registry.get("missing")
+
+def test_definitions_merge_yaml_and_env_overrides(tmp_path, monkeypatch):
+    config = tmp_path / "llms.yaml"
+    config.write_text(
+        "llms:\n"
+        "  gemini:\n"
+        "    model: gemini/gemini-1.5-pro\n"
+        "  local:\n"
+        "    model: ollama/llama3\n"
+        "    base_url: http://localhost:11434\n"
+    )
+    monkeypatch.setenv("LLM_LLAMA_TEMPERATURE", "0.2")
+    definitions = load_definitions(str(config))
+    assert definitions["gemini"]["model"] == "gemini/gemini-1.5-pro"
+    assert definitions["gemini"]["api_key_env"] == "GEMINI_API_KEY"
+    assert definitions["local"]["base_url"] == "http://localhost:11434"
+    assert definitions["llama"]["temperature"] == 0.2
+
+def test_legacy_names_resolve_through_the_registry(monkeypatch):
+    sentinel = object()
+    monkeypatch.setattr(llms, "get_llm", lambda name: (name, sentinel))
+    assert llms.deepseek_llm == ("deepseek", sentinel)
+    with pytest.raises(AttributeError):
+        llms.unknown_llm
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,76 @@
+import json
+import time
+import pytest
+from fastapi.testclient import TestClient
+from sdlc_ai_project import main
+from sdlc_ai_project.jobs import JobManager, FINISHED_STATES, SUCCEEDED
+
+REQUEST = {"user_requirements": "A todo app with due dates", "project_context": "Small team", "title": "todo"}
+
+def fake_run_stage(stage_name, user_requirements, project_context, upstream, llm, title,
+                   on_task_output=None, collect=None, resume=False):
+    """Stands in for a crew: one task whose output names the stage and the upstream stages it received."""
+    output = {"stage": stage_name, "upstream": sorted(upstream)}
+    if on_task_output is not None:
+        on_task_output(f"{stage_name.lower()}_task", output)
+    return {f"{stage_name.lower()}_task": output}
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    manager = JobManager(max_workers=2)
+    monkeypatch.setattr(main, "job_manager", manager)
+    monkeypatch.setattr(main, "SSE_POLL_SECONDS", 0.01)
+    monkeypatch.setattr("sdlc_ai_project.pipeline.run_stage", fake_run_stage)
+    yield TestClient(main.app)
+    manager.shutdown(wait=True)
+
+def wait_for(client, job_id, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = client.get(f"/jobs/{job_id}").json()
+        if status["status"] in FINISHED_STATES:
+            return status
+        time.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+def parse_events(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.split("\n") if not line.startswith(":"))
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+def test_the_pipeline_returns_a_job_handle(client):
+    response = client.post("/pipeline", json=REQUEST)
+    assert response.status_code == 202
+    handle = response.json()
+    assert handle["kind"] == "pipeline" and handle["title"] == "todo"
+    assert wait_for(client, handle["job_id"])["status"] == SUCCEEDED
+
+def test_stage_results_are_fetched_one_at_a_time(client):
+    job_id = client.post("/pipeline", json=REQUEST).json()["job_id"]
+    wait_for(client, job_id)
+    result = client.get(f"/jobs/{job_id}/result").json()
+    assert sorted(result) == ["Architecture", "Generator", "Knowledge", "Requirements", "Skeletons"]
+    architecture = client.get(f"/jobs/{job_id}/result", params={"stage": "Architecture"})
+    assert architecture.json() == {"architecture_task": {"stage": "Architecture", "upstream": ["Knowledge", "Requirements"]}}
+    assert client.get(f"/jobs/{job_id}/result", params={"stage": "Deployment"}).status_code == 404
+    assert client.get("/jobs/unknown/result").status_code == 404
+
+def test_the_event_stream_ends_when_the_job_finishes(client):
+    job_id = client.post("/pipeline", json=REQUEST).json()["job_id"]
+    with client.stream("GET", f"/jobs/{job_id}/events") as response:
+        assert response.headers["content-type"].startswith("text/event-stream")
+        body = "".join(response.iter_text())
+    events = parse_events(body)
+    assert {data["stage"] for event, data in events if event == "stage_started"} == {
+        "Knowledge", "Requirements", "Architecture", "Skeletons", "Generator",
+    }
+    outputs = [data for event, data in events if event == "task_output"]
+    assert {(data["stage"], data["task"]) for data in outputs} >= {("Generator", "generator_task")}
+    assert events[-1] == ("status", client.get(f"/jobs/{job_id}").json())
+    assert events[-1][1]["status"] == SUCCEEDED
+
+if __name__ == "__main__":
+    pytest.main([__file__])
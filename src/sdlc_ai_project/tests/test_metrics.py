@@ -0,0 +1,42 @@
+import pytest
+from sdlc_ai_project.metrics import LatencyTracker, percentile, track_latency
+
+class FakeLLM:
+    def __init__(self, model="gemini/gemini-1.5-flash", fail=False):
+        self.model = model
+        self.fail = fail
+
+    def call(self, messages, tools=None, callbacks=None, **kwargs):
+        if self.fail:
+            raise RuntimeError("503 Service Unavailable")
+        return "word " * 40
+
+def test_percentile_interpolates():
+    assert percentile([], 50) is None
+    assert percentile([4, 1, 3, 2], 50) == pytest.approx(2.5)
+    assert percentile([1, 2, 3, 4, 5], 100) == 5
+
+def test_tracker_keeps_a_window_per_model():
+    tracker = LatencyTracker(window=3)
+    for seconds in (1.0, 2.0, 3.0, 10.0):
+        tracker.record("model", seconds, output_tokens=100)
+    assert tracker.count("model") == 3
+    assert tracker.percentile("model", 0) == 2.0
+    assert tracker.throughput("model") == pytest.approx(100 / 3.0)
+    assert tracker.percentile("other", 50) is None
+
+def test_track_latency_records_calls_and_errors():
+    tracker = LatencyTracker()
+    llm = track_latency(FakeLLM(), tracker)
+    llm.call([{"role": "user", "content": "hi"}])
+    failing = track_latency(FakeLLM(model="flaky", fail=True), tracker)
+    with pytest.raises(RuntimeError):
+        failing.call("hi")
+    snapshot = tracker.snapshot()
+    assert snapshot["gemini/gemini-1.5-flash"]["calls"] == 1
+    assert snapshot["gemini/gemini-1.5-flash"]["tokens_per_second"] > 0
+    assert snapshot["flaky"] == {"calls": 0, "errors": 1, "p50_seconds": None, "p95_seconds": None,
+                                 "tokens_per_second": None}
+
+if __name__ == "__main__":
+    pytest.main([__file__])
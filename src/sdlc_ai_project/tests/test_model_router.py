@@ -0,0 +1,98 @@
+import pytest
+from types import SimpleNamespace
+from sdlc_ai_project.llms import LLMRegistry
+from sdlc_ai_project.metrics import LatencyTracker
+from sdlc_ai_project.model_router import ModelRouter, TaskRoutes, routing_runner, with_model_routing
+from sdlc_ai_project.task_graph import TaskReuse, task_fingerprint
+
+class FakeRegistry(LLMRegistry):
+    """Registry whose clients are plain objects, so no provider SDK or key is needed."""
+
+    def build(self, name):
+        return SimpleNamespace(model=self.definitions[name]["model"])
+
+class FakeAgent:
+    def __init__(self, llm=None):
+        self.llm = llm
+
+    def copy(self):
+        return FakeAgent(self.llm)
+
+@pytest.fixture
+def registry():
+    return FakeRegistry({
+        "flash": {"model": "flash", "context_window": 1_000_000, "max_output_tokens": 8_192,
+                  "input_cost": 0.075, "output_cost": 0.30, "latency": 1.0, "throughput": 150},
+        "long": {"model": "long", "context_window": 164_000, "max_output_tokens": 164_000,
+                 "input_cost": 0.0, "output_cost": 0.0, "latency": 13.0, "throughput": 100},
+        "small": {"model": "small", "context_window": 8_192, "max_output_tokens": 4_096,
+                  "input_cost": 0.0, "output_cost": 0.0, "latency": 1.5, "throughput": 40},
+        "unkeyed": {"model": "unkeyed", "api_key_env": "ROUTER_TEST_MISSING_KEY"},
+    })
+
+@pytest.fixture
+def tracker():
+    return LatencyTracker()
+
+def test_light_tasks_trade_token_cost_against_latency(registry, tracker):
+    free = ModelRouter(registry, tracker, models=("flash", "small"), second_cost=0.0).route("extraction_task", 2_000)
+    assert (free.name, free.task_class, free.output_tokens) == ("small", "light", 1_500)
+    assert ModelRouter(registry, tracker, models=("flash", "small")).route("extraction_task", 2_000).name == "flash"
+
+def test_generation_tasks_skip_models_whose_output_limit_is_too_small(registry, tracker):
+    assert ModelRouter(registry, tracker).route("generate_code_task", 30_000).name == "flash"
+    assert ModelRouter(registry, tracker, second_cost=1.0).route("generate_code_task", 30_000).name == "flash"
+    assert ModelRouter(registry, tracker, second_cost=0.0).route("generate_code_task", 30_000).name == "long"
+
+def test_huge_prompts_only_fit_large_context_windows(registry, tracker):
+    router = ModelRouter(registry, tracker, models=("long", "small"))
+    assert router.route("component_diagram_task", 120_000).name == "long"
+    fallback = router.route("component_diagram_task", 500_000)
+    assert fallback.name == "long" and "no model fits" in fallback.reason
+    assert ModelRouter(registry, tracker, models=("unkeyed",)).route("extraction_task", 10) is None
+
+def test_observed_throughput_replaces_the_profile(registry, tracker):
+    router = ModelRouter(registry, tracker, models=("flash", "small"), second_cost=0.00001, min_samples=2)
+    assert router.route("extraction_task", 1_000).name == "small"
+    registry.get("small")
+    for _ in range(2):
+        tracker.record("small", seconds=150.0, output_tokens=1_500)  # 10 tokens/s observed
+    assert router.expected_seconds("small", 1_500) == pytest.approx(150.0)
+    assert router.route("extraction_task", 1_000).name == "flash"
+
+def test_routing_runner_executes_on_a_copy_of_the_agent(registry, tracker, capsys):
+    router = ModelRouter(registry, tracker, models=("small",))
+    agent = FakeAgent(llm=object())
+    seen = []
+    runner = routing_runner(lambda task, routed, upstream: seen.append(routed), router)
+    task = SimpleNamespace(name="validate_code_task", description="Validate the code")
+    runner(task, agent, {"generate_code_task": "print('hi')"})
+    runner(task, agent, {})
+    assert seen[0] is not agent and seen[0].llm is registry.get("small")
+    assert agent.llm is not registry.get("small")
+    assert "validate_code_task: routed to small" in capsys.readouterr().out
+
+def test_routed_tasks_are_fingerprinted_with_the_model_they_run_on(registry, tracker):
+    routes = TaskRoutes(ModelRouter(registry, tracker, models=("small",)))
+    task = SimpleNamespace(name="validate_code_task", description="Validate the code", expected_output="JSON",
+                           agent=FakeAgent(llm=SimpleNamespace(model="default")))
+    assert routes.model(task, ["print('hi')"]) == "small"
+
+    routed, unrouted = TaskReuse(model_of=routes.model), TaskReuse()
+    routed.resolve(task, ["print('hi')"])
+    unrouted.resolve(task, ["print('hi')"])
+    assert routed.fingerprints[task.name] == task_fingerprint(task, ["print('hi')"], "small")
+    assert routed.fingerprints[task.name] != unrouted.fingerprints[task.name]
+
+    seen = []
+    routing_runner(lambda task, agent, upstream: seen.append(agent.llm), routes=routes)(task, task.agent, {})
+    assert seen == [registry.get("small")]  # The route chosen for the fingerprint, not a fresh one
+
+def test_every_task_is_wrapped(registry, tracker):
+    fanout = lambda task, agent, upstream: None
+    runners = with_model_routing({"generate_code_task": fanout}, ("generate_code_task", "validate_code_task"))
+    assert set(runners) == {"generate_code_task", "validate_code_task"}
+    assert runners["generate_code_task"] is not fanout
+
+if __name__ == "__main__":
+    pytest.main([__file__])
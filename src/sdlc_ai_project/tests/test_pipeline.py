@@ -0,0 +1,58 @@
+import json
+import pytest
+from sdlc_ai_project import pipeline
+from sdlc_ai_project.pipeline import StageRejected, run_pipeline, run_stage
+
+KNOWLEDGE_TASKS = pipeline.STAGES_BY_NAME["Knowledge"].tasks
+
+@pytest.fixture(autouse=True)
+def workspace(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(pipeline, "MODEL_ROUTING", False)
+    monkeypatch.setattr(pipeline, "SEMANTIC_CACHE", False)
+    monkeypatch.setattr(pipeline.Stage, "build_crew", lambda stage, inputs, llm: {"stage": stage.name, "inputs": inputs})
+    return tmp_path
+
+def collect_every_task(crew, on_task_output, reuse, task_runners):
+    """Stands in for the crew run: each task answers with its name."""
+    output = {}
+    for task_name in pipeline.STAGES_BY_NAME[crew["stage"]].tasks:
+        output[task_name] = {"answer": task_name}
+        on_task_output(task_name, output[task_name])
+    return output
+
+def test_a_stage_saves_its_output_and_every_task(workspace):
+    finished = []
+    output = run_stage("Knowledge", "A todo app", "Small team", {}, object(), "todo",
+                       lambda task_name, task_output: finished.append(task_name), collect=collect_every_task)
+    assert list(output) == list(KNOWLEDGE_TASKS) and finished == list(KNOWLEDGE_TASKS)
+    with open(workspace / "todo" / "Knowledge.json") as f:
+        assert json.load(f) == output
+    assert sorted(path.stem for path in (workspace / "todo" / "checkpoints" / "Knowledge").iterdir()) == sorted(KNOWLEDGE_TASKS)
+
+def test_a_rejected_stage_raises(workspace):
+    with pytest.raises(StageRejected):
+        run_stage("Knowledge", "A todo app", "Small team", {}, object(), "todo", collect=lambda *args: None)
+    assert not (workspace / "todo" / "Knowledge.json").exists()
+
+def test_the_pipeline_hands_each_stage_its_upstream_outputs(monkeypatch):
+    received = {}
+
+    def fake_run_stage(stage_name, user_requirements, project_context, upstream, llm, title,
+                       on_task_output=None, collect=None, resume=False):
+        received[stage_name] = upstream
+        on_task_output("only_task", stage_name)
+        return {"only_task": stage_name}
+
+    monkeypatch.setattr(pipeline, "run_stage", fake_run_stage)
+    started, outputs = [], []
+    result = run_pipeline("A todo app", "Small team", None, "todo", on_stage_start=started.append,
+                          on_task_output=lambda stage, task, output: outputs.append((stage, task, output)))
+    assert sorted(result) == sorted(stage.name for stage in pipeline.STAGES)
+    assert received["Architecture"] == {"Requirements": {"only_task": "Requirements"}, "Knowledge": {"only_task": "Knowledge"}}
+    assert sorted(received["Generator"]) == ["Architecture", "Skeletons"]
+    assert started.index("Architecture") > max(started.index("Knowledge"), started.index("Requirements"))
+    assert sorted(outputs) == sorted((stage.name, "only_task", stage.name) for stage in pipeline.STAGES)
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,54 @@
+import json
+import pytest
+from sdlc_ai_project.prompt_assembly import dedupe_context_blocks, summarized_context
+
+class FakeTask:
+    def __init__(self, name, context=None):
+        self.name = name
+        self.context = context
+
+@pytest.fixture
+def component_specifications():
+    return {"api": {"responsibility": "Serves the REST endpoints for tasks and projects " * 5}}
+
+def test_content_in_the_description_is_sent_once(component_specifications):
+    description = f"Based on the architecture design: {{'component_diagram_task': {component_specifications}}}"
+    upstream = {"component_diagram_task": json.dumps({
+        "component_specifications": component_specifications, "component_diagram": "graph TD; api-->db",
+    }, indent=2)}
+
+    [block] = dedupe_context_blocks(description, upstream, min_chars=100)
+    assert json.loads(block) == {
+        "component_specifications": "[same as the task description]", "component_diagram": "graph TD; api-->db",
+    }
+
+def test_repeated_upstream_content_refers_to_first_occurrence(component_specifications):
+    upstream = {
+        "component_diagram_task": json.dumps({"component_specifications": component_specifications}),
+        "architecture_blueprint_task": "```json\n" + json.dumps({"components": component_specifications}) + "\n```",
+        "system_research_task": "Plain text research " * 20,
+        "architecture_validation_task": "Plain text research " * 20,
+    }
+    blocks = dedupe_context_blocks("Validate the architecture", upstream, min_chars=100)
+
+    assert blocks[0] == upstream["component_diagram_task"]
+    assert json.loads(blocks[1]) == {"components": "[same as component_diagram_task.component_specifications]"}
+    assert blocks[2] == upstream["system_research_task"]
+    assert blocks[3] == "[same as system_research_task]"
+
+def test_small_or_unique_blocks_pass_through_verbatim():
+    upstream = {"research": '{"name": "TodoMVC"}', "docs": '{"name": "TodoMVC"}'}
+    assert dedupe_context_blocks("", upstream) == list(upstream.values())
+
+def test_summarized_context_finds_transitive_inputs():
+    research = FakeTask("system_research_task")
+    flowchart = FakeTask("system_flowchart_task", context=[research])
+    diagram = FakeTask("component_diagram_task", context=[flowchart, research])
+    blueprint = FakeTask("architecture_blueprint_task", context=[flowchart, diagram, research])
+
+    assert summarized_context(blueprint) == {"system_flowchart_task", "system_research_task"}
+    assert summarized_context(diagram) == {"system_research_task"}
+    assert summarized_context(research) == set()
+
+if __name__ == "__main__":
+    pytest.main([__file__])
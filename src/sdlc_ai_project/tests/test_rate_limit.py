@@ -0,0 +1,104 @@
+import time
+import asyncio
+import threading
+import pytest
+from sdlc_ai_project.concurrency import get_controller
+from sdlc_ai_project.rate_limit import TokenBucketLimiter, provider_limits, rate_limit, search_slot
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "rate_limits.sqlite3")
+
+class FakeLLM:
+    """Built the way crewai's native router builds clients: prefix stripped, provider kept apart."""
+
+    def __init__(self, model="gemini-1.5-flash", provider="gemini"):
+        self.model = model
+        self.provider = provider
+        self.calls = 0
+
+    def call(self, messages, tools=None, callbacks=None, **kwargs):
+        self.calls += 1
+        return "word " * 100
+
+def test_limits_come_from_defaults_and_env(monkeypatch):
+    assert provider_limits("gemini") == {"rpm": 2, "tpm": 32_000, "rpd": 50}
+    monkeypatch.setenv("RATE_LIMIT_GEMINI_RPM", "15")
+    monkeypatch.setenv("RATE_LIMIT_GEMINI_RPD", "0")
+    assert provider_limits("gemini") == {"rpm": 15, "tpm": 32_000}
+    assert provider_limits("unknown") == {}
+
+def test_requests_beyond_the_bucket_report_the_wait(db_path):
+    limiter = TokenBucketLimiter(db_path, {"gemini": {"rpm": 2}})
+    assert limiter.try_acquire("gemini") == 0
+    assert limiter.try_acquire("gemini") == 0
+    assert limiter.try_acquire("gemini") == pytest.approx(30, abs=0.5)
+    # Unlimited providers never wait
+    assert limiter.try_acquire("openai") == 0
+
+def test_token_buckets_are_all_or_nothing(db_path):
+    limiter = TokenBucketLimiter(db_path, {"gemini": {"rpm": 10, "tpm": 1_000}})
+    assert limiter.try_acquire("gemini", tokens=800) == 0
+    assert limiter.try_acquire("gemini", tokens=800) > 0
+    # The refused request took no request slot either
+    assert limiter.state()["buckets"]["gemini:rpm"]["available"] == pytest.approx(9, abs=0.1)
+    limiter.charge("gemini", 500)
+    assert limiter.state()["buckets"]["gemini:tpm"]["available"] < 0
+
+def test_processes_sharing_the_database_share_the_buckets(db_path):
+    first = TokenBucketLimiter(db_path, {"search": {"rpm": 3}})
+    second = TokenBucketLimiter(db_path, {"search": {"rpm": 3}})
+    assert [first.try_acquire("search"), second.try_acquire("search"), first.try_acquire("search")] == [0, 0, 0]
+    assert second.try_acquire("search") > 0
+
+def test_concurrent_threads_never_overrun(db_path):
+    limiter = TokenBucketLimiter(db_path, {"search": {"rpm": 5}})
+    granted = []
+
+    def worker():
+        if limiter.try_acquire("search") == 0:
+            granted.append(1)
+
+    threads = [threading.Thread(target=worker) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(granted) == 5
+
+def test_acquire_sleeps_until_a_slot_frees(db_path):
+    limiter = TokenBucketLimiter(db_path, {"fast": {"rpm": 600}})  # one slot every 0.1s
+    while limiter.try_acquire("fast") == 0:
+        pass
+    assert 0 < limiter.acquire("fast") <= 0.2
+    with pytest.raises(TimeoutError):
+        limiter.acquire("fast", timeout=0.01)
+    assert asyncio.run(limiter.acquire_async("fast")) > 0
+
+def test_rate_limited_llm_waits_and_charges_the_response(db_path):
+    limiter = TokenBucketLimiter(db_path, {"gemini": {"rpm": 60, "tpm": 10_000}})
+    llm = rate_limit(FakeLLM(), limiter)
+    llm.call([{"role": "user", "content": "design a todo app"}])
+    available = limiter.state()["buckets"]["gemini:tpm"]["available"]
+    assert 9_850 < available < 9_950  # the prompt and ~100 response tokens
+
+def test_calls_that_would_wait_too_long_fail_instead(db_path):
+    limiter = TokenBucketLimiter(db_path, {"gemini": {"rpm": 1}})
+    llm = rate_limit(FakeLLM(), limiter, max_wait=5)
+    llm.call("design a todo app")
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        llm.call("design a todo app")  # The next slot is a minute away
+    assert time.monotonic() - started < 1
+    assert llm.calls == 1
+
+def test_search_slots_take_a_request_and_a_concurrency_slot(db_path):
+    limiter = TokenBucketLimiter(db_path, {"search": {"rpm": 1}})
+    with search_slot(limiter):
+        assert get_controller("search").snapshot()["in_flight"] == 1
+    with pytest.raises(TimeoutError):
+        with search_slot(limiter, timeout=1):
+            pass
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,78 @@
+import pytest
+from sdlc_ai_project.embeddings import get_embedder
+from sdlc_ai_project.retrieval import BM25Index, HybridRetriever, tokenize_code
+from sdlc_ai_project.vector_store import NumpyVectorStore
+
+CHUNKS = {
+    "users.py:1": "def getUserById(user_id):\n    return db.query(User).filter(User.id == user_id).first()",
+    "users.py:20": "def delete_user(user_id):\n    session.delete(get_user(user_id))\n    session.commit()",
+    "tasks.py:1": "class TaskRepository:\n    def list_open_tasks(self, owner):\n        return [t for t in self.tasks if not t.done]",
+    "auth.py:1": "def create_access_token(subject, expires_delta):\n    return jwt.encode({'sub': subject}, SECRET_KEY)",
+    "README.md:1": "A task manager with user accounts, due dates and reminders",
+}
+
+class CountingEmbedder:
+    def __init__(self):
+        self.embedder = get_embedder("hashing")
+        self.calls = 0
+
+    def __call__(self, texts):
+        self.calls += 1
+        return self.embedder.embed(texts)
+
+@pytest.fixture
+def embed():
+    return CountingEmbedder()
+
+@pytest.fixture
+def retriever(tmp_path, embed):
+    retriever = HybridRetriever(NumpyVectorStore("chunks", str(tmp_path)))
+    ids = list(CHUNKS)
+    retriever.add(ids, embed.embedder.embed([CHUNKS[i] for i in ids]), [CHUNKS[i] for i in ids],
+                  [{"repo": "todo", "path": i.split(":")[0]} for i in ids])
+    return retriever
+
+def test_identifiers_are_split_into_their_parts():
+    assert tokenize_code("getUserById(user_id)") == ["getuserbyid", "get", "user", "by", "id", "user_id", "user", "id"]
+    assert tokenize_code("HTTPServer") == ["httpserver", "http", "server"]
+    assert tokenize_code("Tasks are done") == ["tasks", "are", "done"]
+
+def test_bm25_prefers_rare_terms_and_handles_updates():
+    index = BM25Index()
+    for chunk_id, document in CHUNKS.items():
+        index.add(chunk_id, document, {})
+    assert index.search("create_access_token", 1)[0][0] == "auth.py:1"
+    index.add("auth.py:1", "def refresh_token(token): pass", {})
+    assert index.search("jwt", 5) == []
+    index.delete(["auth.py:1"])
+    assert "auth.py:1" not in [chunk_id for chunk_id, _ in index.search("token", 5)]
+    assert len(index) == len(CHUNKS) - 1
+
+def test_exact_identifier_lookups_skip_the_query_embedding(retriever, embed):
+    hits = retriever.search("getUserById", embed, k=1)
+    assert hits[0]["id"] == "users.py:1"
+    assert embed.calls == 0 and retriever.counts["embeddings_skipped"] == 1
+
+def test_ambiguous_queries_fuse_bm25_and_vector_scores(retriever, embed):
+    hits = retriever.search("delete a user and commit the session", embed, k=3)
+    assert hits[0]["id"] == "users.py:20"
+    assert all(hit["vector"] is not None for hit in hits)
+    assert hits[0]["score"] == pytest.approx(0.5 * hits[0]["vector"] + 0.5 * hits[0]["bm25"])
+    retriever.search("delete a user and commit the session", embed, k=3)
+    assert embed.calls == 1 and retriever.counts["embeddings_cached"] == 1
+
+def test_queries_without_lexical_matches_fall_back_to_vectors(retriever, embed):
+    hits = retriever.search("reminderz", embed, k=1)
+    assert hits[0]["id"] == "README.md:1" and hits[0]["bm25"] == 0
+
+def test_filters_apply_to_both_stages(retriever, embed):
+    hits = retriever.search("user", embed, k=5, where={"path": "users.py"})
+    assert {hit["metadata"]["path"] for hit in hits} == {"users.py"}
+
+def test_the_index_is_rebuilt_from_the_store(tmp_path, retriever, embed):
+    reopened = HybridRetriever(NumpyVectorStore("chunks", str(tmp_path)))
+    assert reopened.search("TaskRepository", embed, k=1)[0]["id"] == "tasks.py:1"
+    assert len(reopened.bm25()) == len(CHUNKS)
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,63 @@
+import threading
+import time
+import pytest
+from sdlc_ai_project.scheduler import run_dependency_graph, topological_order
+
+SDLC_GRAPH = {
+    "Knowledge": (),
+    "Requirements": (),
+    "Architecture": ("Requirements", "Knowledge"),
+    "Skeletons": ("Architecture",),
+    "Generator": ("Architecture", "Skeletons"),
+}
+
+def test_topological_order_keeps_declared_order():
+    assert topological_order(SDLC_GRAPH) == ["Knowledge", "Requirements", "Architecture", "Skeletons", "Generator"]
+
+def test_topological_order_rejects_cycles_and_unknown_nodes():
+    with pytest.raises(ValueError):
+        topological_order({"a": ("b",), "b": ("a",)})
+    with pytest.raises(ValueError):
+        topological_order({"a": ("missing",)})
+
+def test_independent_stages_run_concurrently():
+    both_started = threading.Barrier(2, timeout=5)
+
+    def run(name, upstream):
+        if name in ("Knowledge", "Requirements"):
+            # Fails with BrokenBarrierError unless both stages are running at once
+            both_started.wait()
+        return {"name": name, "upstream": sorted(upstream)}
+
+    results = run_dependency_graph(SDLC_GRAPH, run, max_workers=2)
+    assert list(results) == list(SDLC_GRAPH)
+    assert results["Architecture"]["upstream"] == ["Knowledge", "Requirements"]
+    assert results["Generator"]["upstream"] == ["Architecture", "Skeletons"]
+
+def test_downstream_starts_when_its_inputs_are_ready():
+    started = {}
+
+    def run(name, upstream):
+        started[name] = time.time()
+        if name == "slow":
+            time.sleep(0.3)
+        return name
+
+    run_dependency_graph({"fast": (), "slow": (), "after_fast": ("fast",)}, run, max_workers=3)
+    assert started["after_fast"] - started["slow"] < 0.2
+
+def test_failure_stops_dependents():
+    calls = []
+
+    def run(name, upstream):
+        calls.append(name)
+        if name == "Requirements":
+            raise RuntimeError("rejected")
+        return name
+
+    with pytest.raises(RuntimeError):
+        run_dependency_graph(SDLC_GRAPH, run, max_workers=2)
+    assert "Architecture" not in calls
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,132 @@
+import re
+import pytest
+from types import SimpleNamespace
+from sdlc_ai_project.embeddings import HashingEmbedder
+from sdlc_ai_project.semantic_cache import SemanticCache, prompt_text, semantic_runner, with_semantic_cache
+from sdlc_ai_project.llm_cache import cache_bypass
+
+class FakeTask:
+    """Stands in for a crewai Task, answering with a numbered output per real execution."""
+
+    def __init__(self, name="research_similar_projects"):
+        self.name = name
+        self.description = "Research similar open-source projects"
+        self.expected_output = "JSON list of similar projects"
+        self.context = None
+        self.agent = SimpleNamespace(role="Knowledge Base Researcher")
+        self.output = None
+        self.runs = 0
+
+    def execute_sync(self, agent=None, context=None):
+        self.runs += 1
+        return SimpleNamespace(raw=f"output {self.runs}")
+
+class SynonymEmbedder:
+    """Stands in for a sentence-transformers model: paraphrases are mapped to the same words first."""
+
+    name = "synonyms"
+    SYNONYMS = {"todo": "task", "manager": "app", "login": "user authentication"}
+
+    def __init__(self):
+        self.hashing = HashingEmbedder()
+
+    def embed(self, texts):
+        canonical = [re.sub(r"[a-z]+", lambda word: self.SYNONYMS.get(word.group(), word.group()), text.lower())
+                     for text in texts]
+        return self.hashing.embed(canonical)
+
+@pytest.fixture
+def cache(tmp_path):
+    return SemanticCache(str(tmp_path / "semantic.jsonl"), threshold=0.9, embedder=SynonymEmbedder())
+
+REQUIREMENTS = {
+    "user_requirements": "A todo list web app where users sign up, log in and manage tasks with due dates.",
+    "project_context": "Small team productivity tool",
+}
+
+def test_hashing_embedder_scores_near_duplicates_above_unrelated_text():
+    embedder = HashingEmbedder()
+    todo, todo_again, compiler = embedder.embed([
+        "A todo list web app where users sign up, log in and manage tasks with due dates.",
+        "A todo-list web application where users sign up, log in and manage their tasks with due dates",
+        "An optimizing compiler backend for a statically typed functional language.",
+    ])
+    assert float(todo @ todo_again) > 0.8
+    assert float(todo @ compiler) < 0.3
+
+def test_similar_prompts_reuse_outputs(cache):
+    task = FakeTask()
+    runner = semantic_runner(REQUIREMENTS, cache=cache)
+    assert runner(task, None, {}).raw == "output 1"
+
+    reworded = dict(REQUIREMENTS, user_requirements=REQUIREMENTS["user_requirements"].replace("manage", "organize"))
+    assert semantic_runner(reworded, cache=cache)(task, None, {}).raw == "output 1"
+    assert task.runs == 1
+    assert task.output.agent == "Knowledge Base Researcher"
+
+    different = {"user_requirements": "A multiplayer chess server with ranked matchmaking.", "project_context": "Games"}
+    assert semantic_runner(different, cache=cache)(task, None, {}).raw == "output 2"
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["writes"]) == (1, 2, 2)
+
+def test_entries_are_per_task_and_persist(cache, tmp_path):
+    semantic_runner(REQUIREMENTS, cache=cache)(FakeTask(), None, {})
+    reloaded = SemanticCache(cache.path, threshold=0.9, embedder=SynonymEmbedder())
+    assert reloaded.lookup("research_similar_projects", prompt_text(REQUIREMENTS, {}))[0] == "output 1"
+    assert reloaded.lookup("finalize_tech_stack", prompt_text(REQUIREMENTS, {})) is None
+
+def test_paraphrases_hit_and_negations_miss(cache):
+    task = FakeTask()
+    requirements = "A todo app with user authentication, due dates, reminders and shared lists for small teams"
+    semantic_runner({"user_requirements": requirements}, cache=cache)(task, None, {})
+
+    reworded = requirements.replace("todo app", "task manager").replace("user authentication", "login")
+    paraphrase = {"user_requirements": reworded}
+    assert semantic_runner(paraphrase, cache=cache)(task, None, {}).raw == "output 1"
+
+    negation = {"user_requirements": requirements.replace("with", "without")}
+    original, negated = cache.embedder.embed([prompt_text({"user_requirements": requirements}, {}),
+                                              prompt_text(negation, {})])
+    assert float(original @ negated) >= cache.threshold  # Too close to tell apart by embedding alone
+    assert semantic_runner(negation, cache=cache)(task, None, {}).raw == "output 2"
+    assert semantic_runner(negation, cache=cache)(task, None, {}).raw == "output 2"
+    assert task.runs == 2
+
+def test_the_hashing_embedder_disables_the_cache(tmp_path):
+    cache = SemanticCache(str(tmp_path / "semantic.jsonl"), threshold=0.9, model="hashing")
+    task = FakeTask()
+    runner = semantic_runner(REQUIREMENTS, cache=cache)
+    assert runner(task, None, {}).raw == "output 1"
+    assert runner(task, None, {}).raw == "output 2"
+    assert not cache.enabled and cache.stats()["writes"] == 0
+    assert not (tmp_path / "semantic.jsonl").exists()
+
+def test_upstream_context_is_part_of_the_prompt(cache):
+    task = FakeTask("finalize_tech_stack")
+    runner = semantic_runner({}, cache=cache)
+    runner(task, None, {"build_knowledge_base": '{"projects": ["todoist", "taskwarrior"]}'})
+    runner(task, None, {"build_knowledge_base": '{"projects": ["lichess", "stockfish"]}'})
+    assert task.runs == 2
+
+def test_bypass_skips_lookups_but_stores_outputs(cache):
+    task = FakeTask()
+    runner = semantic_runner(REQUIREMENTS, cache=cache)
+    runner(task, None, {})
+    with cache_bypass():
+        assert runner(task, None, {}).raw == "output 2"
+    assert cache.stats()["bypassed"] == 1
+    assert cache.stats()["writes"] == 2
+
+def test_only_opted_in_tasks_are_wrapped(cache):
+    fanout = lambda task, agent, upstream: SimpleNamespace(raw="fanned out")
+    runners = with_semantic_cache(
+        {"module_boilerplate_task": fanout},
+        {"research_similar_projects": REQUIREMENTS, "gather_documentation": {}},
+        task_names=("research_similar_projects", "finalize_tech_stack"),
+        cache=cache,
+    )
+    assert set(runners) == {"module_boilerplate_task", "research_similar_projects"}
+    assert runners["module_boilerplate_task"] is fanout
+
+if __name__ == "__main__":
+    pytest.main([__file__])
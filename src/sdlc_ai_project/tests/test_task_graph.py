@@ -0,0 +1,178 @@
+import threading
+import pytest
+from sdlc_ai_project.task_graph import (
+    task_dependencies, execute_task_graph, execute_tasks_in_order, task_fingerprint, output_hash,
+    TaskReuse, TASK_OUTPUT_DIVIDER,
+)
+
+class FakeOutput:
+    def __init__(self, name, raw):
+        self.name = name
+        self.raw = raw
+
+class FakeLLM:
+    model = "gemini/gemini-1.5-flash"
+
+class FakeAgent:
+    role = "Knowledge Research Specialist"
+    llm = FakeLLM()
+
+    def copy(self):
+        return FakeAgent()
+
+class FakeTask:
+    """Mimics the parts of crewai.Task the task graph uses."""
+
+    def __init__(self, name, context=None, barrier=None):
+        self.name = name
+        self.description = f"Do {name}"
+        self.expected_output = "JSON"
+        self.executions = 0
+        self.context = context
+        self.agent = FakeAgent()
+        self.barrier = barrier
+        self.received_context = None
+        self.output = None
+
+    def execute_sync(self, agent=None, context=None):
+        self.executions += 1
+        if self.barrier is not None:
+            self.barrier.wait()
+        self.received_context = context
+        self.output = FakeOutput(self.name, f"{self.name} output")
+        return self.output
+
+class FakeCrew:
+    def __init__(self, tasks):
+        self.tasks = tasks
+
+def knowledge_tasks(barrier=None):
+    research = FakeTask("research_similar_projects")
+    docs = FakeTask("gather_documentation", context=[research], barrier=barrier)
+    samples = FakeTask("collect_code_samples", context=[research], barrier=barrier)
+    kb = FakeTask("build_knowledge_base", context=[research, docs, samples])
+    stack = FakeTask("finalize_tech_stack", context=[kb])
+    return [research, docs, samples, kb, stack]
+
+def test_task_dependencies_follow_context():
+    requires = task_dependencies(knowledge_tasks())
+    assert requires["research_similar_projects"] == ()
+    assert requires["gather_documentation"] == ("research_similar_projects",)
+    assert requires["build_knowledge_base"] == ("research_similar_projects", "gather_documentation", "collect_code_samples")
+
+def test_task_dependencies_reject_foreign_context():
+    outsider = FakeTask("outsider")
+    with pytest.raises(ValueError):
+        task_dependencies([FakeTask("task", context=[outsider])])
+
+def test_independent_tasks_run_concurrently():
+    # Both documentation and code sample tasks must be in flight at the same time
+    tasks = knowledge_tasks(barrier=threading.Barrier(2, timeout=5))
+    seen = []
+    execute_task_graph(FakeCrew(tasks), max_workers=2, on_task_output=lambda output: seen.append(output.name))
+
+    assert seen[0] == "research_similar_projects"
+    assert seen[-1] == "finalize_tech_stack"
+    kb = tasks[3]
+    assert kb.received_context == TASK_OUTPUT_DIVIDER.join(
+        ["research_similar_projects output", "gather_documentation output", "collect_code_samples output"]
+    )
+    assert all(task.output is not None for task in tasks)
+
+def requirement_tasks():
+    # Context as declared by RequirementAnalyzer: the first two tasks set none
+    extraction = FakeTask("extraction_task")
+    research = FakeTask("project_research_task")
+    intent = FakeTask("intent_analysis_task", context=[research])
+    generation = FakeTask("task_generation_task", context=[intent, research])
+    validation = FakeTask("requirement_validation_task", context=[intent, extraction])
+    subtasks = FakeTask("subtask_breakdown_task", context=[extraction])
+    return [extraction, research, intent, generation, validation, subtasks]
+
+def skeleton_tasks():
+    research = FakeTask("code_research_task")
+    skeleton = FakeTask("code_skeleton_task", context=[research])
+    modules = FakeTask("module_boilerplate_task", context=[skeleton, research])
+    testing = FakeTask("testing_boilerplate_task", context=[modules, research])
+    docs = FakeTask("documentation_task", context=[modules, testing, research])
+    return [research, skeleton, modules, testing, docs]
+
+@pytest.mark.parametrize("make_tasks", [knowledge_tasks, requirement_tasks, skeleton_tasks])
+def test_parallel_mode_hands_tasks_the_same_context_as_sequential(make_tasks):
+    sequential = make_tasks()
+    execute_tasks_in_order(FakeCrew(sequential))
+    parallel = make_tasks()
+    execute_task_graph(FakeCrew(parallel), max_workers=3)
+    assert [task.received_context for task in parallel] == [task.received_context for task in sequential]
+
+def test_tasks_without_context_wait_for_every_earlier_task():
+    requires = task_dependencies(requirement_tasks())
+    assert requires["extraction_task"] == ()
+    # Process.sequential hands project research the extraction output
+    assert requires["project_research_task"] == ("extraction_task",)
+    assert task_dependencies([FakeTask("first"), FakeTask("second", context=[])])["second"] == ()
+
+def test_output_hash_ignores_formatting():
+    assert output_hash('```json\n{"b": 1, "a": [1, 2]}\n```') == output_hash('{"a": [1, 2], "b": 1}')
+    assert output_hash('{"a": 1}') != output_hash('{"a": 2}')
+
+def test_fingerprint_tracks_prompt_and_context():
+    task = FakeTask("gather_documentation")
+    base = task_fingerprint(task, ["research output"])
+    assert task_fingerprint(task, ["research output"]) == base
+    assert task_fingerprint(task, ["edited research output"]) != base
+    task.description = "Do something else"
+    assert task_fingerprint(task, ["research output"]) != base
+
+def test_edit_recomputes_only_downstream_tasks(monkeypatch):
+    restored = {}
+
+    def fake_restore(task, output):
+        task.output = FakeOutput(task.name, output)
+        restored[task.name] = output
+        return task.output
+
+    monkeypatch.setattr("sdlc_ai_project.task_graph.restore_task_output", fake_restore)
+
+    # First run: everything executes and is fingerprinted
+    first = TaskReuse()
+    tasks = knowledge_tasks()
+    execute_tasks_in_order(FakeCrew(tasks), reuse=first)
+    saved = {task.name: {"output": task.output.raw, "fingerprint": first.fingerprints[task.name]} for task in tasks}
+
+    # A reviewer edits gather_documentation; its fingerprint is kept
+    saved["gather_documentation"]["output"] = "edited docs"
+
+    second = TaskReuse(saved)
+    tasks = knowledge_tasks()
+    execute_tasks_in_order(FakeCrew(tasks), reuse=second)
+    executed = {task.name for task in tasks if task.executions}
+    # build_knowledge_base re-runs with the edit; its (fake) output comes out unchanged,
+    # so finalize_tech_stack's inputs are unchanged and it is reused as well
+    assert executed == {"build_knowledge_base"}
+    assert second.reused == {"research_similar_projects", "gather_documentation", "collect_code_samples", "finalize_tech_stack"}
+    assert "edited docs" in tasks[3].received_context
+
+def test_task_runner_replaces_single_execution():
+    tasks = knowledge_tasks()
+    received = {}
+
+    def fan_out(task, agent, upstream):
+        received.update(upstream)
+        task.output = FakeOutput(task.name, "merged output")
+        return task.output
+
+    execute_tasks_in_order(FakeCrew(tasks), task_runners={"build_knowledge_base": fan_out})
+
+    kb = tasks[3]
+    assert kb.executions == 0
+    assert kb.output.raw == "merged output"
+    assert received == {
+        "research_similar_projects": "research_similar_projects output",
+        "gather_documentation": "gather_documentation output",
+        "collect_code_samples": "collect_code_samples output",
+    }
+    assert tasks[4].received_context == "merged output"
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,87 @@
+import copy
+import pytest
+from sdlc_ai_project.templates import render, get_crew_template, build_crew
+
+class FakeAgent:
+    def __init__(self, role, goal="goal", backstory="backstory"):
+        self.role = role
+        self.goal = goal
+        self.backstory = backstory
+
+class FakeTask:
+    def __init__(self, name, description, expected_output="JSON"):
+        self.name = name
+        self.description = description
+        self.expected_output = expected_output
+
+class FakeCrew:
+    def __init__(self, agents, tasks):
+        self.agents = agents
+        self.tasks = tasks
+
+    def copy(self):
+        return copy.deepcopy(self)
+
+class FakeSkeletonGenerator:
+    """Mimics a CrewBase class whose prompts are f-strings over its constructor arguments."""
+    instances = 0
+
+    def __init__(self, architecture_design, project_context, llm):
+        FakeSkeletonGenerator.instances += 1
+        self.architecture_design = architecture_design
+        self.project_context = project_context
+        self.llm = llm
+
+    def crew(self):
+        agent = FakeAgent(role=f"Code Skeleton Generator for {self.project_context}")
+        tasks = [
+            FakeTask("code_research_task", f"Research implementations related to {self.project_context}. Return {{ 'code_patterns' }}."),
+            FakeTask("code_skeleton_task", f"Based on the architecture design: {self.architecture_design} generate the skeleton."),
+        ]
+        return FakeCrew([agent], tasks)
+
+def test_render_matches_fstring_rendering():
+    design = {"architecture_blueprint_task": {"components": ["api", "{db}"]}}
+    assert render("design: {architecture_design}", {"architecture_design": design}) == f"design: {design}"
+    # Unrelated braces and braces inside values are left untouched
+    assert render("{ 'name', 'url' } {x}", {"x": "{x}"}) == "{ 'name', 'url' } {x}"
+
+def test_template_is_built_once_and_bound_per_request():
+    llm = object()
+    FakeSkeletonGenerator.instances = 0
+    first = build_crew(FakeSkeletonGenerator, llm, architecture_design={"a": 1}, project_context="todo app")
+    second = build_crew(FakeSkeletonGenerator, llm, architecture_design={"b": 2}, project_context="chat app")
+    assert FakeSkeletonGenerator.instances == 1
+
+    direct = FakeSkeletonGenerator({"a": 1}, "todo app", llm).crew()
+    assert [t.description for t in first.tasks] == [t.description for t in direct.tasks]
+    assert first.agents[0].role == "Code Skeleton Generator for todo app"
+    assert second.tasks[1].description == "Based on the architecture design: {'b': 2} generate the skeleton."
+
+    # Binding never mutates the shared template
+    template = get_crew_template(FakeSkeletonGenerator, llm, ["architecture_design", "project_context"])
+    assert template.crew.tasks[1].description == "Based on the architecture design: {architecture_design} generate the skeleton."
+
+def test_task_inputs_override_inputs_for_one_task():
+    crew = build_crew(
+        FakeSkeletonGenerator, object(),
+        task_inputs={"code_skeleton_task": {"architecture_design": {"blueprint": 1}}},
+        architecture_design={"blueprint": 1, "research": 2}, project_context="todo app",
+    )
+    assert crew.tasks[1].description == "Based on the architecture design: {'blueprint': 1} generate the skeleton."
+    assert crew.tasks[0].description.startswith("Research implementations related to todo app.")
+
+def test_template_knows_which_inputs_each_task_renders():
+    template = get_crew_template(FakeSkeletonGenerator, object(), ["architecture_design", "project_context"])
+    assert template.task_input_names == {
+        "code_research_task": ("project_context",),
+        "code_skeleton_task": ("architecture_design",),
+    }
+
+def test_bind_requires_all_inputs():
+    template = get_crew_template(FakeSkeletonGenerator, object(), ["architecture_design", "project_context"])
+    with pytest.raises(TypeError):
+        template.bind(project_context="todo app")
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,137 @@
+import copy
+import threading
+from types import SimpleNamespace
+import pytest
+from sdlc_ai_project.token_accounting import (
+    TokenLedger, count_tokens, count_message_tokens, normalize_usage, provider_of, track_usage, usage_scope,
+    summarize, CHARS_PER_TOKEN,
+)
+
+class FakeLLM:
+    """Stands in for a crewai LLM: reports usage to its callbacks like the litellm path does."""
+
+    def __init__(self, model, usage=None):
+        self.model = model
+        self.usage = usage
+
+    def call(self, messages, tools=None, callbacks=None, **kwargs):
+        for callback in callbacks or []:
+            if self.usage is not None:
+                callback.log_success_event(kwargs={}, response_obj={"usage": self.usage}, start_time=0, end_time=0)
+        return "x" * 40
+
+class NativeLLM:
+    """
+    Stands in for crewai's native provider clients: the provider prefix is stripped from
+    the model and usage goes to `_track_token_usage_internal` only.
+    """
+
+    def __init__(self, model, barrier=None):
+        self.provider, self.model = model.split("/", 1)
+        self.barrier = barrier
+        self._token_usage = {"prompt_tokens": 0, "completion_tokens": 0, "successful_requests": 0}
+
+    def _track_token_usage_internal(self, usage_data):
+        for key in ("prompt_tokens", "completion_tokens"):
+            self._token_usage[key] += usage_data[key]
+        self._token_usage["successful_requests"] += 1
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, from_task=None, from_agent=None):
+        size = len(messages)
+        if self.barrier is not None:
+            self.barrier.wait(timeout=5)  # Both calls are in flight before either reports usage
+        self._track_token_usage_internal({"prompt_tokens": size, "completion_tokens": size // 10})
+        if self.barrier is not None:
+            self.barrier.wait(timeout=5)
+        return "done"
+
+@pytest.fixture
+def ledger(tmp_path):
+    return TokenLedger(str(tmp_path / "usage" / "token_usage.jsonl"))
+
+def test_count_tokens_approximates_unknown_models():
+    assert count_tokens("a" * 400, "gemini/gemini-1.5-flash") == 400 // CHARS_PER_TOKEN
+    messages = [{"role": "system", "content": "a" * 40}, {"role": "user", "content": "b" * 80}]
+    assert count_message_tokens(messages, "gemini/gemini-1.5-flash") == 2 * 4 + 10 + 20
+
+def test_normalize_usage_reads_provider_formats():
+    assert normalize_usage({"prompt_tokens": 12, "completion_tokens": 3}) == {"prompt_tokens": 12, "completion_tokens": 3}
+    assert normalize_usage({"prompt_token_count": 7, "candidates_token_count": 2}) == {"prompt_tokens": 7, "completion_tokens": 2}
+    assert normalize_usage({"unrelated": 1}) is None
+
+def test_tracked_calls_are_attributed_and_persisted(ledger):
+    llm = track_usage(FakeLLM("openrouter/deepseek/deepseek-r1", usage={"prompt_tokens": 120, "completion_tokens": 30}), ledger)
+    with usage_scope(run="todo", stage="Knowledge"):
+        with usage_scope(task="research_similar_projects", agent="Knowledge Research Specialist"):
+            assert llm.call([{"role": "user", "content": "a" * 400}]) == "x" * 40
+
+    [entry] = ledger.entries()
+    assert entry["run"] == "todo"
+    assert entry["stage"] == "Knowledge"
+    assert entry["task"] == "research_similar_projects"
+    assert entry["provider"] == "openrouter"
+    assert entry["prompt_tokens_estimate"] == 4 + 100
+    assert (entry["prompt_tokens"], entry["completion_tokens"], entry["total_tokens"]) == (120, 30, 150)
+    assert entry["usage_source"] == "provider"
+
+def test_calls_without_reported_usage_fall_back_to_estimates(ledger):
+    llm = track_usage(FakeLLM("gemini/gemini-1.5-flash"), ledger)
+    llm.call("a" * 80)
+    [entry] = ledger.entries()
+    assert entry["provider"] == "gemini"
+    assert (entry["prompt_tokens"], entry["completion_tokens"]) == (20, 10)
+    assert entry["usage_source"] == "estimate"
+    assert "run" not in entry
+
+def test_concurrent_calls_on_copies_of_one_llm_get_their_own_usage(ledger):
+    llm = track_usage(NativeLLM("gemini/gemini-1.5-flash", barrier=threading.Barrier(2)), ledger)
+    copies = [copy.copy(llm), copy.copy(llm)]  # Agent.copy shallow-copies, sharing _token_usage
+    threads = [
+        threading.Thread(target=lambda copy_, size: copy_.call("a" * size), args=(copies[0], 400)),
+        threading.Thread(target=lambda copy_, size: copy_.call("a" * size), args=(copies[1], 1000)),
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    usage = sorted((entry["prompt_tokens"], entry["completion_tokens"]) for entry in ledger.entries())
+    assert usage == [(400, 40), (1000, 100)]
+    assert {entry["usage_source"] for entry in ledger.entries()} == {"provider"}
+    assert llm._token_usage["prompt_tokens"] == 1400
+
+def test_native_clients_are_attributed_to_their_provider(ledger):
+    llm = track_usage(NativeLLM("gemini/gemini-1.5-flash"), ledger)
+    llm.call("a" * 80)
+    [entry] = ledger.entries()
+    assert (entry["provider"], entry["model"]) == ("gemini", "gemini-1.5-flash")
+    assert provider_of(SimpleNamespace(model="gemini-1.5-flash", provider="google", base_url=None)) == "gemini"
+    assert provider_of(SimpleNamespace(model="gpt-4o-mini")) == "openai"
+
+def test_usage_callback_is_added_to_positional_callbacks(ledger):
+    seen = []
+
+    class Collector:
+        def log_success_event(self, kwargs, response_obj, start_time, end_time):
+            seen.append(response_obj["usage"])
+
+    llm = track_usage(FakeLLM("deepseek/deepseek-chat", usage={"prompt_tokens": 5, "completion_tokens": 1}), ledger)
+    llm.call("hi", None, [Collector()])
+    assert seen == [{"prompt_tokens": 5, "completion_tokens": 1}]
+    assert ledger.entries()[0]["prompt_tokens"] == 5
+
+def test_summarize_groups_most_expensive_first(ledger):
+    for task, tokens in [("a", 10), ("b", 50), ("a", 30)]:
+        ledger.record({"run": "todo", "task": task, "prompt_tokens": tokens, "completion_tokens": 0, "total_tokens": tokens})
+    ledger.record({"run": "other", "task": "a", "total_tokens": 500})
+
+    assert [(group["task"], group["calls"], group["total_tokens"]) for group in ledger.summarize(run="todo")] == [
+        ("b", 1, 50), ("a", 2, 40),
+    ]
+    assert summarize(ledger.entries(), by=("run",))[0] == {
+        "run": "other", "calls": 1, "prompt_tokens_estimate": 0, "prompt_tokens": 0, "completion_tokens": 0,
+        "total_tokens": 500,
+    }
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+from sdlc_ai_project.embeddings import normalize
+from sdlc_ai_project.vector_store import ChromaVectorStore, NumpyVectorStore, VectorStore
+
+def random_vectors(count, dim=32, seed=0):
+    return normalize(np.random.default_rng(seed).normal(size=(count, dim)).astype(np.float32))
+
+@pytest.fixture(params=["chroma", "numpy-float32", "numpy-int8"])
+def store(request, tmp_path):
+    if request.param == "chroma":
+        return ChromaVectorStore("chunks", str(tmp_path))
+    return NumpyVectorStore("chunks", str(tmp_path), dtype=request.param.split("-")[1])
+
+def add_chunks(store, vectors, repo="a"):
+    ids = [f"{repo}:{n}" for n in range(len(vectors))]
+    store.add(ids, vectors, [f"chunk {n}" for n in range(len(vectors))],
+              [{"repo": repo, "n": n} for n in range(len(vectors))])
+    return ids
+
+def test_nearest_chunks_come_first(store):
+    vectors = random_vectors(50)
+    add_chunks(store, vectors)
+    hits = store.search(vectors[7], k=3)
+    assert hits[0]["id"] == "a:7" and hits[0]["document"] == "chunk 7"
+    assert hits[0]["score"] == pytest.approx(1.0, abs=0.02)
+    assert hits[0]["metadata"] == {"repo": "a", "n": 7}
+    assert [hit["score"] for hit in hits] == sorted((hit["score"] for hit in hits), reverse=True)
+
+def test_filters_replacements_and_deletions(store):
+    vectors = random_vectors(20)
+    add_chunks(store, vectors[:10], repo="a")
+    add_chunks(store, vectors[10:], repo="b")
+    assert {hit["metadata"]["repo"] for hit in store.search(vectors[0], k=5, where={"repo": "b"})} == {"b"}
+    assert len(store.search(vectors[0], k=50, where={"repo": ["a", "b"], "n": 3})) == 2
+    store.add(["a:0"], vectors[15:16], ["replaced"], [{"repo": "a", "n": 0}])
+    assert store.search(vectors[15], k=1, where={"repo": "a"})[0]["document"] == "replaced"
+    store.delete(["a:1", "missing"])
+    assert store.count() == 19
+    assert "a:1" not in [hit["id"] for hit in store.search(vectors[1], k=20)]
+
+def test_chunks_are_fetched_by_id_and_scanned(store):
+    vectors = random_vectors(5)
+    add_chunks(store, vectors)
+    chunks = store.get(["a:3", "missing", "a:1"])
+    assert [chunk["id"] for chunk in chunks] == ["a:3", "a:1"]
+    assert np.allclose(chunks[0]["vector"], vectors[3], atol=0.02)
+    assert chunks[1]["document"] == "chunk 1" and chunks[1]["metadata"] == {"repo": "a", "n": 1}
+    assert sorted(chunk["id"] for chunk in store.scan(batch_size=2)) == [f"a:{n}" for n in range(5)]
+
+def test_numpy_store_persists_and_sees_other_writers(tmp_path):
+    vectors = random_vectors(10)
+    writer = NumpyVectorStore("chunks", str(tmp_path))
+    reader = NumpyVectorStore("chunks", str(tmp_path))
+    add_chunks(writer, vectors)
+    assert reader.count() == 10  # rows appended by another instance are picked up
+    writer.delete(["a:2"])
+    reopened = NumpyVectorStore("chunks", str(tmp_path))
+    assert reopened.count() == 9 and reopened.dim == 32
+    assert reopened.search(vectors[3], k=1)[0]["id"] == "a:3"
+
+def test_int8_rows_take_a_quarter_of_the_space(tmp_path):
+    vectors = random_vectors(100, dim=64)
+    add_chunks(NumpyVectorStore("f32", str(tmp_path), dtype="float32"), vectors)
+    add_chunks(NumpyVectorStore("i8", str(tmp_path), dtype="int8"), vectors)
+    assert (tmp_path / "f32" / "vectors.bin").stat().st_size == 100 * 64 * 4
+    assert (tmp_path / "i8" / "vectors.bin").stat().st_size == 100 * 64
+    exact = NumpyVectorStore("f32", str(tmp_path)).search(vectors[0], k=10)
+    quantized = NumpyVectorStore("i8", str(tmp_path)).search(vectors[0], k=10)
+    for exact_hit, quantized_hit in zip(exact, quantized):
+        assert quantized_hit["score"] == pytest.approx(exact_hit["score"], abs=0.02)
+
+def test_mismatched_dimensions_are_rejected(tmp_path):
+    store = NumpyVectorStore("chunks", str(tmp_path))
+    add_chunks(store, random_vectors(2, dim=16))
+    with pytest.raises(ValueError):
+        add_chunks(store, random_vectors(2, dim=8))
+
+def test_incomplete_backends_fail_when_created():
+    class SearchOnlyStore(VectorStore):
+        def search(self, vector, k=5, where=None):
+            return []
+
+    with pytest.raises(TypeError):
+        SearchOnlyStore()
+
+if __name__ == "__main__":
+    pytest.main([__file__])
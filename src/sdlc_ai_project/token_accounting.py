@@ -0,0 +1,297 @@
+import os
+import json
+import time
+import inspect
+import threading
+import contextvars
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, Any, Optional, List, Iterable
+from sdlc_ai_project.llm_middleware import add_call_middleware
+
+# Environment variables with defaults
+TOKEN_LEDGER_PATH = os.getenv("TOKEN_LEDGER_PATH", "token_usage.jsonl")
+
+# Fallback size of a token in characters when no tokenizer matches the model
+CHARS_PER_TOKEN = 4
+# Per-message overhead of the chat format (role and separators), as in OpenAI's cookbook
+TOKENS_PER_MESSAGE = 4
+# Other names crewai accepts for a provider, mapped to the one limits and reports use
+PROVIDER_ALIASES = {"google": "gemini"}
+
+
+# -------------------------------
+# Pre-flight Measurement
+# -------------------------------
+@lru_cache(maxsize=32)
+def _encoding_for(model: str):
+    """Return a tiktoken encoding for OpenAI models, or None to use the approximation."""
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    name = model.split("/")[-1]
+    try:
+        return tiktoken.encoding_for_model(name)
+    except KeyError:
+        return None
+
+
+def count_tokens(text: Any, model: str = "") -> int:
+    """
+    Count the tokens `text` takes for `model`.
+
+    OpenAI models are counted exactly with tiktoken when it is installed; other models
+    (Gemini, DeepSeek, Llama) use a fast approximation of CHARS_PER_TOKEN characters per token.
+    """
+    text = text if isinstance(text, str) else str(text)
+    encoding = _encoding_for(model) if model else None
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return len(text) // CHARS_PER_TOKEN
+
+
+def count_message_tokens(messages: Any, model: str = "") -> int:
+    """Count the prompt tokens of a chat message list (or a plain prompt string)."""
+    if isinstance(messages, str):
+        return count_tokens(messages, model)
+    total = 0
+    for message in messages or []:
+        content = message.get("content", "") if isinstance(message, dict) else message
+        total += TOKENS_PER_MESSAGE + count_tokens(content or "", model)
+    return total
+
+
+# -------------------------------
+# Attribution
+# -------------------------------
+_usage_scope: contextvars.ContextVar[Dict[str, str]] = contextvars.ContextVar("usage_scope", default={})
+
+
+@contextmanager
+def usage_scope(**fields: Optional[str]):
+    """
+    Attribute LLM calls made inside the block to a run, stage, task or agent.
+
+    Scopes nest, so a task scope inside a stage scope keeps the stage. The scope travels
+    with the context, so it follows work handed to the scheduler's worker threads.
+    """
+    scope = {**_usage_scope.get(), **{key: value for key, value in fields.items() if value is not None}}
+    token = _usage_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _usage_scope.reset(token)
+
+
+def current_scope() -> Dict[str, str]:
+    return dict(_usage_scope.get())
+
+
+def provider_of(llm) -> str:
+    """
+    Name the provider an LLM object talks to, from its base URL, its `provider` or its
+    model prefix. crewai's native clients strip the prefix from the model and keep the
+    provider apart, e.g. model="gemini-1.5-flash", provider="gemini".
+    """
+    base_url = getattr(llm, "base_url", None) or ""
+    if "openrouter" in base_url:
+        return "openrouter"
+    model = getattr(llm, "model", "") or ""
+    provider = getattr(llm, "provider", None) or (model.split("/")[0] if "/" in model else "openai")
+    return PROVIDER_ALIASES.get(provider, provider)
+
+
+# -------------------------------
+# Ledger
+# -------------------------------
+class TokenLedger:
+    """
+    Append-only JSONL record of every LLM call's measured and reported token usage.
+
+    Each line holds the call's run, stage, task, agent, provider and model, so usage
+    can be summed along any of them with `summarize`.
+    """
+
+    def __init__(self, path: str = TOKEN_LEDGER_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def record(self, entry: Dict[str, Any]):
+        line = json.dumps(entry, default=str)
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write(line + "\n")
+
+    def entries(self, **filters: str) -> List[Dict[str, Any]]:
+        """Return the recorded calls, optionally only those matching e.g. run="todo"."""
+        if not os.path.exists(self.path):
+            return []
+        entries = []
+        with self._lock, open(self.path, "r") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # A line cut short by a crash
+                if all(entry.get(key) == value for key, value in filters.items()):
+                    entries.append(entry)
+        return entries
+
+    def summarize(self, by: Iterable[str] = ("task",), **filters: str) -> List[Dict[str, Any]]:
+        """Sum usage grouped by the given fields, most expensive group first."""
+        return summarize(self.entries(**filters), by)
+
+
+USAGE_FIELDS = ("prompt_tokens_estimate", "prompt_tokens", "completion_tokens", "total_tokens")
+
+
+def summarize(entries: Iterable[Dict[str, Any]], by: Iterable[str] = ("task",)) -> List[Dict[str, Any]]:
+    by = tuple(by)
+    groups: Dict[tuple, Dict[str, Any]] = {}
+    for entry in entries:
+        key = tuple(entry.get(field) for field in by)
+        group = groups.setdefault(key, {**dict(zip(by, key)), "calls": 0, **{field: 0 for field in USAGE_FIELDS}})
+        group["calls"] += 1
+        for field in USAGE_FIELDS:
+            group[field] += entry.get(field) or 0
+    return sorted(groups.values(), key=lambda group: group["total_tokens"], reverse=True)
+
+
+token_ledger = TokenLedger()
+
+
+# -------------------------------
+# LLM Instrumentation
+# -------------------------------
+_call_usage: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar("call_usage", default=None)
+
+
+def normalize_usage(usage: Any) -> Optional[Dict[str, int]]:
+    """Read prompt/completion token counts from a provider usage object or dict."""
+    if usage is None:
+        return None
+    get = usage.get if isinstance(usage, dict) else lambda key: getattr(usage, key, None)
+    for prompt_key, completion_key in (
+        ("prompt_tokens", "completion_tokens"),
+        ("input_tokens", "output_tokens"),
+        ("prompt_token_count", "candidates_token_count"),
+    ):
+        prompt, completion = get(prompt_key), get(completion_key)
+        if prompt is not None or completion is not None:
+            return {"prompt_tokens": int(prompt or 0), "completion_tokens": int(completion or 0)}
+    return None
+
+
+def _add_reported_usage(reporter: str, usage: Any):
+    """Add one response's usage to the call in progress, summed per reporter across tool-calling rounds."""
+    call = _call_usage.get()
+    normalized = normalize_usage(usage)
+    if call is None or normalized is None:
+        return
+    totals = call.setdefault(reporter, {"prompt_tokens": 0, "completion_tokens": 0})
+    for key, value in normalized.items():
+        totals[key] += value
+
+
+class UsageCallback:
+    """
+    LLM callback that captures the usage the provider reports for the current call.
+
+    crewai and litellm call `log_success_event` on their callbacks after each response.
+    """
+
+    def log_success_event(self, kwargs, response_obj, start_time, end_time):
+        usage = response_obj.get("usage") if isinstance(response_obj, dict) else getattr(response_obj, "usage", None)
+        _add_reported_usage("callback", usage)
+
+
+def _capture_reported_usage(track_token_usage):
+    """
+    Wrap an LLM class's `_track_token_usage_internal`, through which crewai's native provider
+    clients report each response's usage, so the usage also lands on the call in progress.
+    Reading it per response keeps concurrent calls on copies of one LLM, which share its
+    running totals, from counting each other's tokens.
+    """
+    def capture(self, usage_data):
+        _add_reported_usage("client", usage_data)
+        return track_token_usage(self, usage_data)
+
+    capture.captures_usage = True
+    return capture
+
+
+def note_cache_hit():
+    """Mark the LLM call in progress as answered from a cache, so it is recorded as free."""
+    call = _call_usage.get()
+    if call is not None:
+        call["cached"] = True
+
+
+def _with_usage_callback(call_next, messages, args, kwargs):
+    """Add a UsageCallback to the call's `callbacks` argument, wherever the caller passed it."""
+    try:
+        bound = inspect.signature(call_next).bind(messages, *args, **kwargs)
+    except (TypeError, ValueError):
+        return args, kwargs
+    if "callbacks" not in bound.signature.parameters:
+        return args, kwargs
+    bound.arguments["callbacks"] = list(bound.arguments.get("callbacks") or []) + [UsageCallback()]
+    return bound.args[1:], bound.kwargs
+
+
+def _track_call(self, call_next, messages, *args, **kwargs):
+    model = getattr(self, "model", "") or ""
+    estimate = count_message_tokens(messages, model)
+    args, kwargs = _with_usage_callback(call_next, messages, args, kwargs)
+    call: Dict[str, Any] = {}
+    token = _call_usage.set(call)
+    started = time.time()
+    try:
+        response = call_next(messages, *args, **kwargs)
+    finally:
+        _call_usage.reset(token)
+
+    source = "provider"
+    if call.get("cached"):
+        source = "cache"
+        call["prompt_tokens"] = call["completion_tokens"] = 0
+    elif "client" in call or "callback" in call:
+        # The litellm path reports each response both ways; count it once
+        call.update(call.get("client") or call["callback"])
+    else:
+        source = "estimate"
+        call["prompt_tokens"] = estimate
+        call["completion_tokens"] = count_tokens(response if isinstance(response, str) else str(response), model)
+
+    getattr(self, "usage_ledger", token_ledger).record({
+        **current_scope(),
+        "timestamp": started,
+        "duration": round(time.time() - started, 3),
+        "provider": provider_of(self),
+        "model": model,
+        "prompt_tokens_estimate": estimate,
+        "prompt_tokens": call["prompt_tokens"],
+        "completion_tokens": call["completion_tokens"],
+        "total_tokens": call["prompt_tokens"] + call["completion_tokens"],
+        "usage_source": source,
+    })
+    return response
+
+
+def track_usage(llm, ledger: Optional[TokenLedger] = None):
+    """
+    Record every call `llm` makes in the token ledger: the prompt measured before it is
+    sent and the usage reported afterwards. Calls answered from the response cache are
+    recorded with zero tokens.
+    """
+    add_call_middleware(llm, "tracked", _track_call)
+    cls = type(llm)
+    track_token_usage = getattr(cls, "_track_token_usage_internal", None)
+    if track_token_usage is not None and not getattr(track_token_usage, "captures_usage", False):
+        cls._track_token_usage_internal = _capture_reported_usage(track_token_usage)
+    object.__setattr__(llm, "usage_ledger", ledger or token_ledger)
+    return llm
@@ -1,49 +1,42 @@
 from crewai.tools import tool
-from crewai_tools import SerperDevTool, GithubSearchTool, CodeDocsSearchTool
+from crewai_tools import SerperDevTool
 from dotenv import load_dotenv
-from embedchain import App
 import os
+from sdlc_ai_project.code_index import code_index, parse_repo_url
+from sdlc_ai_project.doc_index import doc_index
+from sdlc_ai_project.rate_limit import search_slot
 
 load_dotenv()
 
+SEARCH_RESULTS = int(os.getenv("SEARCH_RESULTS", "5"))
+CODE_RESEARCH_RESULTS = int(os.getenv("CODE_RESEARCH_RESULTS", "8"))
+DOC_SEARCH_RESULTS = int(os.getenv("DOC_SEARCH_RESULTS", "3"))
+DOC_RESEARCH_RESULTS = int(os.getenv("DOC_RESEARCH_RESULTS", "5"))
+
+
+def search_links(query: str, n_results: int = SEARCH_RESULTS):
+    """Links of the top Serper web results for `query`."""
+    with search_slot():
+        results = SerperDevTool(n_results=n_results).run(search_query=query)
+    return [result["link"] for result in (results or {}).get("organic", []) if result.get("link")]
+
+
+def format_hits(hits):
+    return "\n\n".join(f"[{hit['score']:.2f}] {hit['document']}" for hit in hits)
+
+
 @tool("Code Research Tool")
 def code_research_tool(query: str):
     """Tool description for clarity."""
     print("CODE RESEARCH TOOL CALLED with query: ", query)
-    search_resuts = SerperDevTool(
-        search_url = ("Similar github projects for the domain ", query),
-        n_results=5
-    )
-    links = []
-    config = {
-        "vectordb": {
-            "provider": "chroma",
-            "config": {
-                "collection_name": "default_collection",
-                "dir": "./db/default_ragtool_db",
-                "allow_reset": False
-            }
-        }
-    }
-    print("Search Results:", search_resuts['organic'])
-    app = App.from_config(config=config)
-    for link in search_resuts['organic']:
-        print("LINK:", link['link'])
-        try:
-            app.add(
-                GithubSearchTool(
-                    github_repo=link['link'],
-                    gh_token = os.environ["gh_key"],
-                    content_types=["code"],
-                )
-            )
-        except:
-            print("Invalid Github Link")
-            continue
-
-
-    # Perform the query
-    result = app.query("Summarize code patterns relevant to", query)
+    repos = [link for link in search_links(f"Similar github projects for the domain {query}") if parse_repo_url(link)]
+    print("Repositories:", repos)
+    report = code_index.ingest_many(repos)
+    indexed = report.urls
+    print(f"Indexed {len(indexed)}/{len(repos)} repositories in {report.seconds:.1f}s")
+
+    hits = code_index.search(f"Code patterns relevant to {query}", CODE_RESEARCH_RESULTS, indexed) if indexed else []
+    result = format_hits(hits)
     print("TOOL RESULT: ", result)
     return ("Relevant Context: ", result)
 
@@ -53,50 +46,12 @@ def code_research_tool(query: str):
 def document_research_tool(query: str):
     """Tool description for clarity."""
     print("Documentation Research Tool called with query: ", query)
-    search_resuts = SerperDevTool(
-        search_url = (query, " Documentation"),
-        n_results=2
-    )
-    links = []
-    config = {
-        "vectordb": {
-            "provider": "chroma",
-            "config": {
-                "collection_name": "default_collection",
-                "dir": "./db/default_ragtool_db",
-                "allow_reset": False
-            }
-        }
-    }
-    print("Search Results:", search_resuts['organic'])
-    app = App.from_config(config=config)
-    for link in search_resuts['organic']:
-        try:
-            app.add(
-                CodeDocsSearchTool(
-        config=dict(
-            llm=dict(
-                provider="google",
-                config=dict(
-                    model="gemini-1.5-pro",
-                    temperature=0.7,
-                    api_key=os.getenv("GEMINI_API_KEY"),
-                ),
-            ),
-            embedder=dict(
-                provider="google",
-                config=dict(
-                    model="gemini-embedding-exp-03-07",
-                    task_type="retrieval_document",
-                ),
-            ),
-        )
-    )
-            )
-        except:
-            print("Invalid doc link")
-            continue
-        return
-
-
+    pages = search_links(f"{query} Documentation", DOC_SEARCH_RESULTS)
+    print("Documentation pages:", pages)
+    report = doc_index.ingest(pages)
+    print(f"Indexed {len(report.indexed)} pages, reused {len(report.reused)} in {report.seconds:.1f}s")
 
+    hits = doc_index.search(query, DOC_RESEARCH_RESULTS, report.urls) if report.urls else []
+    result = format_hits(hits)
+    print("TOOL RESULT: ", result)
+    return ("Relevant Context: ", result)
@@ -20,13 +20,14 @@ import json
 import requests
 from pathlib import Path
 import time
-from datetime import datetime, timedelta
 import hashlib
 import pickle
 from functools import lru_cache
 from dotenv import load_dotenv
 from pydantic import Field, SkipValidation
 from crewai import LLM
+from sdlc_ai_project.token_accounting import count_tokens, current_scope
+from sdlc_ai_project.rate_limit import TokenBucketLimiter, rate_limiter as shared_rate_limiter, search_slot
 
 # Load environment variables
 load_dotenv()
@@ -89,23 +90,26 @@ class CacheManager:
 
 # Rate limiting and token management
 class RateLimiter:
-    def __init__(self, requests_per_minute: int = RATE_LIMIT):
-        self.requests_per_minute = requests_per_minute
-        self.requests = []
-    
-    def can_make_request(self) -> bool:
-        now = datetime.now()
-        # Remove requests older than 1 minute
-        self.requests = [req_time for req_time in self.requests if now - req_time < timedelta(minutes=1)]
-        return len(self.requests) < self.requests_per_minute
-    
-    def add_request(self):
-        self.requests.append(datetime.now())
+    """RATE_LIMIT search requests per minute, shared with every thread and worker process."""
+
+    def __init__(self, limiter: TokenBucketLimiter = shared_rate_limiter):
+        self.limiter = limiter
+
+    def wait_for_slot(self, timeout: Optional[float] = None) -> float:
+        """Block until a request slot is free and take it."""
+        return self.limiter.acquire("search", timeout=timeout)
 
 class TokenManager:
     def __init__(self, max_tokens: int = MAX_TOKENS):
         self.max_tokens = max_tokens
         self.current_tokens = 0
+        self.run = None
+    
+    def start_run(self, run: Optional[str]):
+        """Reset the budget when tokens start being spent for a different run."""
+        if run != self.run:
+            self.run = run
+            self.reset()
     
     def can_add_tokens(self, tokens: int) -> bool:
         return self.current_tokens + tokens <= self.max_tokens
@@ -142,7 +146,7 @@ class AgentLimitManager:
             del self.agent_tasks[agent_id]
 
 # Initialize managers
-rate_limiter = RateLimiter(requests_per_minute=RATE_LIMIT)
+rate_limiter = RateLimiter()
 token_manager = TokenManager(max_tokens=MAX_TOKENS)
 cache_manager = CacheManager(cache_dir=CACHE_DIR, ttl=CACHE_TTL)
 agent_limit_manager = AgentLimitManager(max_agents=MAX_AGENTS, max_tasks_per_agent=MAX_TASKS_PER_AGENT)
@@ -379,7 +383,8 @@ class TechStackDocumentationTool(BaseTool):
     
     @lru_cache(maxsize=100)
     def _cached_search(self, query: str, tool: Any) -> str:
-        return tool._run(query)
+        with search_slot(rate_limiter.limiter):  # One rate limit slot per search
+            return tool._run(query)
     
     def _run(self, query: str) -> str:
         # Check cache first
@@ -714,7 +719,8 @@ class BugAnalysisTool(BaseTool):
     
     @lru_cache(maxsize=100)
     def _cached_search(self, query: str, tool: Any) -> str:
-        return tool._run(query)
+        with search_slot(rate_limiter.limiter):  # One rate limit slot per search
+            return tool._run(query)
     
     def _run(self, query: str) -> str:
         # Check cache first
@@ -722,16 +728,15 @@ class BugAnalysisTool(BaseTool):
         if cached_result:
             return cached_result
         
-        if not rate_limiter.can_make_request():
-            time.sleep(1)  # Wait if rate limit is reached
-        
         # Extract bug details from the query
         bug_details = self._extract_bug_details(query)
         
         results = []
+        token_manager.start_run(current_scope().get("run"))
         for bug in bug_details:
-            # Check token limit before making requests
-            if not token_manager.can_add_tokens(1000):  # Estimate 1000 tokens per bug
+            # Check token limit before making requests, measuring the four searches this bug sends
+            query_tokens = count_tokens(f"{bug['type']} {bug['description']}", MODEL_NAME) * 4
+            if not token_manager.can_add_tokens(query_tokens):
                 break
             
             # Use cached searches where possible
@@ -740,18 +745,18 @@ class BugAnalysisTool(BaseTool):
             web_result = self._cached_search(f"{bug['type']} {bug['description']} fix", self.web_tool)
             search_result = self._cached_search(f"{bug['type']} {bug['description']} error", self.search_tool)
             
-            results.append(f"""
+            bug_result = f"""
             Bug Type: {bug['type']}
             Description: {bug['description']}
             Documentation Solutions: {docs_result}
             GitHub Issues: {github_result}
             Web Solutions: {web_result}
             Error Analysis: {search_result}
-            """)
+            """
+            results.append(bug_result)
             
-            # Add tokens used
-            token_manager.add_tokens(1000)
-            rate_limiter.add_request()
+            # Add tokens used: the queries sent plus the results handed back to the agent
+            token_manager.add_tokens(query_tokens + count_tokens(bug_result, MODEL_NAME))
         
         result = "\n".join(results)
         # Cache the result
@@ -1,19 +1,18 @@
-from asyncio import tasks
 import os
 import json
 import yaml
-from typing import Dict, Any, Optional
-from sdlc_ai_project.agents.knowledge import KnowledgeBaseAgent
-from sdlc_ai_project.agents.requirements import RequirementAnalyzer
-from sdlc_ai_project.agents.architecture import ArchitectureDesignAgent
-from sdlc_ai_project.agents.skeletons import CodeSkeletonGenerator
-from sdlc_ai_project.agents.generator import CodeGenerator
+import threading
+from typing import Dict, Any, Optional, Callable
 from dotenv import load_dotenv
+from sdlc_ai_project.parsing import parse_json_from_markdown, process_agent_output
+from sdlc_ai_project.task_graph import kickoff_crew, TaskReuse, TaskRunner
 
 
 
 load_dotenv()
 
+_review_lock = threading.Lock()
+
 # -------------------------------
 # File Utilities
 # -------------------------------
@@ -67,6 +66,46 @@ def ensure_config():
             f.write("tasks: {}\n")
 
 
+# -------------------------------
+# Output Parsing Utilities
+# -------------------------------
+# Override the default collect_task_outputs function to avoid console input
+def as_crew(agent):
+    """Accept either a CrewBase agent or an already built (e.g. template-bound) Crew."""
+    return agent.crew() if callable(getattr(agent, "crew", None)) else agent
+
+
+def non_interactive_collect_outputs(agent, on_task_output: Optional[Callable[[str, Any], None]] = None,
+                                    reuse: Optional[TaskReuse] = None,
+                                    task_runners: Optional[Dict[str, TaskRunner]] = None) -> Dict[str, Any]:
+    """
+    Collect outputs from agent tasks without user interaction.
+
+    If `on_task_output` is given it is called with each task's name and parsed output
+    as soon as that task finishes, before the rest of the crew has run. Tasks with a
+    still-valid saved output in `reuse` are restored instead of running again, and
+    tasks named in `task_runners` are executed by their runner.
+    """
+    agent_crew = as_crew(agent)
+    task_callback = None
+    if on_task_output is not None:
+        task_callback = lambda task_output: on_task_output(
+            task_output.name, process_agent_output(parse_json_from_markdown(task_output.raw))
+        )
+    kickoff_crew(agent_crew, task_callback, reuse=reuse, task_runners=task_runners)
+    
+    outputs = {}
+    for task in agent_crew.tasks:
+        task_name = task.name
+        output = task.output.raw
+        # Parse any JSON in markdown code blocks
+        parsed_output = parse_json_from_markdown(output)
+        outputs[task_name] = parsed_output
+    
+    # Process the entire output structure to ensure proper JSON formatting
+    return process_agent_output(outputs)
+
+
 # -------------------------------
 # Agent Interaction Utilities
 # -------------------------------
@@ -91,23 +130,33 @@ def get_user_feedback(output: Any, task_name: str) -> Dict[str, Any]:
             print("Invalid input. Please enter 'yes', 'no', or 'modify'.")
 
 
-def collect_task_outputs(agent) -> Dict[str, Any]:
+def collect_task_outputs(agent, on_task_output: Optional[Callable[[str, Any], None]] = None,
+                         reuse: Optional[TaskReuse] = None,
+                         task_runners: Optional[Dict[str, TaskRunner]] = None) -> Dict[str, Any]:
     """Collect and validate outputs from agent tasks."""
 
-    agent_crew = agent.crew()
-    agent_crew.kickoff()  # Start the agent's crew
-    # agent.crew().kickoff()
-    print("\n--- Collecting Task Outputs ---")  
-
-    outputs = {}
-    for task in agent.crew().tasks:
-        task_name = task.name
-        output = task.output.raw
-        validated_output = get_user_feedback(output, task_name)
-        if validated_output is None:
-            print(f"Task {task_name} failed validation. Stopping execution.")
-            return None
-        outputs[task_name] = validated_output
+    agent_crew = as_crew(agent)
+    kickoff_crew(agent_crew, reuse=reuse, task_runners=task_runners)  # Start the agent's crew
+
+    # Stages can finish concurrently; review one stage at a time so prompts don't interleave
+    with _review_lock:
+        print("\n--- Collecting Task Outputs ---")
+
+        outputs = {}
+        for task in agent_crew.tasks:
+            task_name = task.name
+            if reuse is not None and task_name in reuse.reused:
+                # Already reviewed in an earlier run
+                outputs[task_name] = reuse.saved[task_name]["output"]
+                continue
+            output = task.output.raw
+            validated_output = get_user_feedback(output, task_name)
+            if validated_output is None:
+                print(f"Task {task_name} failed validation. Stopping execution.")
+                return None
+            outputs[task_name] = validated_output
+            if on_task_output is not None:
+                on_task_output(task_name, validated_output)
     return outputs
 
 
@@ -134,29 +183,19 @@ def collect_task_outputs(agent) -> Dict[str, Any]:
 #         return outputs
 #     return None
 
-def run_sdlc(user_requirements: str, project_context: str, llm, title: str) -> Optional[Dict[str, Any]]:
-    knowledge_agent = KnowledgeBaseAgent(user_requirements=user_requirements, project_context=project_context, llm=llm)
-    knowledge_agent_outputs = collect_task_outputs(knowledge_agent)
-    save_to_json("Knowledge", knowledge_agent_outputs, title)
-
-    req_analyzer = RequirementAnalyzer(user_requirements=user_requirements, project_context=project_context, llm=llm)
-    req_analyzer_outputs = collect_task_outputs(req_analyzer)
-    save_to_json("Requirements", req_analyzer_outputs, title)
-
-    arch_agent = ArchitectureDesignAgent(requirement_analysis=req_analyzer_outputs, tasks=req_analyzer_outputs['task_generation_task'], project_context=project_context, tech_stack=knowledge_agent_outputs['finalize_tech_stack'], extraction_task=req_analyzer_outputs['extraction_task'], llm=llm)
-    arch_agent_outputs = collect_task_outputs(arch_agent)
-    save_to_json("Architecture", arch_agent_outputs, title)
-
-    skeleton_agent = CodeSkeletonGenerator(architecture_design=arch_agent_outputs, project_context=project_context, llm=llm)
-    skeleton_agent_outputs = collect_task_outputs(skeleton_agent)
-    save_to_json("Skeletons", skeleton_agent_outputs, title)
-
-    code_generator_agent = CodeGenerator(architecture_design=arch_agent_outputs, project_context=project_context, skeletons= skeleton_agent_outputs['code_skeleton_task'], module_boilerplate=skeleton_agent_outputs["module_boilerplate_task"], llm=llm)
-    code_generator_agent_outputs = collect_task_outputs(code_generator_agent)
-    save_to_json("Generator", code_generator_agent_outputs, title)
-
-
-
-
-
-    return
\ No newline at end of file
+def run_sdlc(user_requirements: str, project_context: str, llm, title: str, resume: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    Run all five stages with interactive review, running independent stages concurrently.
+
+    Knowledge and Requirements only need the user input, so they run side by side;
+    Architecture starts once both are accepted, followed by Skeletons and Generator.
+    With `resume=True`, stages and tasks already saved under `title` are reused.
+    """
+    # Imported here because the pipeline module depends on this one
+    from sdlc_ai_project.pipeline import run_pipeline, StageRejected
+
+    try:
+        return run_pipeline(user_requirements, project_context, llm, title, collect=collect_task_outputs, resume=resume)
+    except StageRejected as e:
+        print(f"{e}. Stopping execution.")
+        return None
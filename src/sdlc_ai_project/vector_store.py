@@ -0,0 +1,384 @@
+import os
+import json
+import fcntl
+import threading
+from abc import ABC, abstractmethod
+from array import array
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+
+# Environment variables with defaults
+VECTOR_STORE = os.getenv("VECTOR_STORE", "chroma")  # "chroma" or "numpy"
+VECTOR_STORE_DIR = os.getenv("VECTOR_STORE_DIR", os.path.join(".", "db", "default_ragtool_db"))
+VECTOR_STORE_DTYPE = os.getenv("VECTOR_STORE_DTYPE", "float32")  # "float32" or "int8" for the numpy store
+
+# Rows scored per matrix product, bounding the memory a search over a large store takes
+SEARCH_BLOCK_ROWS = 65_536
+
+
+class VectorStore(ABC):
+    """
+    Interface the research tools index and search chunks through.
+
+    Chunks have a string id, a normalized embedding, the chunk text and flat metadata
+    (str/int/float/bool values). `where` filters match metadata exactly, or any of a
+    list of values.
+    """
+
+    @abstractmethod
+    def add(self, ids: Sequence[str], vectors: np.ndarray, documents: Sequence[str],
+            metadatas: Sequence[Dict[str, Any]]):
+        """Insert or replace chunks."""
+
+    @abstractmethod
+    def delete(self, ids: Sequence[str]):
+        """Remove chunks; unknown ids are ignored."""
+
+    @abstractmethod
+    def search(self, vector: np.ndarray, k: int = 5, where: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Return the `k` chunks most similar to `vector` as dicts with id, score, document and metadata."""
+
+    @abstractmethod
+    def count(self) -> int:
+        """The number of stored chunks."""
+
+    @abstractmethod
+    def get(self, ids: Sequence[str]) -> List[Dict[str, Any]]:
+        """The stored chunks among `ids` as dicts with id, vector, document and metadata, in `ids` order."""
+
+    @abstractmethod
+    def scan(self, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """Every chunk as a dict with id, document and metadata (no vector)."""
+
+
+class ChromaVectorStore(VectorStore):
+    """Chroma collection persisted under `directory`, given precomputed embeddings."""
+
+    def __init__(self, collection: str, directory: str = VECTOR_STORE_DIR):
+        import chromadb
+
+        self.client = chromadb.PersistentClient(path=directory)
+        self.collection = self.client.get_or_create_collection(
+            collection, embedding_function=None, metadata={"hnsw:space": "cosine"},
+        )
+
+    @staticmethod
+    def _where(where: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if not where:
+            return None
+        clauses = [
+            {key: {"$in": list(value)} if isinstance(value, (list, tuple, set)) else value}
+            for key, value in where.items()
+        ]
+        return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+    def add(self, ids, vectors, documents, metadatas):
+        if len(ids):
+            self.collection.upsert(ids=list(ids), embeddings=np.asarray(vectors, dtype=np.float32).tolist(),
+                                   documents=list(documents), metadatas=list(metadatas))
+
+    def delete(self, ids):
+        if len(ids):
+            self.collection.delete(ids=list(ids))
+
+    def search(self, vector, k=5, where=None):
+        if not self.collection.count():
+            return []
+        result = self.collection.query(query_embeddings=[np.asarray(vector, dtype=np.float32).tolist()],
+                                       n_results=k, where=self._where(where))
+        return [
+            {"id": chunk_id, "score": 1 - distance, "document": document, "metadata": metadata}
+            for chunk_id, distance, document, metadata in zip(
+                result["ids"][0], result["distances"][0], result["documents"][0], result["metadatas"][0],
+            )
+        ]
+
+    def count(self):
+        return self.collection.count()
+
+    def get(self, ids):
+        if not len(ids):
+            return []
+        result = self.collection.get(ids=list(ids), include=["embeddings", "documents", "metadatas"])
+        found = {
+            chunk_id: {"id": chunk_id, "vector": np.asarray(vector, dtype=np.float32), "document": document,
+                       "metadata": metadata}
+            for chunk_id, vector, document, metadata in zip(
+                result["ids"], result["embeddings"], result["documents"], result["metadatas"],
+            )
+        }
+        return [found[chunk_id] for chunk_id in ids if chunk_id in found]
+
+    def scan(self, batch_size=1000):
+        offset = 0
+        while True:
+            result = self.collection.get(limit=batch_size, offset=offset, include=["documents", "metadatas"])
+            for chunk_id, document, metadata in zip(result["ids"], result["documents"], result["metadatas"]):
+                yield {"id": chunk_id, "document": document, "metadata": metadata}
+            if len(result["ids"]) < batch_size:
+                return
+            offset += batch_size
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    In-process store: embeddings in a memory-mapped matrix, everything else in a log.
+
+    `directory/collection` holds the raw row-major matrix (float32, or int8 with a
+    float32 scale per row), `meta.json` with its dimension and dtype, and `log.jsonl`,
+    an append-only log of added chunks (id, row, document, metadata) and deletions.
+    Inserts append a batch of rows and one log write; replacing or deleting a chunk
+    only logs it, and its old row is skipped by searches. The first read replays the log,
+    keeping ids and metadata in memory and reading documents back from the log for
+    results only; rows other processes appended are picked up before each read.
+    Search is an exact cosine top-k over blocks of the memory map.
+    """
+
+    def __init__(self, collection: str, directory: str = VECTOR_STORE_DIR, dtype: str = VECTOR_STORE_DTYPE):
+        if dtype not in ("float32", "int8"):
+            raise ValueError(f"Unsupported vector store dtype: {dtype}")
+        self.path = os.path.join(directory, collection)
+        os.makedirs(self.path, exist_ok=True)
+        self.dtype = dtype
+        self.dim: Optional[int] = None
+        self.rows: Dict[str, int] = {}  # Live chunk id -> row
+        self.ids: List[Optional[str]] = []  # Row -> chunk id, None once replaced or deleted
+        self.metadatas: List[Dict[str, Any]] = []
+        self._alive = bytearray()  # Row -> 1 while its chunk is live
+        self._offsets = array("q")  # Row -> log offset of the record that added it
+        self._by_value: Dict[Tuple[str, Any], set] = {}
+        self._log_offset = 0
+        self._matrix: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None
+        self._lock = threading.RLock()
+        self._read_meta()
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _read_meta(self):
+        if os.path.exists(self._file("meta.json")):
+            with open(self._file("meta.json"), "r") as f:
+                meta = json.load(f)
+            self.dim, self.dtype = meta["dim"], meta["dtype"]
+
+    @contextmanager
+    def _write_lock(self):
+        with open(self._file("write.lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _apply(self, record: Dict[str, Any], offset: int):
+        chunk_id = record["id"]
+        old = self.rows.pop(chunk_id, None)
+        if old is not None:
+            self.ids[old] = None
+            self._alive[old] = 0
+            for key, value in self.metadatas[old].items():
+                self._by_value.get((key, value), set()).discard(old)
+        if record["op"] != "add":
+            return
+        row = record["row"]
+        while len(self.ids) <= row:
+            self.ids.append(None)
+            self.metadatas.append({})
+            self._alive.append(0)
+            self._offsets.append(-1)
+        self.rows[chunk_id] = row
+        self.ids[row] = chunk_id
+        self.metadatas[row] = record["metadata"]
+        self._alive[row] = 1
+        self._offsets[row] = offset
+        for key, value in record["metadata"].items():
+            self._by_value.setdefault((key, value), set()).add(row)
+
+    def _refresh(self):
+        """Replay log records appended since the last read, by this or another process."""
+        if not os.path.exists(self._file("log.jsonl")):
+            return
+        if os.path.getsize(self._file("log.jsonl")) == self._log_offset:
+            return
+        if self.dim is None:
+            self._read_meta()
+        with open(self._file("log.jsonl"), "rb") as f:
+            f.seek(self._log_offset)
+            data = f.read()
+        # A record still being written by another process is read next time
+        complete = data[:data.rfind(b"\n") + 1]
+        offset = self._log_offset
+        for line in complete.splitlines(keepends=True):
+            if line.strip():
+                self._apply(json.loads(line), offset)
+            offset += len(line)
+        self._log_offset += len(complete)
+        self._matrix = None
+
+    def _documents(self, rows: Sequence[int]) -> List[str]:
+        with open(self._file("log.jsonl"), "rb") as f:
+            documents = []
+            for row in rows:
+                f.seek(self._offsets[row])
+                documents.append(json.loads(f.readline())["document"])
+        return documents
+
+    def _row_bytes(self) -> int:
+        return self.dim * (4 if self.dtype == "float32" else 1)
+
+    def _load_matrix(self) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """The memory-mapped rows the log refers to, and the int8 scales."""
+        if self._matrix is None or len(self._matrix) < len(self.ids):
+            rows = len(self.ids)
+            dtype = np.float32 if self.dtype == "float32" else np.int8
+            self._matrix = np.memmap(self._file("vectors.bin"), dtype=dtype, mode="r", shape=(rows, self.dim)) \
+                if rows else np.zeros((0, self.dim or 0), dtype=dtype)
+            if self.dtype == "int8":
+                self._scales = np.memmap(self._file("scales.bin"), dtype=np.float32, mode="r", shape=(rows,)) \
+                    if rows else np.zeros(0, dtype=np.float32)
+        return self._matrix, self._scales
+
+    def _encode(self, vectors: np.ndarray) -> Tuple[bytes, Optional[bytes]]:
+        if self.dtype == "float32":
+            return vectors.astype(np.float32).tobytes(), None
+        peaks = np.abs(vectors).max(axis=1)
+        scales = np.where(peaks > 0, 127.0 / np.maximum(peaks, 1e-12), 1.0).astype(np.float32)
+        quantized = np.clip(np.rint(vectors * scales[:, None]), -127, 127).astype(np.int8)
+        return quantized.tobytes(), scales.tobytes()
+
+    def add(self, ids, vectors, documents, metadatas):
+        if not len(ids):
+            return
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        with self._lock, self._write_lock():
+            self._read_meta()
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                with open(self._file("meta.json"), "w") as f:
+                    json.dump({"dim": self.dim, "dtype": self.dtype}, f)
+            if vectors.shape[1] != self.dim:
+                raise ValueError(f"Expected {self.dim}-dimensional vectors, got {vectors.shape[1]}")
+            self._refresh()
+            matrix, scales = self._encode(vectors)
+            # Rows go in before the log names them, so readers never see a missing row
+            with open(self._file("vectors.bin"), "ab") as f:
+                first = f.tell() // self._row_bytes()
+                f.write(matrix)
+            if scales is not None:
+                with open(self._file("scales.bin"), "ab") as f:
+                    f.write(scales)
+            records = [
+                {"op": "add", "id": chunk_id, "row": first + n, "document": document, "metadata": metadata}
+                for n, (chunk_id, document, metadata) in enumerate(zip(ids, documents, metadatas))
+            ]
+            self._append_log(records)
+
+    def delete(self, ids):
+        with self._lock, self._write_lock():
+            self._refresh()
+            self._append_log([{"op": "delete", "id": chunk_id} for chunk_id in ids if chunk_id in self.rows])
+
+    def _append_log(self, records: List[Dict[str, Any]]):
+        if not records:
+            return
+        lines = [(json.dumps(record) + "\n").encode("utf-8") for record in records]
+        with open(self._file("log.jsonl"), "ab") as f:
+            offset = f.tell()
+            f.write(b"".join(lines))
+        # Holding the write lock after a refresh, these are the only records we haven't read
+        for record, line in zip(records, lines):
+            self._apply(record, offset)
+            offset += len(line)
+        self._log_offset = offset
+        self._matrix = None
+
+    def _candidates(self, where: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Rows matching `where`, or None for every live row."""
+        if not where:
+            return None
+        rows: Optional[set] = None
+        for key, value in where.items():
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            matching = set().union(*(self._by_value.get((key, v), set()) for v in values))
+            rows = matching if rows is None else rows & matching
+        return np.array(sorted(rows), dtype=np.int64)
+
+    def search(self, vector, k=5, where=None):
+        with self._lock:
+            self._refresh()
+            if not self.rows:
+                return []
+            matrix, scales = self._load_matrix()
+            query = np.asarray(vector, dtype=np.float32)
+            candidates = self._candidates(where)
+            if candidates is None:
+                scores = np.concatenate([
+                    matrix[start:start + SEARCH_BLOCK_ROWS] @ query for start in range(0, len(matrix), SEARCH_BLOCK_ROWS)
+                ]).astype(np.float32)
+                rows = np.arange(len(matrix))
+            else:
+                scores = (matrix[candidates] @ query).astype(np.float32) if len(candidates) else np.zeros(0, np.float32)
+                rows = candidates
+            if scales is not None:
+                scores = scores / scales[rows]
+            live = np.frombuffer(bytes(self._alive), dtype=np.uint8)[rows].astype(bool)
+            scores, rows = scores[live], rows[live]
+            if not len(rows):
+                return []
+            k = min(k, len(rows))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            documents = self._documents([int(rows[i]) for i in top])
+            return [
+                {"id": self.ids[rows[i]], "score": float(scores[i]), "document": document,
+                 "metadata": self.metadatas[rows[i]]}
+                for i, document in zip(top, documents)
+            ]
+
+    def count(self):
+        with self._lock:
+            self._refresh()
+            return len(self.rows)
+
+    def get(self, ids):
+        with self._lock:
+            self._refresh()
+            rows = [self.rows[chunk_id] for chunk_id in ids if chunk_id in self.rows]
+            if not rows:
+                return []
+            matrix, scales = self._load_matrix()
+            vectors = matrix[rows].astype(np.float32)
+            if scales is not None:
+                vectors /= scales[rows][:, None]
+            return [
+                {"id": self.ids[row], "vector": vector, "document": document, "metadata": self.metadatas[row]}
+                for row, vector, document in zip(rows, vectors, self._documents(rows))
+            ]
+
+    def scan(self, batch_size=1000):
+        with self._lock:
+            self._refresh()
+            rows = sorted(self.rows.values())
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            for row, document in zip(batch, self._documents(batch)):
+                yield {"id": self.ids[row], "document": document, "metadata": self.metadatas[row]}
+
+
+_stores: Dict[str, VectorStore] = {}
+_stores_lock = threading.Lock()
+
+
+def open_vector_store(collection: str) -> VectorStore:
+    """Return the process-wide store for `collection`, opening it on first use. VECTOR_STORE picks the backend."""
+    with _stores_lock:
+        if collection not in _stores:
+            if VECTOR_STORE == "numpy":
+                _stores[collection] = NumpyVectorStore(collection)
+            elif VECTOR_STORE == "chroma":
+                _stores[collection] = ChromaVectorStore(collection)
+            else:
+                raise ValueError(f"Unknown VECTOR_STORE: {VECTOR_STORE}")
+        return _stores[collection]
@@ -15,7 +15,11 @@ setup(
         "mypy-extensions>=1.0.0",
         "python-dateutil>=2.8.2",
         "pathlib>=1.0.1",
+        "numpy>=1.24.0",
     ],
+    extras_require={
+        "embeddings": ["sentence-transformers>=2.2.0"],
+    },
     python_requires=">=3.8",
 ) 
 